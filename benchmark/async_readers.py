@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+benchmark/async_readers.py
+
+Measures the read throughput of "AsyncStoredFile" under many concurrent
+readers compared to sequential reads with "StoredFile".
+"""
+
+from argparse import ArgumentParser
+from tempfile import mkdtemp
+from time import time
+import asyncio
+import json
+import shutil
+
+from environment import setup_environment
+
+def create_entries(count, size):
+    """
+Creates StoredFile entries with random content.
+
+:param count: Number of entries
+:param size: Size of each entry
+
+:return: (list) StoredFile IDs
+:since:  v0.2.00
+    """
+
+    from dNG.data.stored_file import StoredFile
+
+    _return = [ ]
+    data = bytearray(size)
+
+    for position in range(count):
+        stored_file = StoredFile()
+        stored_file.set_resource("benchmark:///async_readers/{0:d}".format(position))
+        stored_file.write(data)
+        stored_file.save()
+
+        _return.append(stored_file.get_id())
+        stored_file.close()
+    #
+
+    return _return
+#
+
+async def read_async(ids, readers, chunk_size):
+    """
+Reads all entries given with the number of concurrent readers given.
+
+:param ids: StoredFile IDs
+:param readers: Number of concurrent readers
+:param chunk_size: Number of bytes read for each chunk
+
+:return: (int) Number of bytes read
+:since:  v0.2.00
+    """
+
+    from dNG.data.async_stored_file import AsyncStoredFile
+
+    async def read_entry(_id):
+        _return = 0
+
+        async with (await AsyncStoredFile.load_id(_id)) as stored_file:
+            async for data in stored_file.iter_chunks(chunk_size): _return += len(data)
+        #
+
+        return _return
+    #
+
+    results = await asyncio.gather(*[ read_entry(ids[position % len(ids)]) for position in range(readers) ])
+    return sum(results)
+#
+
+def read_sequential(ids, readers, chunk_size):
+    """
+Reads all entries given sequentially as often as concurrent readers would.
+
+:param ids: StoredFile IDs
+:param readers: Number of reads
+:param chunk_size: Number of bytes read for each chunk
+
+:return: (int) Number of bytes read
+:since:  v0.2.00
+    """
+
+    from dNG.data.stored_file import StoredFile
+
+    _return = 0
+
+    for position in range(readers):
+        stored_file = StoredFile.load_id(ids[position % len(ids)])
+
+        try:
+            data = stored_file.read(chunk_size)
+
+            while (data is not None and len(data) > 0):
+                _return += len(data)
+                data = stored_file.read(chunk_size)
+            #
+        finally: stored_file.close()
+    #
+
+    return _return
+#
+
+def main():
+    """
+Runs the benchmark and prints the results as JSON.
+
+:since: v0.2.00
+    """
+
+    parser = ArgumentParser(description = "AsyncStoredFile concurrent reader benchmark")
+    parser.add_argument("--entries", type = int, default = 16)
+    parser.add_argument("--entry-size", type = int, default = 4194304)
+    parser.add_argument("--readers", type = int, default = 256)
+    parser.add_argument("--chunk-size", type = int, default = 65536)
+    args = parser.parse_args()
+
+    base_path = mkdtemp(prefix = "pas_file_store_benchmark_")
+
+    try:
+        setup_environment(base_path)
+        ids = create_entries(args.entries, args.entry_size)
+
+        results = { "entries": args.entries,
+                    "entry_size": args.entry_size,
+                    "readers": args.readers,
+                    "chunk_size": args.chunk_size
+                  }
+
+        time_started = time()
+        bytes_read = read_sequential(ids, args.readers, args.chunk_size)
+        time_elapsed = time() - time_started
+
+        results['sequential'] = { "bytes": bytes_read,
+                                  "seconds": time_elapsed,
+                                  "mb_per_second": bytes_read / 1048576.0 / time_elapsed
+                                }
+
+        time_started = time()
+        bytes_read = asyncio.run(read_async(ids, args.readers, args.chunk_size))
+        time_elapsed = time() - time_started
+
+        results['async'] = { "bytes": bytes_read,
+                             "seconds": time_elapsed,
+                             "mb_per_second": bytes_read / 1048576.0 / time_elapsed
+                           }
+
+        print(json.dumps(results, indent = 2))
+    finally: shutil.rmtree(base_path, True)
+#
+
+if (__name__ == "__main__"): main()
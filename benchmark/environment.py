@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+benchmark/environment.py
+"""
+
+from os import path
+import os
+
+def setup_environment(base_path, settings = None):
+    """
+Configures a SQLite database and file store directories below the given
+base path and creates all database tables required.
+
+:param base_path: Base path for the database file and file stores
+:param settings: Additional settings to be set
+
+:since: v0.2.00
+    """
+
+    from dNG.data.settings import Settings
+
+    Settings.set("path_data", base_path)
+    Settings.set("pas_database_url", "sqlite:///{0}".format(path.join(base_path, "pas_file_store.sqlite")))
+    Settings.set("pas_database_auto_maintenance", True)
+
+    for store_id in ( "default", "cache" ):
+        store_path = path.join(base_path, store_id)
+        if (not path.isdir(store_path)): os.mkdir(store_path)
+
+        Settings.set("pas_file_store_{0}_path".format(store_id), store_path)
+    #
+
+    if (settings is not None):
+        for ( key, value ) in settings.items(): Settings.set(key, value)
+    #
+
+    # Table names depend on the settings above
+    from dNG.database.connection import Connection
+    from dNG.database.instances.abstract import Abstract
+    from dNG.plugins.database.pas_file_store import load_all
+
+    load_all({ })
+
+    with Connection.get_instance() as connection: Abstract.metadata.create_all(connection.get_bind())
+#
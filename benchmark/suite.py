@@ -0,0 +1,414 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+benchmark/suite.py
+
+Runs the file store benchmark suite against a SQLite database and temporary
+file store directories. Results are written as JSON to track regressions
+between releases.
+"""
+
+from argparse import ArgumentParser
+from os import path
+from random import Random
+from tempfile import mkdtemp
+from time import time
+import json
+import os
+import platform
+import shutil
+import sys
+
+from environment import setup_environment
+
+CLEANUP_ENTRY_SIZE = 4096
+"""
+Size accounted for each row inserted for the cleanup benchmark
+"""
+CLEANUP_INSERT_SIZE = 10000
+"""
+Number of rows inserted with one statement for the cleanup benchmark
+"""
+
+def get_latency_statistics(latencies):
+    """
+Returns the statistics of the given latencies.
+
+:param latencies: List of latencies in seconds
+
+:return: (dict) Count, mean, percentiles and maximum in milliseconds
+:since:  v0.2.00
+    """
+
+    latencies = sorted(latencies)
+    count = len(latencies)
+
+    return { "count": count,
+             "mean_ms": (1000.0 * sum(latencies) / count if (count > 0) else None),
+             "p50_ms": (1000.0 * latencies[int(0.50 * (count - 1))] if (count > 0) else None),
+             "p95_ms": (1000.0 * latencies[int(0.95 * (count - 1))] if (count > 0) else None),
+             "p99_ms": (1000.0 * latencies[int(0.99 * (count - 1))] if (count > 0) else None),
+             "max_ms": (1000.0 * latencies[-1] if (count > 0) else None)
+           }
+#
+
+def get_throughput(size, count, seconds):
+    """
+Returns the throughput for the given number of bytes and operations.
+
+:param size: Number of bytes
+:param count: Number of operations
+:param seconds: Seconds elapsed
+
+:return: (dict) Throughput
+:since:  v0.2.00
+    """
+
+    return { "bytes": size,
+             "operations": count,
+             "seconds": seconds,
+             "mb_per_second": (size / 1048576.0 / seconds if (seconds > 0) else None),
+             "operations_per_second": (count / seconds if (seconds > 0) else None)
+           }
+#
+
+def run_cleanup(rows, expired):
+    """
+Inserts the given number of rows and measures "db_cleanup()". Expired rows
+are removed completely. Otherwise the size limit is set to evict half of
+them.
+
+:param rows: Number of rows
+:param expired: True to measure the removal of expired entries
+
+:return: (dict) Cleanup results
+:since:  v0.2.00
+    """
+
+    from dNG.data.file_store.store_registry import StoreRegistry
+    from dNG.data.file_store.store_usage import StoreUsage
+    from dNG.data.settings import Settings
+    from dNG.data.stored_file import StoredFile
+    from dNG.database.connection import Connection
+    from dNG.database.instances.stored_file import StoredFile as _DbStoredFile
+    from dNG.database.transaction_context import TransactionContext
+
+    store_id = "benchmark_cleanup"
+    timestamp = int(time())
+
+    Settings.set("pas_file_store_{0}_max_mb_size".format(store_id),
+                 (-1 if (expired) else max(1, rows * CLEANUP_ENTRY_SIZE // 2097152))
+                )
+
+    StoreRegistry.get_instance().reload()
+
+    table = _DbStoredFile.__table__
+    time_started = time()
+
+    for offset in range(0, rows, CLEANUP_INSERT_SIZE):
+        values = [ ]
+
+        for position in range(offset, min(rows, offset + CLEANUP_INSERT_SIZE)):
+            resource = "benchmark:///cleanup/{0:d}".format(position)
+
+            values.append({ "id": "{0:032x}".format(position),
+                            "time_stored": timestamp,
+                            "time_last_accessed": timestamp - rows + position,
+                            "timeout": ((timestamp - 1) if (expired) else None),
+                            "store_id": store_id,
+                            "resource": resource,
+                            "resource_hash": _DbStoredFile.get_resource_hash(resource),
+                            "size": CLEANUP_ENTRY_SIZE,
+                            "file_location": "{0:032x}".format(position),
+                            "access_count": 0,
+                            "eviction_priority": timestamp - rows + position
+                          })
+        #
+
+        with Connection.get_instance() as connection, TransactionContext(): connection.execute(table.insert(), values)
+    #
+
+    with Connection.get_instance() as connection, TransactionContext(): StoreUsage.reconcile(connection, store_id)
+
+    time_inserted = time() - time_started
+
+    stored_file = StoredFile()
+    stored_file.set_data_attributes(store_id = store_id)
+
+    time_started = time()
+    report = stored_file.db_cleanup()
+    time_elapsed = time() - time_started
+
+    # Rows not evicted are removed for the next run
+    with Connection.get_instance() as connection, TransactionContext():
+        connection.query(_DbStoredFile).filter(_DbStoredFile.store_id == store_id).delete(synchronize_session = False)
+        StoreUsage.reconcile(connection, store_id)
+    #
+
+    entries_removed = report['entries_expired'] + report['entries_evicted']
+
+    return { "rows": rows,
+             "mode": ("expired" if (expired) else "evicted"),
+             "insert_seconds": time_inserted,
+             "seconds": time_elapsed,
+             "entries_expired": report['entries_expired'],
+             "entries_evicted": report['entries_evicted'],
+             "entries_per_second": (entries_removed / time_elapsed if (time_elapsed > 0) else None)
+           }
+#
+
+def run_fills(base_path, count, size):
+    """
+Measures the fill rate of "CachedImplementation.store_cached_vfs_url()" for
+local source files.
+
+:param base_path: Base path of the benchmark environment
+:param count: Number of VFS URLs to be cached
+:param size: Size of each source file
+
+:return: (dict) Fill results
+:since:  v0.2.00
+    """
+
+    from dNG.vfs.cached_implementation import CachedImplementation
+
+    source_path = path.join(base_path, "sources")
+    os.mkdir(source_path)
+
+    data = os.urandom(size)
+    vfs_urls = [ ]
+
+    for position in range(count):
+        file_path_name = path.join(source_path, "source_{0:d}.bin".format(position))
+        with open(file_path_name, "wb") as source_file: source_file.write(data)
+
+        vfs_urls.append("file://{0}".format(file_path_name))
+    #
+
+    latencies = [ ]
+    time_started = time()
+
+    for vfs_url in vfs_urls:
+        time_fill_started = time()
+        CachedImplementation.store_cached_vfs_url(vfs_url)
+        latencies.append(time() - time_fill_started)
+    #
+
+    _return = get_throughput(count * size, count, time() - time_started)
+    _return['latency'] = get_latency_statistics(latencies)
+
+    return _return
+#
+
+def run_loads(ids, resources, iterations, random):
+    """
+Measures the latency of "StoredFile.load_id()" and
+"StoredFile.load_resource()".
+
+:param ids: StoredFile IDs
+:param resources: StoredFile resources
+:param iterations: Number of loads for each method
+:param random: Random instance
+
+:return: (dict) Load latency results
+:since:  v0.2.00
+    """
+
+    from dNG.data.stored_file import StoredFile
+
+    _return = { }
+
+    for ( name, load_method, keys ) in ( ( "load_id", StoredFile.load_id, ids ),
+                                         ( "load_resource", StoredFile.load_resource, resources )
+                                       ):
+        latencies = [ ]
+
+        for _ in range(iterations):
+            key = random.choice(keys)
+
+            time_started = time()
+            stored_file = load_method(key)
+            latencies.append(time() - time_started)
+
+            stored_file.close()
+        #
+
+        _return[name] = get_latency_statistics(latencies)
+    #
+
+    return _return
+#
+
+def run_reads(ids, size, chunk_size, random_reads, random):
+    """
+Measures sequential read throughput through "StoredFile.read()" and the
+throughput of reads at random offsets.
+
+:param ids: StoredFile IDs
+:param size: Size of each entry
+:param chunk_size: Number of bytes read for each call
+:param random_reads: Number of reads at random offsets
+:param random: Random instance
+
+:return: (dict) Read throughput results
+:since:  v0.2.00
+    """
+
+    from dNG.data.stored_file import StoredFile
+
+    bytes_read = 0
+    time_started = time()
+
+    for _id in ids:
+        stored_file = StoredFile.load_id(_id)
+
+        try:
+            data = stored_file.read(chunk_size)
+
+            while (data is not None and len(data) > 0):
+                bytes_read += len(data)
+                data = stored_file.read(chunk_size)
+            #
+        finally: stored_file.close()
+    #
+
+    _return = { "sequential": get_throughput(bytes_read, len(ids), time() - time_started) }
+
+    stored_files = [ StoredFile.load_id(_id) for _id in ids ]
+    offset_max = max(0, size - chunk_size)
+
+    bytes_read = 0
+    time_started = time()
+
+    try:
+        for _ in range(random_reads):
+            stored_file = random.choice(stored_files)
+
+            stored_file.seek(random.randint(0, offset_max))
+            data = stored_file.read(chunk_size)
+
+            if (data is not None): bytes_read += len(data)
+        #
+    finally:
+        for stored_file in stored_files: stored_file.close()
+    #
+
+    _return['random'] = get_throughput(bytes_read, random_reads, time() - time_started)
+
+    return _return
+#
+
+def run_writes(count, size):
+    """
+Measures the throughput of "StoredFile.write()" and "StoredFile.save()".
+
+:param count: Number of entries
+:param size: Size of each entry
+
+:return: (tuple) Write results, StoredFile IDs and resources
+:since:  v0.2.00
+    """
+
+    from dNG.data.stored_file import StoredFile
+
+    data = os.urandom(size)
+    ids = [ ]
+    resources = [ ]
+    save_latencies = [ ]
+
+    time_started = time()
+
+    for position in range(count):
+        resource = "benchmark:///entries/{0:d}".format(position)
+
+        stored_file = StoredFile()
+        stored_file.set_resource(resource)
+        stored_file.write(data)
+
+        time_save_started = time()
+        stored_file.save()
+        save_latencies.append(time() - time_save_started)
+
+        ids.append(stored_file.get_id())
+        resources.append(resource)
+
+        stored_file.close()
+    #
+
+    _return = get_throughput(count * size, count, time() - time_started)
+    _return['save_latency'] = get_latency_statistics(save_latencies)
+
+    return ( _return, ids, resources )
+#
+
+def main():
+    """
+Runs the benchmark suite and writes the results as JSON.
+
+:since: v0.2.00
+    """
+
+    parser = ArgumentParser(description = "pas_file_store benchmark suite")
+    parser.add_argument("--entries", type = int, default = 1000)
+    parser.add_argument("--entry-size", type = int, default = 65536)
+    parser.add_argument("--chunk-size", type = int, default = 4096)
+    parser.add_argument("--loads", type = int, default = 10000)
+    parser.add_argument("--random-reads", type = int, default = 10000)
+    parser.add_argument("--fills", type = int, default = 500)
+    parser.add_argument("--cleanup-rows", type = int, nargs = "*", default = [ 10000, 100000, 1000000 ])
+    parser.add_argument("--seed", type = int, default = 42)
+    parser.add_argument("--output", help = "JSON file to write the results to instead of stdout")
+    args = parser.parse_args()
+
+    base_path = mkdtemp(prefix = "pas_file_store_benchmark_")
+    cleanup_path = path.join(base_path, "benchmark_cleanup")
+
+    os.mkdir(cleanup_path)
+
+    try:
+        setup_environment(base_path, { "pas_file_store_benchmark_cleanup_path": cleanup_path })
+        random = Random(args.seed)
+
+        results = { "parameters": vars(args).copy(),
+                    "environment": { "python": sys.version.split()[0],
+                                     "platform": platform.platform(),
+                                     "time": int(time())
+                                   }
+                  }
+
+        del(results['parameters']['output'])
+
+        ( results['write'], ids, resources ) = run_writes(args.entries, args.entry_size)
+        results.update(run_loads(ids, resources, args.loads, random))
+        results['read'] = run_reads(ids, args.entry_size, args.chunk_size, args.random_reads, random)
+        results['store_cached_vfs_url'] = run_fills(base_path, args.fills, args.entry_size)
+
+        results['db_cleanup'] = [ ]
+
+        for rows in args.cleanup_rows:
+            results['db_cleanup'].append(run_cleanup(rows, True))
+            results['db_cleanup'].append(run_cleanup(rows, False))
+        #
+
+        output = json.dumps(results, indent = 2, sort_keys = True)
+
+        if (args.output is None): print(output)
+        else:
+            with open(args.output, "w") as output_file: output_file.write(output + "\n")
+        #
+    finally: shutil.rmtree(base_path, True)
+#
+
+if (__name__ == "__main__"): main()
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+#echo(pasFileStoreVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import asyncio
+
+from dNG.data.settings import Settings
+from dNG.data.stored_file import StoredFile
+from dNG.runtime.thread_lock import ThreadLock
+
+class AsyncStoredFile(object):
+    """
+"AsyncStoredFile" provides an asyncio facade for StoredFile instances.
+Database work and file I/O are executed on separate, bounded thread pools.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: file_store
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;mpl2
+             Mozilla Public License, v. 2.0
+    """
+
+    CHUNK_SIZE = 65536
+    """
+Default number of bytes returned for each chunk of an asynchronous iteration
+    """
+
+    _db_executor = None
+    """
+Thread pool executor for database work
+    """
+    _io_executor = None
+    """
+Thread pool executor for file I/O
+    """
+    _lock = ThreadLock()
+    """
+Thread safety lock
+    """
+
+    def __init__(self, stored_file):
+        """
+Constructor __init__(AsyncStoredFile)
+
+:param stored_file: StoredFile instance
+
+:since: v0.2.00
+        """
+
+        self.stored_file = stored_file
+        """
+Encapsulated StoredFile instance
+        """
+    #
+
+    def __aiter__(self):
+        """
+python.org: Return an asynchronous iterator object.
+
+:return: (object) Asynchronous iterator
+:since:  v0.2.00
+        """
+
+        return self.iter_chunks()
+    #
+
+    async def __aenter__(self):
+        """
+python.org: Enter the runtime context related to this object.
+
+:return: (object) AsyncStoredFile instance
+:since:  v0.2.00
+        """
+
+        return self
+    #
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """
+python.org: Exit the runtime context related to this object.
+
+:return: (bool) True to suppress exceptions
+:since:  v0.2.00
+        """
+
+        await self.close()
+        return False
+    #
+
+    async def close(self):
+        """
+Flushes and closes the StoredFile instance.
+
+:since: v0.2.00
+        """
+
+        await AsyncStoredFile.run_in_io_executor(self.stored_file.close)
+    #
+
+    async def delete(self):
+        """
+Deletes the StoredFile entry.
+
+:return: (bool) True on success
+:since:  v0.2.00
+        """
+
+        return await AsyncStoredFile.run_in_db_executor(self.stored_file.delete)
+    #
+
+    async def iter_chunks(self, chunk_size = None, offset = 0):
+        """
+Returns an asynchronous iterator over the data of the StoredFile instance.
+Positional reads are used and the stream position is not changed.
+
+:param chunk_size: Maximum number of bytes of each chunk
+:param offset: Offset of the first byte to be returned
+
+:return: (object) Asynchronous iterator
+:since:  v0.2.00
+        """
+
+        if (chunk_size is None): chunk_size = self.__class__.CHUNK_SIZE
+
+        while (True):
+            data = await self.read_range(offset, chunk_size)
+            if (len(data) < 1): break
+
+            offset += len(data)
+            yield data
+        #
+    #
+
+    async def read(self, n = 0):
+        """
+python.org: Read up to n bytes from the object and return them.
+
+:param n: How many bytes to read from the current position (0 means until
+          EOF)
+
+:return: (bytes) Data; None if EOF
+:since:  v0.2.00
+        """
+
+        return await AsyncStoredFile.run_in_io_executor(self.stored_file.read, n)
+    #
+
+    async def read_range(self, offset, length):
+        """
+Reads up to the given number of bytes starting at the given offset.
+
+:param offset: Offset of the first byte to be read
+:param length: Number of bytes to be read
+
+:return: (bytes) Data; empty if the offset is at or behind EOF
+:since:  v0.2.00
+        """
+
+        return await AsyncStoredFile.run_in_io_executor(self.stored_file.read_range, offset, length)
+    #
+
+    async def save(self):
+        """
+Saves changes of the StoredFile instance.
+
+:since: v0.2.00
+        """
+
+        await AsyncStoredFile.run_in_db_executor(self.stored_file.save)
+    #
+
+    async def set_data_attributes(self, **kwargs):
+        """
+Sets values given as keyword arguments to this method.
+
+:since: v0.2.00
+        """
+
+        await AsyncStoredFile.run_in_db_executor(partial(self.stored_file.set_data_attributes, **kwargs))
+    #
+
+    async def write(self, b):
+        """
+python.org: Write the given bytes or bytearray object, b, to the underlying
+raw stream and return the number of bytes written.
+
+:param b: (Over)write file with the given data at the current position
+
+:return: (int) Number of bytes written
+:since:  v0.2.00
+        """
+
+        return await AsyncStoredFile.run_in_io_executor(self.stored_file.write, b)
+    #
+
+    @staticmethod
+    def _get_executor(executor_attribute, setting_name, default_max_workers):
+        """
+Returns the thread pool executor stored in the given class attribute.
+
+:param executor_attribute: Class attribute name
+:param setting_name: Setting name for the maximum number of workers
+:param default_max_workers: Default maximum number of workers
+
+:return: (object) Thread pool executor
+:since:  v0.2.00
+        """
+
+        _return = getattr(AsyncStoredFile, executor_attribute)
+
+        if (_return is None):
+            with AsyncStoredFile._lock:
+                # Thread safety
+                _return = getattr(AsyncStoredFile, executor_attribute)
+
+                if (_return is None):
+                    _return = ThreadPoolExecutor(max_workers = int(Settings.get(setting_name, default_max_workers)))
+                    setattr(AsyncStoredFile, executor_attribute, _return)
+                #
+            #
+        #
+
+        return _return
+    #
+
+    @classmethod
+    async def load_id(cls, _id, stored_file_class = StoredFile):
+        """
+Load StoredFile by ID.
+
+:param cls: Encapsulating class
+:param _id: StoredFile ID
+:param stored_file_class: StoredFile class to be used
+
+:return: (object) AsyncStoredFile instance on success
+:since:  v0.2.00
+        """
+
+        stored_file = await AsyncStoredFile.run_in_db_executor(stored_file_class.load_id, _id)
+        return cls(stored_file)
+    #
+
+    @classmethod
+    async def load_resource(cls, resource, stored_file_class = StoredFile):
+        """
+Load StoredFile by the resource.
+
+:param cls: Encapsulating class
+:param resource: StoredFile resource
+:param stored_file_class: StoredFile class to be used
+
+:return: (object) AsyncStoredFile instance on success
+:since:  v0.2.00
+        """
+
+        stored_file = await AsyncStoredFile.run_in_db_executor(stored_file_class.load_resource, resource)
+        return cls(stored_file)
+    #
+
+    @staticmethod
+    async def run_in_db_executor(_callable, *args):
+        """
+Runs the given callable on the bounded thread pool for database work.
+
+:param _callable: Callable to be executed
+:param args: Positional arguments
+
+:return: (mixed) Callable return value
+:since:  v0.2.00
+        """
+
+        executor = AsyncStoredFile._get_executor("_db_executor", "pas_file_store_async_db_workers", 4)
+        return await asyncio.get_running_loop().run_in_executor(executor, partial(_callable, *args))
+    #
+
+    @staticmethod
+    async def run_in_io_executor(_callable, *args):
+        """
+Runs the given callable on the bounded thread pool for file I/O.
+
+:param _callable: Callable to be executed
+:param args: Positional arguments
+
+:return: (mixed) Callable return value
+:since:  v0.2.00
+        """
+
+        executor = AsyncStoredFile._get_executor("_io_executor", "pas_file_store_async_io_workers", 16)
+        return await asyncio.get_running_loop().run_in_executor(executor, partial(_callable, *args))
+    #
+#
@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+#echo(pasFileStoreVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from sqlalchemy.sql.expression import and_
+from threading import Timer
+from time import time
+
+from dNG.data.logging.log_line import LogLine
+from dNG.data.settings import Settings
+from dNG.database.connection import Connection
+from dNG.database.instances.stored_file import StoredFile as _DbStoredFile
+from dNG.database.transaction_context import TransactionContext
+from dNG.module.named_loader import NamedLoader
+from dNG.runtime.thread_lock import ThreadLock
+
+from .store_registry import StoreRegistry
+
+class AccessTracker(object):
+    """
+"AccessTracker" records StoredFile accesses in memory and writes them
+to the database in bulk. Every access is counted while the last access time
+is only updated once per granularity interval. Pending accesses are flushed
+after the interval even if no further access is recorded and on shutdown.
+Accesses not flushed yet are lost if the process ends unexpectedly. This
+only affects the eviction order of "db_cleanup()".
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: file_store
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;mpl2
+             Mozilla Public License, v. 2.0
+    """
+
+    BULK_UPDATE_SIZE = 500
+    """
+Maximum number of IDs updated with one database statement
+    """
+
+    _instance = None
+    """
+AccessTracker instance
+    """
+    _lock = ThreadLock()
+    """
+Thread safety lock
+    """
+
+    def __init__(self):
+        """
+Constructor __init__(AccessTracker)
+
+:since: v0.2.00
+        """
+
+        self.access_counts = { }
+        """
+Dictionary of StoredFile IDs and the number of accesses not flushed yet
+        """
+        self.accesses = { }
+        """
+Dictionary of StoredFile IDs and the timestamp of the last access not
+flushed yet
+        """
+        self.accesses_flushed = { }
+        """
+Dictionary of StoredFile IDs and the timestamp last flushed
+        """
+        self.granularity = int(Settings.get("pas_file_store_access_tracking_granularity", 60))
+        """
+Minimum number of seconds between two updates of the same entry
+        """
+        self.interval = int(Settings.get("pas_file_store_access_tracking_interval", 30))
+        """
+Maximum number of seconds accesses are kept in memory
+        """
+        self.threshold = int(Settings.get("pas_file_store_access_tracking_threshold", 1000))
+        """
+Number of pending accesses triggering a flush
+        """
+        self.time_flushed = time()
+        """
+UNIX timestamp of the last flush
+        """
+        self.timer = None
+        """
+Timer flushing pending accesses if no further access triggers a flush
+        """
+    #
+
+    def flush(self):
+        """
+Writes all pending accesses to the database.
+
+:since: v0.2.00
+        """
+
+        with AccessTracker._lock:
+            access_counts = self.access_counts
+            self.access_counts = { }
+
+            accesses = self.accesses
+            self.accesses = { }
+
+            timestamp = time()
+            self.time_flushed = timestamp
+
+            if (self.timer is not None):
+                self.timer.cancel()
+                self.timer = None
+            #
+
+            if (self.granularity > 0):
+                self.accesses_flushed = dict(( _id, time_flushed )
+                                             for ( _id, time_flushed ) in self.accesses_flushed.items()
+                                             if (timestamp - time_flushed < self.granularity)
+                                            )
+
+                self.accesses_flushed.update(accesses)
+            #
+        #
+
+        if (len(access_counts) > 0):
+            try: self._update_db(accesses, access_counts)
+            except Exception as handled_exception: LogLine.error(handled_exception, context = "pas_file_store")
+        #
+    #
+
+    def _get_priority_expressions(self):
+        """
+Returns the SQL expressions to recalculate the priority after accesses for
+the file stores resolved in this process with an eviction policy using it.
+
+:return: (list) List of tuples with the SQLAlchemy expression and the list
+         of file store IDs
+:since:  v0.2.00
+        """
+
+        store_ids = { }
+
+        for store_config in StoreRegistry.get_instance().get_configs():
+            if (store_config.eviction_policy not in store_ids): store_ids[store_config.eviction_policy] = set()
+            store_ids[store_config.eviction_policy].add(store_config.store_id)
+        #
+
+        _return = [ ]
+
+        for ( eviction_policy, policy_store_ids ) in store_ids.items():
+            expression = NamedLoader.get_instance("dNG.data.file_store.eviction.{0}".format(eviction_policy)).get_priority_expression()
+            if (expression is not None): _return.append(( expression, list(policy_store_ids) ))
+        #
+
+        return _return
+    #
+
+    def record(self, _id, timestamp = None):
+        """
+Records an access of the given StoredFile ID.
+
+:param _id: StoredFile ID
+:param timestamp: UNIX timestamp of the access
+
+:since: v0.2.00
+        """
+
+        if (_id is None): return
+        if (timestamp is None): timestamp = time()
+
+        with AccessTracker._lock:
+            self.access_counts[_id] = 1 + self.access_counts.get(_id, 0)
+
+            time_flushed = self.accesses_flushed.get(_id)
+            if (time_flushed is None or timestamp - time_flushed >= self.granularity): self.accesses[_id] = timestamp
+
+            is_flush_required = (len(self.access_counts) >= self.threshold
+                                 or timestamp - self.time_flushed >= self.interval
+                                )
+
+            if ((not is_flush_required) and self.timer is None):
+                self.timer = Timer(max(1, self.interval), self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+            #
+        #
+
+        if (is_flush_required): self.flush()
+    #
+
+    def _update_db(self, accesses, access_counts):
+        """
+Updates the database with the given accesses grouped by timestamp and
+number of accesses.
+
+:param accesses: Dictionary of StoredFile IDs and access timestamps
+:param access_counts: Dictionary of StoredFile IDs and number of accesses
+
+:since: v0.2.00
+        """
+
+        ids_by_count = { }
+
+        for ( _id, count ) in access_counts.items():
+            if (count not in ids_by_count): ids_by_count[count] = [ ]
+            ids_by_count[count].append(_id)
+        #
+
+        ids_by_timestamp = { }
+
+        for ( _id, timestamp ) in accesses.items():
+            timestamp = int(timestamp)
+            if (self.granularity > 1): timestamp -= (timestamp % self.granularity)
+
+            if (timestamp not in ids_by_timestamp): ids_by_timestamp[timestamp] = [ ]
+            ids_by_timestamp[timestamp].append(_id)
+        #
+
+        priority_expressions = self._get_priority_expressions()
+
+        with Connection.get_instance() as connection, TransactionContext():
+            for ( timestamp, ids ) in ids_by_timestamp.items():
+                for offset in range(0, len(ids), AccessTracker.BULK_UPDATE_SIZE):
+                    db_condition = and_(_DbStoredFile.id.in_(ids[offset:offset + AccessTracker.BULK_UPDATE_SIZE]),
+                                        _DbStoredFile.time_last_accessed < timestamp
+                                       )
+
+                    connection.query(_DbStoredFile).filter(db_condition).update({ _DbStoredFile.time_last_accessed: timestamp },
+                                                                                synchronize_session = False
+                                                                               )
+                #
+            #
+
+            for ( count, ids ) in ids_by_count.items():
+                for offset in range(0, len(ids), AccessTracker.BULK_UPDATE_SIZE):
+                    db_query = connection.query(_DbStoredFile).filter(_DbStoredFile.id.in_(ids[offset:offset + AccessTracker.BULK_UPDATE_SIZE]))
+                    db_query.update({ _DbStoredFile.access_count: _DbStoredFile.access_count + count }, synchronize_session = False)
+
+                    # The priority is calculated from the updated number of accesses
+                    for ( expression, store_ids ) in priority_expressions:
+                        db_query.filter(_DbStoredFile.store_id.in_(store_ids)).update({ _DbStoredFile.eviction_priority: expression },
+                                                                                       synchronize_session = False
+                                                                                      )
+                    #
+                #
+            #
+        #
+    #
+
+    @staticmethod
+    def get_instance():
+        """
+Get the AccessTracker singleton.
+
+:return: (object) Object on success
+:since:  v0.2.00
+        """
+
+        if (AccessTracker._instance is None):
+            with AccessTracker._lock:
+                # Thread safety
+                if (AccessTracker._instance is None): AccessTracker._instance = AccessTracker()
+            #
+        #
+
+        return AccessTracker._instance
+    #
+#
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+#echo(pasFileStoreVersion)#
+#echo(__FILEPATH__)#
+"""
+
+# pylint: disable=unused-argument
+
+from dNG.runtime.not_implemented_exception import NotImplementedException
+
+class Abstract(object):
+    """
+"Abstract" defines the interface of file store eviction policies. Entries
+with the lowest priority are evicted first.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: file_store
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;mpl2
+             Mozilla Public License, v. 2.0
+    """
+
+    def get_initial_priority(self, connection, store_id, size):
+        """
+Returns the priority of a new entry of the given size.
+
+:param connection: Database connection
+:param store_id: File store ID
+:param size: Entry size
+
+:return: (float) Priority
+:since:  v0.2.00
+        """
+
+        return 0
+    #
+
+    def get_order_by(self):
+        """
+Returns the SQLAlchemy order clauses to select eviction candidates.
+
+:return: (tuple) SQLAlchemy order clauses
+:since:  v0.2.00
+        """
+
+        raise NotImplementedException()
+    #
+
+    def get_priority(self, size, access_count, time_last_accessed, clock):
+        """
+Returns the priority of an entry after an access. It is used for trace
+driven simulations.
+
+:param size: Entry size
+:param access_count: Number of accesses including the current one
+:param time_last_accessed: Time of the current access
+:param clock: Priority of the last evicted entry
+
+:return: (mixed) Comparable priority
+:since:  v0.2.00
+        """
+
+        raise NotImplementedException()
+    #
+
+    def get_priority_expression(self):
+        """
+Returns the SQL expression to recalculate the priority of StoredFile
+entries after accesses.
+
+:return: (object) SQLAlchemy expression; None if the priority is not used
+:since:  v0.2.00
+        """
+
+        return None
+    #
+
+    def on_evicted(self, connection, store_id):
+        """
+Called after entries of the file store have been evicted because of its
+size limit.
+
+:param connection: Database connection
+:param store_id: File store ID
+
+:since: v0.2.00
+        """
+
+        pass
+    #
+#
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+#echo(pasFileStoreVersion)#
+#echo(__FILEPATH__)#
+"""
+
+# pylint: disable=unused-argument
+
+from sqlalchemy.sql.expression import and_, case, cast, select
+from sqlalchemy.sql.functions import coalesce
+from sqlalchemy.sql.functions import min as sql_min
+from sqlalchemy.types import FLOAT
+
+from dNG.database.instances.stored_file import StoredFile as _DbStoredFile
+from dNG.database.instances.stored_file_store_usage import StoredFileStoreUsage as _DbStoredFileStoreUsage
+
+from .abstract import Abstract
+
+class Gdsf(Abstract):
+    """
+"Gdsf" implements "Greedy Dual Size Frequency" eviction. The priority of an
+entry is the clock of the file store plus its number of accesses divided by
+its size. Small and frequently used entries are kept longer while the clock
+ages entries not accessed anymore.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: file_store
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;mpl2
+             Mozilla Public License, v. 2.0
+    """
+
+    def get_initial_priority(self, connection, store_id, size):
+        """
+Returns the priority of a new entry of the given size.
+
+:param connection: Database connection
+:param store_id: File store ID
+:param size: Entry size
+
+:return: (float) Priority
+:since:  v0.2.00
+        """
+
+        db_query = connection.query(_DbStoredFileStoreUsage.eviction_clock).filter(_DbStoredFileStoreUsage.store_id == store_id)
+        clock = db_query.scalar()
+
+        return (0 if (clock is None) else clock) + (1.0 / max(1, (0 if (size is None) else size)))
+    #
+
+    def get_order_by(self):
+        """
+Returns the SQLAlchemy order clauses to select eviction candidates.
+
+:return: (tuple) SQLAlchemy order clauses
+:since:  v0.2.00
+        """
+
+        return ( _DbStoredFile.eviction_priority.asc(), _DbStoredFile.time_last_accessed.asc() )
+    #
+
+    def get_priority(self, size, access_count, time_last_accessed, clock):
+        """
+Returns the priority of an entry after an access. It is used for trace
+driven simulations.
+
+:param size: Entry size
+:param access_count: Number of accesses including the current one
+:param time_last_accessed: Time of the current access
+:param clock: Priority of the last evicted entry
+
+:return: (mixed) Comparable priority
+:since:  v0.2.00
+        """
+
+        return clock + (float(access_count) / max(1, size))
+    #
+
+    def get_priority_expression(self):
+        """
+Returns the SQL expression to recalculate the priority of StoredFile
+entries from their current number of accesses.
+
+:return: (object) SQLAlchemy expression
+:since:  v0.2.00
+        """
+
+        clock_query = select(_DbStoredFileStoreUsage.eviction_clock)
+        clock_query = clock_query.where(_DbStoredFileStoreUsage.store_id == _DbStoredFile.store_id).scalar_subquery()
+
+        size = case(( _DbStoredFile.size > 0, _DbStoredFile.size ), else_ = 1)
+
+        return coalesce(clock_query, 0) + (cast(_DbStoredFile.access_count, FLOAT) / size)
+    #
+
+    def on_evicted(self, connection, store_id):
+        """
+Called after entries of the file store have been evicted because of its
+size limit. The clock is advanced to the lowest priority remaining.
+
+:param connection: Database connection
+:param store_id: File store ID
+
+:since: v0.2.00
+        """
+
+        db_query = connection.query(sql_min(_DbStoredFile.eviction_priority)).filter(_DbStoredFile.store_id == store_id)
+        clock = db_query.scalar()
+
+        if (clock is not None):
+            with connection.no_autoflush:
+                db_query = connection.query(_DbStoredFileStoreUsage)
+
+                db_query = db_query.filter(and_(_DbStoredFileStoreUsage.store_id == store_id,
+                                                _DbStoredFileStoreUsage.eviction_clock < clock
+                                               )
+                                          )
+
+                db_query.update({ _DbStoredFileStoreUsage.eviction_clock: clock }, synchronize_session = False)
+            #
+        #
+    #
+#
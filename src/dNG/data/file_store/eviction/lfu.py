@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+#echo(pasFileStoreVersion)#
+#echo(__FILEPATH__)#
+"""
+
+# pylint: disable=unused-argument
+
+from dNG.database.instances.stored_file import StoredFile as _DbStoredFile
+
+from .abstract import Abstract
+
+class Lfu(Abstract):
+    """
+"Lfu" evicts the least frequently used entries first. Entries with the
+same number of accesses are evicted least recently used first.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: file_store
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;mpl2
+             Mozilla Public License, v. 2.0
+    """
+
+    def get_order_by(self):
+        """
+Returns the SQLAlchemy order clauses to select eviction candidates.
+
+:return: (tuple) SQLAlchemy order clauses
+:since:  v0.2.00
+        """
+
+        return ( _DbStoredFile.access_count.asc(), _DbStoredFile.time_last_accessed.asc() )
+    #
+
+    def get_priority(self, size, access_count, time_last_accessed, clock):
+        """
+Returns the priority of an entry after an access. It is used for trace
+driven simulations.
+
+:param size: Entry size
+:param access_count: Number of accesses including the current one
+:param time_last_accessed: Time of the current access
+:param clock: Priority of the last evicted entry
+
+:return: (mixed) Comparable priority
+:since:  v0.2.00
+        """
+
+        return ( access_count, time_last_accessed )
+    #
+#
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+#echo(pasFileStoreVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from argparse import ArgumentParser
+from heapq import heappop, heappush
+import json
+import sys
+
+from dNG.module.named_loader import NamedLoader
+from dNG.runtime.value_exception import ValueException
+
+class Simulator(object):
+    """
+"Simulator" replays a trace of resource requests against a file store of
+the given capacity to compare the hit ratio and bytes hit ratio of eviction
+policies.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: file_store
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;mpl2
+             Mozilla Public License, v. 2.0
+    """
+
+    POLICIES = ( "Lru", "Lfu", "Gdsf" )
+    """
+Eviction policies simulated by default
+    """
+
+    def __init__(self, capacity, policy_names = None):
+        """
+Constructor __init__(Simulator)
+
+:param capacity: File store capacity in bytes
+:param policy_names: Eviction policy names
+
+:since: v0.2.00
+        """
+
+        if (capacity < 1): raise ValueException("Simulated file store capacity is invalid")
+
+        self.capacity = capacity
+        """
+File store capacity in bytes
+        """
+        self.policy_names = (Simulator.POLICIES if (policy_names is None) else policy_names)
+        """
+Eviction policy names
+        """
+    #
+
+    def run(self, trace):
+        """
+Replays the given trace for each eviction policy.
+
+:param trace: List of resource and size tuples requested
+
+:return: (dict) Dictionary of eviction policy names and their results
+:since:  v0.2.00
+        """
+
+        return dict(( policy_name, self._simulate(NamedLoader.get_instance("dNG.data.file_store.eviction.{0}".format(policy_name)), trace) )
+                    for policy_name in self.policy_names
+                   )
+    #
+
+    def _simulate(self, eviction_policy, trace):
+        """
+Replays the given trace for the eviction policy. Stale heap entries are
+skipped lazily instead of being removed on each access.
+
+:param eviction_policy: Eviction policy instance
+:param trace: List of resource and size tuples requested
+
+:return: (dict) Simulation results
+:since:  v0.2.00
+        """
+
+        bytes_hit = 0
+        bytes_requested = 0
+        clock = 0
+        entries = { }
+        evictions = 0
+        heap = [ ]
+        hits = 0
+        requests = 0
+        size_used = 0
+
+        for ( requests, ( resource, size ) ) in enumerate(trace, 1):
+            bytes_requested += size
+            entry = entries.get(resource)
+
+            if (entry is not None and entry[0] == size):
+                hits += 1
+                bytes_hit += size
+
+                access_count = entry[1] + 1
+            else:
+                if (entry is not None):
+                    size_used -= entry[0]
+                    del(entries[resource])
+                #
+
+                # Resources larger than the file store are never stored
+                if (size > self.capacity): continue
+
+                while (size_used + size > self.capacity):
+                    ( priority, _, evicted_resource ) = heappop(heap)
+                    evicted_entry = entries.get(evicted_resource)
+
+                    if (evicted_entry is not None and evicted_entry[2] == priority):
+                        del(entries[evicted_resource])
+
+                        size_used -= evicted_entry[0]
+                        evictions += 1
+
+                        # Only size-aware policies depend on the priority last evicted
+                        clock = priority
+                    #
+                #
+
+                size_used += size
+                access_count = 1
+            #
+
+            priority = eviction_policy.get_priority(size, access_count, requests, clock)
+            entries[resource] = ( size, access_count, priority )
+
+            heappush(heap, ( priority, requests, resource ))
+
+            # Compact the heap if stale entries dominate
+            if (len(heap) > 4 * len(entries) + 1024):
+                heap = [ item for item in heap if (item[2] in entries and entries[item[2]][2] == item[0]) ]
+                heap.sort()
+            #
+        #
+
+        return { "requests": requests,
+                 "hits": hits,
+                 "hit_ratio": (float(hits) / requests if (requests > 0) else 0.0),
+                 "bytes_requested": bytes_requested,
+                 "bytes_hit": bytes_hit,
+                 "bytes_hit_ratio": (float(bytes_hit) / bytes_requested if (bytes_requested > 0) else 0.0),
+                 "evictions": evictions
+               }
+    #
+
+    @staticmethod
+    def main():
+        """
+Standalone entry point to simulate eviction policies for a trace file.
+
+:since: v0.2.00
+        """
+
+        parser = ArgumentParser(description = "Simulates pas_file_store eviction policies for a trace of resource size lines")
+        parser.add_argument("--capacity", type = int, required = True, help = "File store capacity in bytes")
+        parser.add_argument("--policy", action = "append", dest = "policy_names", help = "Eviction policy to be simulated")
+        parser.add_argument("trace", nargs = "?", help = "Trace file; standard input if not given")
+        args = parser.parse_args()
+
+        trace_file = (sys.stdin if (args.trace is None) else open(args.trace, "r"))
+
+        try:
+            simulator = Simulator(args.capacity, args.policy_names)
+            results = simulator.run(Simulator.read_trace(trace_file))
+        finally:
+            if (trace_file is not sys.stdin): trace_file.close()
+        #
+
+        print(json.dumps({ "capacity": args.capacity, "results": results }, indent = 2, sort_keys = True))
+    #
+
+    @staticmethod
+    def read_trace(trace_file):
+        """
+Reads a trace of "resource size" lines. Empty lines and lines starting with
+"#" are ignored.
+
+:param trace_file: File object to read from
+
+:return: (list) List of resource and size tuples
+:since:  v0.2.00
+        """
+
+        _return = [ ]
+
+        for line in trace_file:
+            line = line.strip()
+            if (line == "" or line.startswith("#")): continue
+
+            ( resource, size ) = line.rsplit(None, 1)
+            _return.append(( resource, int(size) ))
+        #
+
+        return _return
+    #
+#
+
+if (__name__ == "__main__"): Simulator.main()
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+#echo(pasFileStoreVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from collections import OrderedDict
+from time import time
+
+from dNG.data.settings import Settings
+from dNG.runtime.thread_lock import ThreadLock
+
+class HotTier(object):
+    """
+"HotTier" is an optional in-process LRU cache holding the content and
+metadata of small StoredFile entries by ID. It is bounded by the number of
+bytes cached and disabled if "pas_file_store_hot_tier_size" is not set.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: file_store
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;mpl2
+             Mozilla Public License, v. 2.0
+    """
+
+    _instance = None
+    """
+HotTier instance
+    """
+    _lock = ThreadLock()
+    """
+Thread safety lock
+    """
+
+    def __init__(self):
+        """
+Constructor __init__(HotTier)
+
+:since: v0.2.00
+        """
+
+        self.entries = OrderedDict()
+        """
+Cached content, metadata and the time it has been cached by StoredFile ID
+        """
+        self.entry_size_max = int(Settings.get("pas_file_store_hot_tier_entry_size_max", 65536))
+        """
+Maximum size of an entry to be cached
+        """
+        self.evictions = 0
+        """
+Number of entries evicted to stay within the size limit
+        """
+        self.hits = 0
+        """
+Number of cache hits
+        """
+        self.misses = 0
+        """
+Number of cache misses
+        """
+        self.size = 0
+        """
+Number of bytes cached
+        """
+        self.size_max = int(Settings.get("pas_file_store_hot_tier_size", 0))
+        """
+Maximum number of bytes cached
+        """
+        self.ttl = int(Settings.get("pas_file_store_hot_tier_ttl", 60))
+        """
+Number of seconds cached content is used as it might be changed by other
+processes
+        """
+    #
+
+    def clear(self):
+        """
+Removes all cached entries.
+
+:since: v0.2.00
+        """
+
+        with HotTier._lock:
+            self.entries.clear()
+            self.size = 0
+        #
+    #
+
+    def get(self, _id):
+        """
+Returns the cached content and metadata for the given StoredFile ID.
+
+:param _id: StoredFile ID
+
+:return: (tuple) Content and metadata; None if not cached or expired
+:since:  v0.2.00
+        """
+
+        if (self.size_max < 1): return None
+
+        _return = None
+
+        with HotTier._lock:
+            entry = self.entries.get(_id)
+
+            if (entry is not None):
+                ( data, metadata, time_cached ) = entry
+                timestamp = time()
+
+                if (timestamp - time_cached > self.ttl
+                    or (metadata['timeout'] is not None and metadata['timeout'] < int(timestamp))
+                   ): self._remove(_id)
+                else:
+                    self.entries.move_to_end(_id)
+                    _return = ( data, metadata )
+                #
+            #
+
+            if (_return is None): self.misses += 1
+            else: self.hits += 1
+        #
+
+        return _return
+    #
+
+    def get_statistics(self):
+        """
+Returns the cache statistics.
+
+:return: (dict) Number of cached entries and bytes, the size limit, hits,
+         misses and evictions
+:since:  v0.2.00
+        """
+
+        with HotTier._lock:
+            return { "entries": len(self.entries),
+                     "size": self.size,
+                     "size_max": self.size_max,
+                     "hits": self.hits,
+                     "misses": self.misses,
+                     "evictions": self.evictions
+                   }
+        #
+    #
+
+    def invalidate(self, _id):
+        """
+Removes the cached entry for the given StoredFile ID.
+
+:param _id: StoredFile ID
+
+:since: v0.2.00
+        """
+
+        if (self.size_max > 0 and _id is not None):
+            with HotTier._lock:
+                if (_id in self.entries): self._remove(_id)
+            #
+        #
+    #
+
+    def is_cacheable(self, size):
+        """
+Checks if an entry of the given size is cached.
+
+:param size: Entry size
+
+:return: (bool) True if cacheable
+:since:  v0.2.00
+        """
+
+        return (self.size_max > 0
+                and size is not None
+                and size <= self.entry_size_max
+                and size <= self.size_max
+               )
+    #
+
+    def _remove(self, _id):
+        """
+Removes the cached entry for the given StoredFile ID. The lock must be held
+by the caller.
+
+:param _id: StoredFile ID
+
+:since: v0.2.00
+        """
+
+        ( data, _, _ ) = self.entries.pop(_id)
+        self.size -= len(data)
+    #
+
+    def set(self, _id, data, metadata):
+        """
+Caches the content and metadata for the given StoredFile ID.
+
+:param _id: StoredFile ID
+:param data: Content
+:param metadata: Dictionary with "id", "resource", "size", "timeout" and
+                 "time_stored"
+
+:since: v0.2.00
+        """
+
+        if (not self.is_cacheable(len(data))): return
+
+        with HotTier._lock:
+            if (_id in self.entries): self._remove(_id)
+
+            self.entries[_id] = ( data, metadata, time() )
+            self.size += len(data)
+
+            while (self.size > self.size_max):
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+            #
+        #
+    #
+
+    @staticmethod
+    def get_instance():
+        """
+Get the HotTier singleton.
+
+:return: (object) Object on success
+:since:  v0.2.00
+        """
+
+        if (HotTier._instance is None):
+            with HotTier._lock:
+                # Thread safety
+                if (HotTier._instance is None): HotTier._instance = HotTier()
+            #
+        #
+
+        return HotTier._instance
+    #
+#
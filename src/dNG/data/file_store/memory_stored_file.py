@@ -0,0 +1,410 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+#echo(pasFileStoreVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from time import time
+
+from dNG.data.stored_file import StoredFile
+from dNG.runtime.io_exception import IOException
+from dNG.runtime.thread_lock import ThreadLock
+
+from .access_tracker import AccessTracker
+from .hot_tier import HotTier
+from .shared_cache import SharedCache
+
+class MemoryStoredFile(object):
+    """
+"MemoryStoredFile" provides read-only access to the content of a StoredFile
+entry cached in the "HotTier" or the "SharedCache". Operations requiring the file on disk load
+the StoredFile entry on demand.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: file_store
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;mpl2
+             Mozilla Public License, v. 2.0
+    """
+
+    def __init__(self, data, metadata):
+        """
+Constructor __init__(MemoryStoredFile)
+
+:param data: Cached content
+:param metadata: Cached metadata
+
+:since: v0.2.00
+        """
+
+        self.data = data
+        """
+Cached content
+        """
+        self.metadata = metadata
+        """
+Cached metadata
+        """
+        self.position = 0
+        """
+Current stream position
+        """
+        self.stored_file = None
+        """
+StoredFile instance loaded on demand
+        """
+        self._stored_file_lock = ThreadLock()
+        """
+Thread safety lock for loading the StoredFile instance
+        """
+    #
+
+    def close(self):
+        """
+python.org: Flush and close this stream.
+
+:since: v0.2.00
+        """
+
+        if (self.stored_file is not None):
+            self.stored_file.close()
+            self.stored_file = None
+        #
+    #
+
+    def flush(self):
+        """
+python.org: Flush the write buffers of the stream if applicable.
+
+:since: v0.2.00
+        """
+
+        pass
+    #
+
+    def get_data_attributes(self, *names):
+        """
+Returns the requested attributes.
+
+:param names: Attribute names
+
+:return: (dict) Values for the requested attributes
+:since:  v0.2.00
+        """
+
+        _return = { }
+
+        for name in names:
+            _return[name] = (self.metadata[name]
+                             if (name in self.metadata) else
+                             self._get_stored_file().get_data_attributes(name)[name]
+                            )
+        #
+
+        return _return
+    #
+
+    def get_file_descriptor(self):
+        """
+Returns a new read-only file descriptor of the stored file.
+
+:return: (tuple) File descriptor, offset and length
+:since:  v0.2.00
+        """
+
+        return self._get_stored_file().get_file_descriptor()
+    #
+
+    def get_id(self):
+        """
+Returns the stored file ID.
+
+:return: (str) Stored file ID
+:since:  v0.2.00
+        """
+
+        return self.metadata['id']
+    #
+
+    def get_path_name(self):
+        """
+Returns the path and name of the stored file.
+
+:return: (str) Path and name of the stored file
+:since:  v0.2.00
+        """
+
+        return self._get_stored_file().get_path_name()
+    #
+
+    def get_resource(self):
+        """
+Returns the stored file resource.
+
+:return: (str) Stored file resource
+:since:  v0.2.00
+        """
+
+        return self.metadata['resource']
+    #
+
+    def get_size(self):
+        """
+Returns the stored file resource size.
+
+:return: (int) Stored file resource size
+:since:  v0.2.00
+        """
+
+        return len(self.data)
+    #
+
+    def _get_stored_file(self):
+        """
+Returns the StoredFile instance of the cached entry.
+
+:return: (object) StoredFile instance
+:since:  v0.2.00
+        """
+
+        if (self.stored_file is None):
+            with self._stored_file_lock:
+                # Thread safety
+                if (self.stored_file is None): self.stored_file = StoredFile.load_id(self.metadata['id'])
+            #
+        #
+
+        return self.stored_file
+    #
+
+    def get_vfs_url(self):
+        """
+Returns the VFS URL of this instance.
+
+:return: (str) Stored file VFS URL
+:since:  v0.2.00
+        """
+
+        return StoredFile.get_vfs_url_for_id(self.metadata['id'])
+    #
+
+    def is_eof(self):
+        """
+Checks if the pointer is at EOF.
+
+:return: (bool) True if EOF
+:since:  v0.2.00
+        """
+
+        return (self.position >= len(self.data))
+    #
+
+    def is_valid(self):
+        """
+Returns true if the cached entry is valid.
+
+:return: (bool) True if valid
+:since:  v0.2.00
+        """
+
+        return (self.metadata['timeout'] is None or self.metadata['timeout'] >= int(time()))
+    #
+
+    def read(self, n = 0):
+        """
+python.org: Read up to n bytes from the object and return them.
+
+:param n: How many bytes to read from the current position (0 means until
+          EOF)
+
+:return: (bytes) Data; None if EOF
+:since:  v0.2.00
+        """
+
+        if (self.position >= len(self.data)): return None
+
+        position_end = (len(self.data) if (n < 1) else self.position + n)
+
+        _return = self.data[self.position:position_end]
+        self.position += len(_return)
+
+        return _return
+    #
+
+    def read_range(self, offset, length):
+        """
+Reads up to the given number of bytes starting at the given offset. The
+stream position is not used or changed.
+
+:param offset: Offset of the first byte to be read
+:param length: Number of bytes to be read
+
+:return: (bytes) Data; empty if the offset is at or behind EOF
+:since:  v0.2.00
+        """
+
+        if (offset < 0): raise IOException("Byte offset given is invalid")
+        return self.data[offset:offset + length]
+    #
+
+    def readinto_range(self, b, offset):
+        """
+Reads bytes starting at the given offset into the pre-allocated, writable
+bytes-like object given. The stream position is not used or changed.
+
+:param b: Writable bytes-like object
+:param offset: Offset of the first byte to be read
+
+:return: (int) Number of bytes read
+:since:  v0.2.00
+        """
+
+        data = self.read_range(offset, len(b))
+
+        _return = len(data)
+        memoryview(b)[:_return] = data
+
+        return _return
+    #
+
+    def seek(self, offset):
+        """
+python.org: Change the stream position to the given byte offset.
+
+:param offset: Seek to the given offset
+
+:return: (int) Return the new absolute position.
+:since:  v0.2.00
+        """
+
+        if (offset < 0): raise IOException("Byte offset given is invalid")
+        self.position = offset
+
+        return self.position
+    #
+
+    def sendfile(self, socket, offset = 0, count = None):
+        """
+Sends the given byte range of the stored file directly to the socket.
+
+:param socket: Socket (or its file descriptor if "os.sendfile()" is
+               available)
+:param offset: Offset of the first byte to be sent
+:param count: Number of bytes to be sent (None means until EOF)
+
+:return: (int) Number of bytes sent
+:since:  v0.2.00
+        """
+
+        return self._get_stored_file().sendfile(socket, offset, count)
+    #
+
+    def tell(self):
+        """
+python.org: Return the current stream position as an opaque number.
+
+:return: (int) Stream position
+:since:  v0.2.00
+        """
+
+        return self.position
+    #
+
+    def truncate(self, new_size):
+        """
+python.org: Resize the stream to the given size in bytes.
+
+:param new_size: Cut file at the given byte position
+
+:since: v0.2.00
+        """
+
+        raise IOException("Cached stored file instances are read-only")
+    #
+
+    def write(self, b):
+        """
+python.org: Write the given bytes or bytearray object, b, to the underlying
+raw stream and return the number of bytes written.
+
+:param b: (Over)write file with the given data at the current position
+
+:since: v0.2.00
+        """
+
+        raise IOException("Cached stored file instances are read-only")
+    #
+
+    @staticmethod
+    def load_id(_id):
+        """
+Returns a MemoryStoredFile instance for the given StoredFile ID if cached.
+
+:param _id: StoredFile ID
+
+:return: (object) MemoryStoredFile instance; None if not cached
+:since:  v0.2.00
+        """
+
+        entry = HotTier.get_instance().get(_id)
+        if (entry is None): entry = SharedCache.get_instance().get(_id)
+
+        if (entry is None): return None
+
+        AccessTracker.get_instance().record(_id)
+        return MemoryStoredFile(*entry)
+    #
+
+    @staticmethod
+    def load_stored_file(stored_file):
+        """
+Caches the content of the given StoredFile instance if it is small enough
+and returns a MemoryStoredFile instance for it.
+
+:param stored_file: StoredFile instance
+
+:return: (object) MemoryStoredFile instance; None if not cacheable
+:since:  v0.2.00
+        """
+
+        hot_tier = HotTier.get_instance()
+        shared_cache = SharedCache.get_instance()
+        size = stored_file.get_size()
+
+        is_hot_tier_cacheable = hot_tier.is_cacheable(size)
+        is_shared_cacheable = shared_cache.is_cacheable(size)
+
+        if (not (is_hot_tier_cacheable or is_shared_cacheable)): return None
+
+        data = stored_file.read_range(0, size)
+        metadata = stored_file.get_data_attributes("id", "resource", "size", "timeout", "time_stored")
+
+        # The content might have been changed since its size has been read
+        if (len(data) != size): return None
+
+        if (is_hot_tier_cacheable): hot_tier.set(metadata['id'], data, metadata)
+
+        # Entries stored before the shared cache has been enabled are published on first access
+        if (is_shared_cacheable): shared_cache.set(metadata['id'], data, metadata)
+
+        _return = MemoryStoredFile(data, metadata)
+        _return.stored_file = stored_file
+
+        return _return
+    #
+#
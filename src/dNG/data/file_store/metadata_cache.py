@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+#echo(pasFileStoreVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from collections import OrderedDict
+from time import time
+
+from dNG.data.settings import Settings
+from dNG.runtime.thread_lock import ThreadLock
+
+class MetadataCache(object):
+    """
+"MetadataCache" is a bounded in-process LRU cache with a time-to-live for
+resource to StoredFile metadata lookups.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: file_store
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;mpl2
+             Mozilla Public License, v. 2.0
+    """
+
+    _instance = None
+    """
+MetadataCache instance
+    """
+    _lock = ThreadLock()
+    """
+Thread safety lock
+    """
+
+    def __init__(self):
+        """
+Constructor __init__(MetadataCache)
+
+:since: v0.2.00
+        """
+
+        self.entries = OrderedDict()
+        """
+Cached metadata and the time it has been cached by resource
+        """
+        self.hits = 0
+        """
+Number of cache hits
+        """
+        self.ids = { }
+        """
+Cached resources by StoredFile ID
+        """
+        self.misses = 0
+        """
+Number of cache misses
+        """
+        self.size_max = int(Settings.get("pas_file_store_metadata_cache_size", 10000))
+        """
+Maximum number of cached entries
+        """
+        self.ttl = int(Settings.get("pas_file_store_metadata_cache_ttl", 60))
+        """
+Number of seconds cached metadata is used
+        """
+    #
+
+    def clear(self):
+        """
+Removes all cached metadata.
+
+:since: v0.2.00
+        """
+
+        with MetadataCache._lock:
+            self.entries.clear()
+            self.ids.clear()
+        #
+    #
+
+    def get(self, resource):
+        """
+Returns the cached metadata for the given resource.
+
+:param resource: StoredFile resource
+
+:return: (dict) Metadata; None if not cached or expired
+:since:  v0.2.00
+        """
+
+        _return = None
+
+        with MetadataCache._lock:
+            entry = self.entries.get(resource)
+
+            if (entry is not None):
+                ( metadata, time_cached ) = entry
+                timestamp = time()
+
+                if (timestamp - time_cached > self.ttl
+                    or (metadata['timeout'] is not None and metadata['timeout'] < int(timestamp))
+                   ): self._remove(resource)
+                else:
+                    self.entries.move_to_end(resource)
+                    _return = metadata
+                #
+            #
+
+            if (_return is None): self.misses += 1
+            else: self.hits += 1
+        #
+
+        return _return
+    #
+
+    def get_statistics(self):
+        """
+Returns the cache statistics.
+
+:return: (dict) Number of cached entries, hits and misses
+:since:  v0.2.00
+        """
+
+        with MetadataCache._lock:
+            return { "entries": len(self.entries),
+                     "hits": self.hits,
+                     "misses": self.misses
+                   }
+        #
+    #
+
+    def invalidate(self, resource):
+        """
+Removes cached metadata for the given resource.
+
+:param resource: StoredFile resource
+
+:since: v0.2.00
+        """
+
+        with MetadataCache._lock:
+            if (resource in self.entries): self._remove(resource)
+        #
+    #
+
+    def invalidate_id(self, _id):
+        """
+Removes cached metadata for the given StoredFile ID.
+
+:param _id: StoredFile ID
+
+:since: v0.2.00
+        """
+
+        with MetadataCache._lock:
+            resource = self.ids.get(_id)
+            if (resource is not None): self._remove(resource)
+        #
+    #
+
+    def _remove(self, resource):
+        """
+Removes cached metadata for the given resource. The lock must be held by the
+caller.
+
+:param resource: StoredFile resource
+
+:since: v0.2.00
+        """
+
+        ( metadata, _ ) = self.entries.pop(resource)
+        if (self.ids.get(metadata['id']) == resource): del(self.ids[metadata['id']])
+    #
+
+    def set(self, resource, metadata):
+        """
+Caches the metadata for the given resource.
+
+:param resource: StoredFile resource
+:param metadata: Dictionary with "id", "file_location", "size", "timeout" and
+                 "time_stored"
+
+:since: v0.2.00
+        """
+
+        if (self.size_max < 1): return
+
+        with MetadataCache._lock:
+            if (resource in self.entries): self._remove(resource)
+
+            self.entries[resource] = ( metadata, time() )
+            self.ids[metadata['id']] = resource
+
+            while (len(self.entries) > self.size_max): self._remove(next(iter(self.entries)))
+        #
+    #
+
+    @staticmethod
+    def get_instance():
+        """
+Get the MetadataCache singleton.
+
+:return: (object) Object on success
+:since:  v0.2.00
+        """
+
+        if (MetadataCache._instance is None):
+            with MetadataCache._lock:
+                # Thread safety
+                if (MetadataCache._instance is None): MetadataCache._instance = MetadataCache()
+            #
+        #
+
+        return MetadataCache._instance
+    #
+#
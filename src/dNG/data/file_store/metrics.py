@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+#echo(pasFileStoreVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from bisect import bisect_left
+
+from dNG.data.settings import Settings
+from dNG.runtime.thread_lock import ThreadLock
+from dNG.runtime.value_exception import ValueException
+
+class Metrics(object):
+    """
+"Metrics" is the registry of counters, gauges and latency histograms of the
+file store. Values are kept in-process and exposed in the Prometheus text
+format. Recording is a no-op if "pas_file_store_metrics_enabled" is not set.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: file_store
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;mpl2
+             Mozilla Public License, v. 2.0
+    """
+
+    COUNTER = "counter"
+    """
+Monotonically increasing value
+    """
+    GAUGE = "gauge"
+    """
+Value increased and decreased
+    """
+    HISTOGRAM = "histogram"
+    """
+Distribution of observed values
+    """
+    HISTOGRAM_BUCKETS = ( 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60 )
+    """
+Upper bounds of the histogram buckets in seconds
+    """
+    METRICS = { "pas_file_store_bytes_read_total": ( COUNTER, "Bytes read from stored files" ),
+                "pas_file_store_bytes_written_total": ( COUNTER, "Bytes written to stored files" ),
+                "pas_file_store_call_cpu_seconds": ( HISTOGRAM, "CPU time of profiled StoredFile calls" ),
+                "pas_file_store_call_db_queries_total": ( COUNTER, "Database queries of profiled StoredFile calls" ),
+                "pas_file_store_call_seconds": ( HISTOGRAM, "Wall time of profiled StoredFile calls" ),
+                "pas_file_store_cache_fill_backlog": ( GAUGE, "VFS URLs scheduled to be cached by this process and not cached by it yet" ),
+                "pas_file_store_cache_fills_scheduled_total": ( COUNTER, "Cache fill tasks scheduled" ),
+                "pas_file_store_cache_fills_total": ( COUNTER, "Cache fill tasks completed by result" ),
+                "pas_file_store_cleanup_seconds": ( HISTOGRAM, "Duration of file store cleanups" ),
+                "pas_file_store_entries_evicted_total": ( COUNTER, "Entries evicted to stay within the size limit" ),
+                "pas_file_store_entries_expired_total": ( COUNTER, "Expired entries removed" ),
+                "pas_file_store_load_resource_seconds": ( HISTOGRAM, "Latency of loading stored files by resource" ),
+                "pas_file_store_vfs_lookups_total": ( COUNTER, "Cached VFS URL lookups by result" )
+              }
+    """
+Metrics known with their type and help text
+    """
+
+    _instance = None
+    """
+Metrics instance
+    """
+    _lock = ThreadLock()
+    """
+Thread safety lock
+    """
+
+    def __init__(self):
+        """
+Constructor __init__(Metrics)
+
+:since: v0.2.00
+        """
+
+        self.enabled = bool(Settings.get("pas_file_store_metrics_enabled", False))
+        """
+True if values are recorded
+        """
+        self.values = { }
+        """
+Recorded values by metric name and label tuple
+        """
+    #
+
+    def add(self, name, value, **labels):
+        """
+Adds the given value to a gauge. Negative values decrease it.
+
+:param name: Metric name
+:param value: Value to be added
+
+:since: v0.2.00
+        """
+
+        if (self.enabled): self._add(name, Metrics.GAUGE, value, labels)
+    #
+
+    def _add(self, name, _type, value, labels):
+        """
+Adds the given value to a counter or gauge.
+
+:param name: Metric name
+:param _type: Expected metric type
+:param value: Value to be added
+:param labels: Dictionary of labels
+
+:since: v0.2.00
+        """
+
+        key = Metrics._get_key(labels)
+        values = self._get_values(name, _type)
+
+        with Metrics._lock: values[key] = value + values.get(key, 0)
+    #
+
+    def clear(self):
+        """
+Removes all recorded values.
+
+:since: v0.2.00
+        """
+
+        with Metrics._lock: self.values = { }
+    #
+
+    def get_prometheus_text(self):
+        """
+Returns all recorded values in the Prometheus text exposition format.
+
+:return: (str) Prometheus text
+:since:  v0.2.00
+        """
+
+        lines = [ ]
+
+        with Metrics._lock:
+            for name in sorted(self.values):
+                ( _type, _help ) = Metrics.METRICS[name]
+
+                lines.append("# HELP {0} {1}".format(name, _help))
+                lines.append("# TYPE {0} {1}".format(name, _type))
+
+                for ( key, value ) in sorted(self.values[name].items()):
+                    if (_type == Metrics.HISTOGRAM):
+                        ( bucket_counts, value_sum, value_count ) = value
+                        bucket_count = 0
+
+                        for ( upper_bound, count ) in zip(Metrics.HISTOGRAM_BUCKETS, bucket_counts):
+                            bucket_count += count
+                            lines.append("{0}_bucket{1} {2:d}".format(name, Metrics._get_labels_text(key + (( "le", repr(float(upper_bound)) ), )), bucket_count))
+                        #
+
+                        lines.append("{0}_bucket{1} {2:d}".format(name, Metrics._get_labels_text(key + (( "le", "+Inf" ), )), value_count))
+                        lines.append("{0}_sum{1} {2!r}".format(name, Metrics._get_labels_text(key), float(value_sum)))
+                        lines.append("{0}_count{1} {2:d}".format(name, Metrics._get_labels_text(key), value_count))
+                    else: lines.append("{0}{1} {2!r}".format(name, Metrics._get_labels_text(key), float(value)))
+                #
+            #
+        #
+
+        return ("\n".join(lines) + "\n" if (len(lines) > 0) else "")
+    #
+
+    def _get_values(self, name, _type):
+        """
+Returns the dictionary of recorded values for the given metric.
+
+:param name: Metric name
+:param _type: Expected metric type
+
+:return: (dict) Recorded values by label tuple
+:since:  v0.2.00
+        """
+
+        if (name not in Metrics.METRICS or Metrics.METRICS[name][0] != _type): raise ValueException("Metric '{0}' is not a known {1}".format(name, _type))
+
+        _return = self.values.get(name)
+
+        if (_return is None):
+            with Metrics._lock:
+                # Thread safety
+                _return = self.values.setdefault(name, { })
+            #
+        #
+
+        return _return
+    #
+
+    def increment(self, name, value = 1, **labels):
+        """
+Increments a counter by the given value.
+
+:param name: Metric name
+:param value: Value to be added
+
+:since: v0.2.00
+        """
+
+        if (self.enabled): self._add(name, Metrics.COUNTER, value, labels)
+    #
+
+    def observe(self, name, value, **labels):
+        """
+Records the given value in a histogram.
+
+:param name: Metric name
+:param value: Observed value in seconds
+
+:since: v0.2.00
+        """
+
+        if (self.enabled):
+            key = Metrics._get_key(labels)
+            values = self._get_values(name, Metrics.HISTOGRAM)
+            bucket = bisect_left(Metrics.HISTOGRAM_BUCKETS, value)
+
+            with Metrics._lock:
+                histogram = values.get(key)
+
+                if (histogram is None):
+                    histogram = [ [ 0 ] * len(Metrics.HISTOGRAM_BUCKETS), 0, 0 ]
+                    values[key] = histogram
+                #
+
+                # Values above the largest upper bound are only counted for "+Inf"
+                if (bucket < len(Metrics.HISTOGRAM_BUCKETS)): histogram[0][bucket] += 1
+
+                histogram[1] += value
+                histogram[2] += 1
+            #
+        #
+    #
+
+    def set(self, name, value, **labels):
+        """
+Sets a gauge to the given value.
+
+:param name: Metric name
+:param value: Value
+
+:since: v0.2.00
+        """
+
+        if (self.enabled):
+            key = Metrics._get_key(labels)
+            values = self._get_values(name, Metrics.GAUGE)
+
+            with Metrics._lock: values[key] = value
+        #
+    #
+
+    @staticmethod
+    def get_instance():
+        """
+Get the Metrics singleton.
+
+:return: (object) Object on success
+:since:  v0.2.00
+        """
+
+        if (Metrics._instance is None):
+            with Metrics._lock:
+                # Thread safety
+                if (Metrics._instance is None): Metrics._instance = Metrics()
+            #
+        #
+
+        return Metrics._instance
+    #
+
+    @staticmethod
+    def _get_key(labels):
+        """
+Returns the sorted label tuple used as key for recorded values.
+
+:param labels: Dictionary of labels
+
+:return: (tuple) Label name and value tuples
+:since:  v0.2.00
+        """
+
+        return (tuple(sorted(( name, str(value) ) for ( name, value ) in labels.items())) if (len(labels) > 0) else ( ))
+    #
+
+    @staticmethod
+    def _get_labels_text(key):
+        """
+Returns the Prometheus text of the given label tuple.
+
+:param key: Label name and value tuples
+
+:return: (str) Labels text; empty if no labels are given
+:since:  v0.2.00
+        """
+
+        _return = ""
+
+        if (len(key) > 0):
+            _return = "{{{0}}}".format(",".join("{0}=\"{1}\"".format(name,
+                                                                     value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+                                                                    )
+                                                for ( name, value ) in key
+                                               ))
+        #
+
+        return _return
+    #
+#
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+#echo(pasFileStoreVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from collections import OrderedDict
+from time import time
+
+from dNG.data.settings import Settings
+from dNG.runtime.thread_lock import ThreadLock
+
+class MissCache(object):
+    """
+"MissCache" remembers resources not found in a file store for a short
+time. Entries filled by other processes are detected after the time-to-live
+at the latest. A stale miss only bypasses the file store and is therefore
+safe for concurrent fills.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: file_store
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;mpl2
+             Mozilla Public License, v. 2.0
+    """
+
+    _instance = None
+    """
+MissCache instance
+    """
+    _lock = ThreadLock()
+    """
+Thread safety lock
+    """
+
+    def __init__(self):
+        """
+Constructor __init__(MissCache)
+
+:since: v0.2.00
+        """
+
+        self.hits = 0
+        """
+Number of lookups answered as known misses
+        """
+        self.size_max = int(Settings.get("pas_file_store_miss_cache_size", 10000))
+        """
+Maximum number of cached misses for each file store
+        """
+        self.stores = { }
+        """
+Dictionary of file store IDs and their cached misses
+        """
+        self.ttls = { }
+        """
+Dictionary of file store IDs and the number of seconds a miss is cached
+        """
+    #
+
+    def add(self, store_id, resource):
+        """
+Records a miss for the given resource.
+
+:param store_id: File store ID
+:param resource: StoredFile resource
+
+:since: v0.2.00
+        """
+
+        if (self.size_max < 1 or self._get_ttl(store_id) < 1): return
+
+        with MissCache._lock:
+            if (store_id not in self.stores): self.stores[store_id] = OrderedDict()
+            misses = self.stores[store_id]
+
+            if (resource in misses): del(misses[resource])
+            misses[resource] = time()
+
+            while (len(misses) > self.size_max): misses.popitem(False)
+        #
+    #
+
+    def clear(self):
+        """
+Removes all cached misses.
+
+:since: v0.2.00
+        """
+
+        with MissCache._lock: self.stores.clear()
+    #
+
+    def _get_ttl(self, store_id):
+        """
+Returns the number of seconds a miss is cached for the given file store.
+
+:param store_id: File store ID
+
+:return: (int) Time-to-live in seconds
+:since:  v0.2.00
+        """
+
+        _return = self.ttls.get(store_id)
+
+        if (_return is None):
+            _return = int(Settings.get("pas_file_store_{0}_miss_cache_ttl".format(store_id), 10))
+            self.ttls[store_id] = _return
+        #
+
+        return _return
+    #
+
+    def invalidate(self, resource):
+        """
+Removes cached misses for the given resource in all file stores.
+
+:param resource: StoredFile resource
+
+:since: v0.2.00
+        """
+
+        with MissCache._lock:
+            for misses in self.stores.values():
+                if (resource in misses): del(misses[resource])
+            #
+        #
+    #
+
+    def is_miss(self, store_id, resource):
+        """
+Returns true if the given resource is a known miss.
+
+:param store_id: File store ID
+:param resource: StoredFile resource
+
+:return: (bool) True if known to be missing
+:since:  v0.2.00
+        """
+
+        _return = False
+
+        with MissCache._lock:
+            misses = self.stores.get(store_id)
+            time_cached = (None if (misses is None) else misses.get(resource))
+
+            if (time_cached is not None):
+                if (time() - time_cached > self._get_ttl(store_id)): del(misses[resource])
+                else:
+                    _return = True
+                    self.hits += 1
+                #
+            #
+        #
+
+        return _return
+    #
+
+    @staticmethod
+    def get_instance():
+        """
+Get the MissCache singleton.
+
+:return: (object) Object on success
+:since:  v0.2.00
+        """
+
+        if (MissCache._instance is None):
+            with MissCache._lock:
+                # Thread safety
+                if (MissCache._instance is None): MissCache._instance = MissCache()
+            #
+        #
+
+        return MissCache._instance
+    #
+#
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+#echo(pasFileStoreVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from functools import wraps
+from random import random
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from threading import local
+import time
+
+from dNG.data.logging.log_line import LogLine
+from dNG.data.settings import Settings
+from dNG.data.stored_file import StoredFile
+from dNG.plugins.hook import Hook
+from dNG.runtime.thread_lock import ThreadLock
+
+from .metrics import Metrics
+
+class Profiler(object):
+    """
+"Profiler" wraps the hot paths of "StoredFile" to record the wall time, CPU
+time and number of database queries of sampled calls. Each sample is passed
+to the "dNG.pas.file_store.StoredFile.onProfiledCall" hook and recorded in
+the metrics registry.
+
+Methods are only wrapped while the profiler is installed. Nothing is
+changed if "pas_file_store_profiling_sample_rate" is not set.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: file_store
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;mpl2
+             Mozilla Public License, v. 2.0
+    """
+
+    METHODS = ( "read",
+                "write",
+                "save",
+                "_ensure_stored_file_instance",
+                "db_cleanup",
+                "load_id",
+                "load_ids",
+                "load_resource",
+                "load_resource_metadata",
+                "load_resources"
+              )
+    """
+StoredFile methods profiled
+    """
+
+    _instance = None
+    """
+Profiler instance
+    """
+    _lock = ThreadLock()
+    """
+Thread safety lock
+    """
+
+    def __init__(self):
+        """
+Constructor __init__(Profiler)
+
+:since: v0.2.00
+        """
+
+        self.local = local()
+        """
+Thread-local number of database queries executed while profiling
+        """
+        self.methods = { }
+        """
+Original StoredFile class attributes by method name while installed
+        """
+        self.sample_rate = min(1.0, float(Settings.get("pas_file_store_profiling_sample_rate", 0)))
+        """
+Share of calls profiled between 0 (disabled) and 1 (all calls)
+        """
+    #
+
+    def _get_wrapper(self, name, method):
+        """
+Returns the profiling wrapper for the given method.
+
+:param name: Method name
+:param method: Function to be wrapped
+
+:return: (object) Wrapper function
+:since:  v0.2.00
+        """
+
+        sample_rate = self.sample_rate
+
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            if (random() >= sample_rate): return method(*args, **kwargs)
+
+            is_failed = True
+
+            db_queries = getattr(self.local, "db_queries", 0)
+            self.local.db_queries = db_queries
+            self.local.depth = 1 + getattr(self.local, "depth", 0)
+
+            cpu_time_started = Profiler._get_cpu_time()
+            wall_time_started = time.time()
+
+            try:
+                _return = method(*args, **kwargs)
+                is_failed = False
+            finally:
+                wall_time = time.time() - wall_time_started
+                cpu_time = Profiler._get_cpu_time() - cpu_time_started
+
+                self.local.depth -= 1
+                self._record(name, wall_time, cpu_time, self.local.db_queries - db_queries, is_failed)
+            #
+
+            return _return
+        #
+
+        return wrapper
+    #
+
+    def install(self):
+        """
+Wraps the profiled StoredFile methods if profiling is enabled.
+
+:since: v0.2.00
+        """
+
+        if (self.sample_rate > 0):
+            with Profiler._lock:
+                if (len(self.methods) < 1):
+                    event.listen(Engine, "before_cursor_execute", self._on_before_cursor_execute)
+
+                    for name in Profiler.METHODS:
+                        method = StoredFile.__dict__[name]
+                        self.methods[name] = method
+
+                        setattr(StoredFile,
+                                name,
+                                (classmethod(self._get_wrapper(name, method.__func__))
+                                 if (isinstance(method, classmethod)) else
+                                 self._get_wrapper(name, method)
+                                )
+                               )
+                    #
+
+                    LogLine.info("pas.file_store.Profiler profiles {0:.1%} of StoredFile calls", self.sample_rate, context = "pas_file_store")
+                #
+            #
+        #
+    #
+
+    def _on_before_cursor_execute(self, *args):
+        """
+Called for the SQLAlchemy "before_cursor_execute" event.
+
+:since: v0.2.00
+        """
+
+        # Queries are only counted in threads executing a profiled call
+        if (getattr(self.local, "depth", 0) > 0): self.local.db_queries += 1
+    #
+
+    def _record(self, name, wall_time, cpu_time, db_queries, is_failed):
+        """
+Records a profiled call.
+
+:param name: Method name
+:param wall_time: Wall time in seconds
+:param cpu_time: CPU time of the calling thread in seconds
+:param db_queries: Number of database queries executed
+:param is_failed: True if an exception has been raised
+
+:since: v0.2.00
+        """
+
+        metrics = Metrics.get_instance()
+
+        if (metrics.enabled):
+            metrics.observe("pas_file_store_call_seconds", wall_time, method = name)
+            metrics.observe("pas_file_store_call_cpu_seconds", cpu_time, method = name)
+            metrics.increment("pas_file_store_call_db_queries_total", db_queries, method = name)
+        #
+
+        Hook.call("dNG.pas.file_store.StoredFile.onProfiledCall",
+                  method = name,
+                  wall_time = wall_time,
+                  cpu_time = cpu_time,
+                  db_queries = db_queries,
+                  failed = is_failed
+                 )
+    #
+
+    def uninstall(self):
+        """
+Restores the original StoredFile methods.
+
+:since: v0.2.00
+        """
+
+        with Profiler._lock:
+            if (len(self.methods) > 0):
+                for ( name, method ) in self.methods.items(): setattr(StoredFile, name, method)
+                self.methods = { }
+
+                event.remove(Engine, "before_cursor_execute", self._on_before_cursor_execute)
+            #
+        #
+    #
+
+    @staticmethod
+    def _get_cpu_time():
+        """
+Returns the CPU time of the calling thread if supported or of the process
+otherwise.
+
+:return: (float) CPU time in seconds
+:since:  v0.2.00
+        """
+
+        return (time.thread_time() if (hasattr(time, "thread_time")) else time.process_time())
+    #
+
+    @staticmethod
+    def get_instance():
+        """
+Get the Profiler singleton.
+
+:return: (object) Object on success
+:since:  v0.2.00
+        """
+
+        if (Profiler._instance is None):
+            with Profiler._lock:
+                # Thread safety
+                if (Profiler._instance is None): Profiler._instance = Profiler()
+            #
+        #
+
+        return Profiler._instance
+    #
+#
@@ -0,0 +1,571 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+#echo(pasFileStoreVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from argparse import ArgumentParser
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from os import path
+from sqlalchemy.sql.expression import and_, distinct
+from sqlalchemy.sql.functions import count as sql_count
+from time import time
+import json
+import os
+
+from dNG.data.logging.log_line import LogLine
+from dNG.data.settings import Settings
+from dNG.database.connection import Connection
+from dNG.database.instances.stored_file import StoredFile as _DbStoredFile
+from dNG.database.instances.stored_file_blob import StoredFileBlob as _DbStoredFileBlob
+from dNG.database.transaction_context import TransactionContext
+from dNG.module.named_loader import NamedLoader
+from dNG.runtime.io_exception import IOException
+from dNG.runtime.thread_lock import ThreadLock
+
+class Reconciler(object):
+    """
+"Reconciler" compares the files of a file store directory with its
+database entries. Files without an entry and entries without a file are
+reported and removed if requested.
+
+Directories of all roots are scanned in parallel. The sorted listing of each
+directory is merged with the entries located in it, which are read in pages
+ordered by their location. Memory is bounded by the largest directory of the
+subdirectory fan-out instead of the size of the file store.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: file_store
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;mpl2
+             Mozilla Public License, v. 2.0
+    """
+
+    BULK_SIZE = 500
+    """
+Maximum number of file locations handled with one database statement
+    """
+
+    _lock = ThreadLock()
+    """
+Thread safety lock
+    """
+
+    def __init__(self, stored_file_class_name, repair = False):
+        """
+Constructor __init__(Reconciler)
+
+:param stored_file_class_name: StoredFile class name of the file store
+:param repair: True to remove orphaned files and dangling entries
+
+:since: v0.2.00
+        """
+
+        self.grace_period = int(Settings.get("pas_file_store_reconcile_grace_period", 3600))
+        """
+Number of seconds files are ignored after their last modification as they
+might be written without a committed entry yet
+        """
+        self.repair = repair
+        """
+True to remove orphaned files and dangling entries
+        """
+        self.stored_file = NamedLoader.get_instance(stored_file_class_name)
+        """
+StoredFile instance of the file store
+        """
+        self.workers = max(1, int(Settings.get("pas_file_store_reconcile_workers", 8)))
+        """
+Maximum number of directories scanned in parallel
+        """
+
+        self.store_id = self.stored_file.get_store_id()
+        """
+File store ID
+        """
+        self.time_started = None
+        """
+UNIX timestamp of the start of the reconciliation
+        """
+    #
+
+    def _get_db_file_names(self, connection, directory_location):
+        """
+Returns a generator of the names of all files referenced by entries in the
+given directory in ascending order. Entries are read in pages continued after
+the last location read.
+
+:param connection: Database connection
+:param directory_location: Directory location relative to the file store
+
+:return: (object) Generator of file names
+:since:  v0.2.00
+        """
+
+        db_query = connection.query(distinct(_DbStoredFile.file_location))
+        db_query = db_query.filter(self._get_db_location_condition(directory_location))
+        db_query = db_query.order_by(_DbStoredFile.file_location)
+
+        prefix_length = len(self._get_location_prefix(directory_location))
+        last_file_location = None
+
+        while (True):
+            with TransactionContext():
+                file_locations = (db_query
+                                  if (last_file_location is None) else
+                                  db_query.filter(_DbStoredFile.file_location > last_file_location)
+                                 ).limit(Reconciler.BULK_SIZE).all()
+            #
+
+            for ( file_location, ) in file_locations: yield file_location[prefix_length:]
+
+            if (len(file_locations) < Reconciler.BULK_SIZE): break
+            last_file_location = file_locations[-1][0]
+        #
+    #
+
+    def _get_db_location_condition(self, directory_location):
+        """
+Returns the SQLAlchemy condition for entries stored before the
+reconciliation started in the given directory. Locations in nested
+directories are excluded.
+
+:param directory_location: Directory location relative to the file store
+
+:return: (object) SQLAlchemy condition
+:since:  v0.2.00
+        """
+
+        if (directory_location == ""):
+            location_condition = and_(~_DbStoredFile.file_location.like("%/%"),
+                                      ~_DbStoredFile.file_location.like("%{0}%".format(self.stored_file.ROOT_SEPARATOR))
+                                     )
+        else:
+            prefix = self._get_location_prefix(directory_location)
+
+            # The character following the last one of the prefix limits the range to all locations starting with it
+            location_condition = and_(_DbStoredFile.file_location >= prefix,
+                                      _DbStoredFile.file_location < "{0}{1}".format(prefix[:-1], chr(1 + ord(prefix[-1]))),
+                                      ~_DbStoredFile.file_location.like("{0}%/%".format(Reconciler._escape_like(prefix)), escape = "\\")
+                                     )
+        #
+
+        return and_(_DbStoredFile.store_id == self.store_id,
+                    _DbStoredFile.time_stored < self.time_started,
+                    location_condition
+                   )
+    #
+
+    def _get_directory_location(self, file_location):
+        """
+Returns the location of the directory containing the given file location.
+
+:param file_location: File location relative to the file store
+
+:return: (str) Directory location
+:since:  v0.2.00
+        """
+
+        ( _return, separator, _ ) = file_location.rpartition("/")
+
+        if (separator == ""):
+            ( root_name, separator, _ ) = file_location.partition(self.stored_file.ROOT_SEPARATOR)
+            _return = ("{0}{1}".format(root_name, separator) if (separator != "") else "")
+        #
+
+        return _return
+    #
+
+    def _get_location_prefix(self, directory_location):
+        """
+Returns the prefix of all locations in the given directory. The directory
+location of a root is its name followed by the root separator.
+
+:param directory_location: Directory location relative to the file store
+
+:return: (str) Location prefix
+:since:  v0.2.00
+        """
+
+        return (directory_location
+                if (directory_location == "" or directory_location.endswith(self.stored_file.ROOT_SEPARATOR)) else
+                "{0}/".format(directory_location)
+               )
+    #
+
+    def _handle_dangling_locations(self, connection, file_locations, report):
+        """
+Reports and removes entries referencing the given missing files.
+
+:param connection: Database connection
+:param file_locations: List of file locations missing
+:param report: Report dictionary to be updated
+
+:since: v0.2.00
+        """
+
+        for offset in range(0, len(file_locations), Reconciler.BULK_SIZE):
+            db_query = connection.query(_DbStoredFile.id, _DbStoredFile.file_location, _DbStoredFile.size)
+
+            db_query = db_query.filter(and_(_DbStoredFile.store_id == self.store_id,
+                                            _DbStoredFile.time_stored < self.time_started,
+                                            _DbStoredFile.file_location.in_(file_locations[offset:offset + Reconciler.BULK_SIZE])
+                                           )
+                                      )
+
+            with TransactionContext(): entries = db_query.all()
+
+            for ( _id, file_location, _ ) in entries:
+                LogLine.warning("pas.file_store.Reconciler found entry '{0}' of file store '{1}' without file '{2}'",
+                                _id,
+                                self.store_id,
+                                file_location,
+                                context = "pas_file_store"
+                               )
+            #
+
+            report['entries_dangling'] += len(entries)
+
+            if (self.repair and len(entries) > 0):
+                ( entries_deleted, _ ) = self.stored_file._delete_entries(connection, self.store_id, entries)
+                report['entries_removed'] += entries_deleted
+            #
+        #
+    #
+
+    def _handle_orphaned_files(self, connection, file_locations, report):
+        """
+Reports and removes the given files without an entry.
+
+:param connection: Database connection
+:param file_locations: List of file locations without an entry
+:param report: Report dictionary to be updated
+
+:since: v0.2.00
+        """
+
+        time_modified_max = self.time_started - self.grace_period
+        file_locations_removed = [ ]
+
+        for file_location in file_locations:
+            file_path_name = self.stored_file._get_file_path_name(file_location)
+
+            try: file_stat = os.stat(file_path_name)
+            except OSError: continue
+
+            if (file_stat.st_mtime > time_modified_max): continue
+
+            LogLine.warning("pas.file_store.Reconciler found file '{0}' of file store '{1}' without entry",
+                            file_location,
+                            self.store_id,
+                            context = "pas_file_store"
+                           )
+
+            report['files_orphaned'] += 1
+            report['bytes_orphaned'] += file_stat.st_size
+
+            if (self.repair):
+                try:
+                    os.unlink(file_path_name)
+                    file_locations_removed.append(file_location)
+                except OSError as handled_exception: LogLine.error(handled_exception, context = "pas_file_store")
+            #
+        #
+
+        if (len(file_locations_removed) > 0):
+            report['files_removed'] += len(file_locations_removed)
+
+            if (self.stored_file.deduplication):
+                with TransactionContext():
+                    db_query = connection.query(_DbStoredFileBlob)
+
+                    db_query = db_query.filter(and_(_DbStoredFileBlob.store_id == self.store_id,
+                                                    _DbStoredFileBlob.file_location.in_(file_locations_removed)
+                                                   )
+                                              )
+
+                    db_query.delete(synchronize_session = False)
+                #
+            #
+        #
+    #
+
+    def _handle_unscanned_locations(self, directory_locations_compared, report):
+        """
+Checks the entries located in directories not compared, e.g. because the
+directory is missing or contains no files.
+
+:param directory_locations_compared: Set of directory locations compared
+:param report: Report dictionary to be updated
+
+:since: v0.2.00
+        """
+
+        with Connection.get_instance() as connection:
+            db_query = connection.query(distinct(_DbStoredFile.file_location))
+
+            db_query = db_query.filter(and_(_DbStoredFile.store_id == self.store_id,
+                                            _DbStoredFile.time_stored < self.time_started
+                                           )
+                                      )
+
+            file_locations_missing = [ ]
+
+            for ( file_location, ) in db_query.yield_per(Reconciler.BULK_SIZE):
+                if (self._get_directory_location(file_location) not in directory_locations_compared
+                    and (not self._is_file_location_existing(file_location))
+                   ): file_locations_missing.append(file_location)
+            #
+
+            # Dangling entries are expected to be rare compared to all entries
+            self._handle_dangling_locations(connection, file_locations_missing, report)
+        #
+    #
+
+    def _is_file_location_existing(self, file_location):
+        """
+Checks if the file of the given location exists. Locations of roots not
+configured anymore are treated as missing.
+
+:param file_location: File location relative to the file store
+
+:return: (bool) True if the file exists
+:since:  v0.2.00
+        """
+
+        try: return path.exists(self.stored_file._get_file_path_name(file_location))
+        except IOException: return False
+    #
+
+    def reconcile(self):
+        """
+Reconciles the file store.
+
+:return: (dict) Reconciliation report
+:since:  v0.2.00
+        """
+
+        self.stored_file._ensure_store_exists()
+        self.time_started = int(time())
+
+        report = { "directories_scanned": 0,
+                   "files_scanned": 0,
+                   "files_orphaned": 0,
+                   "files_removed": 0,
+                   "bytes_orphaned": 0,
+                   "entries_dangling": 0,
+                   "entries_removed": 0
+                 }
+
+        directory_locations_compared = set()
+        entries_compared = 0
+
+        with ThreadPoolExecutor(max_workers = self.workers) as executor:
+            futures = set(executor.submit(self._reconcile_directory,
+                                          ("{0}{1}".format(root_name, self.stored_file.ROOT_SEPARATOR) if (root_name != "") else ""),
+                                          report
+                                         )
+                          for ( root_name, _, _ ) in self.stored_file.store_config.roots
+                         )
+
+            while (len(futures) > 0):
+                ( futures_done, futures ) = wait(futures, return_when = FIRST_COMPLETED)
+
+                for future in futures_done:
+                    ( directory_location, subdirectory_locations, directory_entries_compared ) = future.result()
+
+                    if (directory_entries_compared is not None):
+                        directory_locations_compared.add(directory_location)
+                        entries_compared += directory_entries_compared
+                    #
+
+                    for subdirectory_location in subdirectory_locations:
+                        futures.add(executor.submit(self._reconcile_directory, subdirectory_location, report))
+                    #
+                #
+            #
+        #
+
+        with Connection.get_instance() as connection:
+            db_query = connection.query(sql_count(distinct(_DbStoredFile.file_location)))
+
+            entries_expected = db_query.filter(and_(_DbStoredFile.store_id == self.store_id,
+                                                    _DbStoredFile.time_stored < self.time_started
+                                                   )
+                                              ).scalar()
+        #
+
+        if (entries_expected > entries_compared): self._handle_unscanned_locations(directory_locations_compared, report)
+
+        LogLine.info("pas.file_store.Reconciler checked {0:d} files of file store '{1}' finding {2:d} orphaned files and {3:d} dangling entries",
+                     report['files_scanned'],
+                     self.store_id,
+                     report['files_orphaned'],
+                     report['entries_dangling'],
+                     context = "pas_file_store"
+                    )
+
+        return report
+    #
+
+    def _reconcile_directory(self, directory_location, report):
+        """
+Scans the given directory and compares its files with the entries located
+in it.
+
+:param directory_location: Directory location relative to the file store
+:param report: Report dictionary to be updated
+
+:return: (tuple) Directory location, list of subdirectory locations and
+         number of entries compared; None if no files were found
+:since:  v0.2.00
+        """
+
+        directory_path_name = self.stored_file._get_file_path_name(directory_location)
+        prefix = self._get_location_prefix(directory_location)
+
+        file_names = [ ]
+        subdirectory_locations = [ ]
+
+        with os.scandir(directory_path_name) as directory_entries:
+            for directory_entry in directory_entries:
+                # Hidden files like the lock file of the sweeper are not stored files
+                if (directory_entry.name.startswith(".")): continue
+
+                if (directory_entry.is_dir(follow_symlinks = False)): subdirectory_locations.append("{0}{1}".format(prefix, directory_entry.name))
+                elif (directory_entry.is_file(follow_symlinks = False)): file_names.append(directory_entry.name)
+            #
+        #
+
+        entries_compared = None
+
+        if (len(file_names) > 0):
+            # File locations consist of ASCII characters sorted identically by Python and the database
+            file_names.sort()
+
+            directory_report = { "files_orphaned": 0,
+                                 "files_removed": 0,
+                                 "bytes_orphaned": 0,
+                                 "entries_dangling": 0,
+                                 "entries_removed": 0
+                               }
+
+            with Connection.get_instance() as connection:
+                entries_compared = 0
+                file_locations_dangling = [ ]
+                file_locations_orphaned = [ ]
+
+                db_file_names = self._get_db_file_names(connection, directory_location)
+                db_file_name = next(db_file_names, None)
+
+                for file_name in file_names:
+                    while (db_file_name is not None and db_file_name < file_name):
+                        entries_compared += 1
+                        file_locations_dangling.append("{0}{1}".format(prefix, db_file_name))
+
+                        db_file_name = next(db_file_names, None)
+                    #
+
+                    if (db_file_name == file_name):
+                        entries_compared += 1
+                        db_file_name = next(db_file_names, None)
+                    else: file_locations_orphaned.append("{0}{1}".format(prefix, file_name))
+
+                    if (len(file_locations_dangling) >= Reconciler.BULK_SIZE):
+                        self._handle_dangling_locations(connection, file_locations_dangling, directory_report)
+                        file_locations_dangling = [ ]
+                    #
+
+                    if (len(file_locations_orphaned) >= Reconciler.BULK_SIZE):
+                        self._handle_orphaned_files(connection, file_locations_orphaned, directory_report)
+                        file_locations_orphaned = [ ]
+                    #
+                #
+
+                while (db_file_name is not None):
+                    entries_compared += 1
+                    file_locations_dangling.append("{0}{1}".format(prefix, db_file_name))
+
+                    if (len(file_locations_dangling) >= Reconciler.BULK_SIZE):
+                        self._handle_dangling_locations(connection, file_locations_dangling, directory_report)
+                        file_locations_dangling = [ ]
+                    #
+
+                    db_file_name = next(db_file_names, None)
+                #
+
+                if (len(file_locations_orphaned) > 0): self._handle_orphaned_files(connection, file_locations_orphaned, directory_report)
+                if (len(file_locations_dangling) > 0): self._handle_dangling_locations(connection, file_locations_dangling, directory_report)
+            #
+        #
+
+        with self.__class__._lock:
+            report['directories_scanned'] += 1
+            report['files_scanned'] += len(file_names)
+
+            if (entries_compared is not None):
+                for ( key, value ) in directory_report.items(): report[key] += value
+            #
+        #
+
+        return ( directory_location, subdirectory_locations, entries_compared )
+    #
+
+    @staticmethod
+    def _escape_like(value):
+        """
+Escapes the wildcard characters of the given value for a LIKE pattern.
+
+:param value: Value to be escaped
+
+:return: (str) Escaped value
+:since:  v0.2.00
+        """
+
+        return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    #
+
+    @staticmethod
+    def main():
+        """
+Standalone entry point to reconcile file stores.
+
+:since: v0.2.00
+        """
+
+        parser = ArgumentParser(description = "Reconciles pas_file_store file stores with their database entries")
+        parser.add_argument("--repair", action = "store_true", help = "Remove orphaned files and dangling entries")
+        parser.add_argument("--store", action = "append", dest = "stored_file_class_names", help = "StoredFile class name of the file store to be reconciled")
+        args = parser.parse_args()
+
+        stored_file_class_names = (Settings.get("pas_file_store_sweeper_stores", [ "dNG.data.StoredFile", "dNG.data.cache.File" ])
+                                   if (args.stored_file_class_names is None) else
+                                   args.stored_file_class_names
+                                  )
+
+        reports = { }
+
+        for stored_file_class_name in stored_file_class_names:
+            reports[stored_file_class_name] = Reconciler(stored_file_class_name, args.repair).reconcile()
+        #
+
+        print(json.dumps(reports, indent = 2, sort_keys = True))
+    #
+#
+
+if (__name__ == "__main__"): Reconciler.main()
@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+#echo(pasFileStoreVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+from shutil import copy2
+from sqlalchemy.sql.expression import and_, distinct
+from time import sleep
+import json
+import os
+
+from dNG.data.logging.log_line import LogLine
+from dNG.data.settings import Settings
+from dNG.database.connection import Connection
+from dNG.database.instances.stored_file import StoredFile as _DbStoredFile
+from dNG.database.instances.stored_file_blob import StoredFileBlob as _DbStoredFileBlob
+from dNG.database.transaction_context import TransactionContext
+from dNG.module.named_loader import NamedLoader
+
+class Resharder(object):
+    """
+"Resharder" moves the files of a file store to the currently configured
+subdirectory levels while the store is in use.
+
+Files are linked to their new location before the entries of a batch are
+updated in one transaction. The old files are removed afterwards. Entries
+keep working with either location and instances loaded before the update
+reload their file location if the old file is gone. The progress is saved
+in the file store directory to resume an interrupted run.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: file_store
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;mpl2
+             Mozilla Public License, v. 2.0
+    """
+
+    STATE_FILE_NAME = ".resharder.state"
+    """
+Name of the file saving the progress in the file store directory
+    """
+
+    def __init__(self, stored_file_class_name):
+        """
+Constructor __init__(Resharder)
+
+:param stored_file_class_name: StoredFile class name of the file store
+
+:since: v0.2.00
+        """
+
+        self.batch_delay = float(Settings.get("pas_file_store_reshard_batch_delay", 0.1))
+        """
+Number of seconds to wait between two batches
+        """
+        self.batch_size = int(Settings.get("pas_file_store_reshard_batch_size", 500))
+        """
+Number of file locations moved in one batch
+        """
+        self.stored_file = NamedLoader.get_instance(stored_file_class_name)
+        """
+StoredFile instance of the file store
+        """
+        self.workers = max(1, int(Settings.get("pas_file_store_reshard_workers", 4)))
+        """
+Maximum number of files linked in parallel
+        """
+
+        self.store_id = self.stored_file.get_store_id()
+        """
+File store ID
+        """
+    #
+
+    def _get_file_location(self, file_location):
+        """
+Returns the file location for the currently configured subdirectory
+levels.
+
+:param file_location: Current file location
+
+:return: (str) File location
+:since:  v0.2.00
+        """
+
+        # Files stay in the root they have been placed in
+        ( root_name, separator, root_file_location ) = file_location.partition(self.stored_file.ROOT_SEPARATOR)
+
+        if (separator == ""):
+            root_location = ""
+            root_file_location = file_location
+        else: root_location = "{0}{1}".format(root_name, separator)
+
+        names = root_file_location.split("/")
+        name = "".join(names)
+
+        # The "_" separating a completely used resource ID has been removed
+        if ((not self.stored_file.deduplication)
+            and len(names) > 1
+            and len(names[-1]) > 0
+            and len(name) - len(names[-1]) == 32
+           ): name = "{0}_{1}".format(name[:32], name[32:])
+
+        if (len(self.stored_file.subdirectory_levels) < 1): _return = name
+        else:
+            ( subdirectory_location, file_name ) = self.stored_file._get_subdirectory_location(name)
+            if ((not self.stored_file.deduplication) and file_name.startswith("_")): file_name = file_name[1:]
+
+            _return = "{0}/{1}".format(subdirectory_location, file_name)
+        #
+
+        return "{0}{1}".format(root_location, _return)
+    #
+
+    def _get_state_file_path_name(self):
+        """
+Returns the path and name of the file saving the progress.
+
+:return: (str) Path and name
+:since:  v0.2.00
+        """
+
+        return path.join(self.stored_file.store_path, Resharder.STATE_FILE_NAME)
+    #
+
+    def _link_file(self, file_locations):
+        """
+Links the file of the given old location to the new one. It is copied if
+hard links are not supported.
+
+:param file_locations: Tuple of the old and new file location
+
+:return: (bool) True on success
+:since:  v0.2.00
+        """
+
+        ( file_location, file_location_new ) = file_locations
+
+        file_path_name = self.stored_file._get_file_path_name(file_location)
+        file_path_name_new = self.stored_file._get_file_path_name(file_location_new)
+
+        _return = False
+
+        try:
+            if (path.dirname(file_location_new) != ""): self.stored_file._ensure_subdirectory_exists(path.dirname(file_location_new))
+
+            # A link of an interrupted run is not referenced by any entry
+            if (path.exists(file_path_name_new)): os.unlink(file_path_name_new)
+
+            try: os.link(file_path_name, file_path_name_new)
+            except OSError:
+                if (not path.exists(file_path_name)): raise
+                copy2(file_path_name, file_path_name_new)
+            #
+
+            _return = True
+        except Exception as handled_exception:
+            LogLine.error("pas.file_store.Resharder failed to move '{0}' of file store '{1}': {2!r}",
+                          file_location,
+                          self.store_id,
+                          handled_exception,
+                          context = "pas_file_store"
+                         )
+        #
+
+        return _return
+    #
+
+    def _read_state(self):
+        """
+Reads the progress saved by an interrupted run.
+
+:return: (dict) Saved state; empty if none
+:since:  v0.2.00
+        """
+
+        _return = { }
+        state_file_path_name = self._get_state_file_path_name()
+
+        if (path.exists(state_file_path_name)):
+            try:
+                with open(state_file_path_name, "r") as state_file: _return = json.load(state_file)
+            except ValueError: LogLine.warning("pas.file_store.Resharder ignores invalid state file '{0}'", state_file_path_name, context = "pas_file_store")
+        #
+
+        return _return
+    #
+
+    def _remove_empty_directories(self):
+        """
+Removes empty subdirectories left by the old layout in all roots.
+
+:since: v0.2.00
+        """
+
+        for ( _, root_path, _ ) in self.stored_file.store_config.roots:
+            for ( directory_path_name, _, _ ) in os.walk(root_path, topdown = False):
+                if (directory_path_name != root_path):
+                    try: os.rmdir(directory_path_name)
+                    except OSError: pass
+                #
+            #
+        #
+    #
+
+    def reshard(self, restart = False):
+        """
+Moves all files of the file store to the currently configured subdirectory
+levels. Entries stored by processes using an outdated configuration are
+moved by running it again.
+
+:param restart: True to ignore the progress of an interrupted run
+
+:return: (dict) Resharding report
+:since:  v0.2.00
+        """
+
+        self.stored_file._ensure_store_exists()
+
+        subdirectory_levels = list(self.stored_file.subdirectory_levels)
+        state = ({ } if (restart) else self._read_state())
+
+        file_location_last = (state.get("file_location")
+                              if (state.get("subdirectory_levels") == subdirectory_levels) else
+                              None
+                             )
+
+        report = { "batches": 0, "entries_checked": 0, "files_moved": 0, "files_failed": 0 }
+
+        while (True):
+            with Connection.get_instance() as connection:
+                db_query = connection.query(distinct(_DbStoredFile.file_location)).filter(_DbStoredFile.store_id == self.store_id)
+                if (file_location_last is not None): db_query = db_query.filter(_DbStoredFile.file_location > file_location_last)
+
+                db_query = db_query.order_by(_DbStoredFile.file_location.asc()).limit(self.batch_size)
+                file_locations = [ file_location for ( file_location, ) in db_query ]
+            #
+
+            if (len(file_locations) < 1): break
+
+            file_locations_moved = [ ]
+
+            for file_location in file_locations:
+                file_location_new = self._get_file_location(file_location)
+                if (file_location_new != file_location): file_locations_moved.append(( file_location, file_location_new ))
+            #
+
+            if (len(file_locations_moved) > 0): self._reshard_batch(file_locations_moved, report)
+
+            file_location_last = file_locations[-1]
+
+            report['batches'] += 1
+            report['entries_checked'] += len(file_locations)
+
+            self._write_state({ "subdirectory_levels": subdirectory_levels, "file_location": file_location_last })
+
+            if (self.batch_delay > 0 and len(file_locations_moved) > 0): sleep(self.batch_delay)
+        #
+
+        state_file_path_name = self._get_state_file_path_name()
+        if (path.exists(state_file_path_name)): os.unlink(state_file_path_name)
+
+        self._remove_empty_directories()
+
+        LogLine.info("pas.file_store.Resharder moved {0:d} files of file store '{1}' to subdirectory levels {2!r}",
+                     report['files_moved'],
+                     self.store_id,
+                     subdirectory_levels,
+                     context = "pas_file_store"
+                    )
+
+        return report
+    #
+
+    def _reshard_batch(self, file_locations_moved, report):
+        """
+Moves the given files and updates their entries in one transaction.
+
+:param file_locations_moved: List of old and new file location tuples
+:param report: Report dictionary to be updated
+
+:since: v0.2.00
+        """
+
+        with ThreadPoolExecutor(max_workers = min(self.workers, len(file_locations_moved))) as executor:
+            results = list(executor.map(self._link_file, file_locations_moved))
+        #
+
+        file_locations_linked = [ file_locations for ( file_locations, result ) in zip(file_locations_moved, results) if (result) ]
+        report['files_failed'] += len(file_locations_moved) - len(file_locations_linked)
+
+        file_locations_updated = [ ]
+        file_locations_unreferenced = [ ]
+
+        try:
+            with Connection.get_instance() as connection, TransactionContext():
+                for ( file_location, file_location_new ) in file_locations_linked:
+                    db_query = connection.query(_DbStoredFile).filter(and_(_DbStoredFile.store_id == self.store_id,
+                                                                          _DbStoredFile.file_location == file_location
+                                                                         )
+                                                                     )
+
+                    entries_updated = db_query.update({ _DbStoredFile.file_location: file_location_new }, synchronize_session = False)
+
+                    if (self.stored_file.deduplication):
+                        db_query = connection.query(_DbStoredFileBlob).filter(and_(_DbStoredFileBlob.store_id == self.store_id,
+                                                                                  _DbStoredFileBlob.file_location == file_location
+                                                                                 )
+                                                                             )
+
+                        db_query.update({ _DbStoredFileBlob.file_location: file_location_new }, synchronize_session = False)
+                    #
+
+                    # Entries deleted in the meantime leave the new link unreferenced
+                    if (entries_updated > 0): file_locations_updated.append(( file_location, file_location_new ))
+                    else: file_locations_unreferenced.append(( file_location, file_location_new ))
+                #
+            #
+        except Exception:
+            self.stored_file._unlink_stored_files([ self.stored_file._get_file_path_name(file_location_new)
+                                                    for ( _, file_location_new ) in file_locations_linked
+                                                  ])
+
+            raise
+        #
+
+        self.stored_file._unlink_stored_files([ self.stored_file._get_file_path_name(file_location)
+                                                for ( file_location, _ ) in file_locations_updated
+                                              ]
+                                              + [ self.stored_file._get_file_path_name(file_location_new)
+                                                  for ( _, file_location_new ) in file_locations_unreferenced
+                                                ]
+                                             )
+
+        report['files_moved'] += len(file_locations_updated)
+    #
+
+    def _write_state(self, state):
+        """
+Saves the progress to resume an interrupted run.
+
+:param state: State dictionary
+
+:since: v0.2.00
+        """
+
+        state_file_path_name = self._get_state_file_path_name()
+        state_file_path_name_temporary = "{0}.tmp".format(state_file_path_name)
+
+        with open(state_file_path_name_temporary, "w") as state_file: json.dump(state, state_file)
+        os.replace(state_file_path_name_temporary, state_file_path_name)
+    #
+
+    @staticmethod
+    def main():
+        """
+Standalone entry point to reshard a file store.
+
+:since: v0.2.00
+        """
+
+        parser = ArgumentParser(description = "Moves the files of a pas_file_store file store to the configured subdirectory levels")
+        parser.add_argument("--restart", action = "store_true", help = "Ignore the progress of an interrupted run")
+        parser.add_argument("--store", default = "dNG.data.StoredFile", dest = "stored_file_class_name", help = "StoredFile class name of the file store to be resharded")
+        args = parser.parse_args()
+
+        report = Resharder(args.stored_file_class_name).reshard(args.restart)
+        print(json.dumps(report, indent = 2, sort_keys = True))
+    #
+#
+
+if (__name__ == "__main__"): Resharder.main()
@@ -0,0 +1,645 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+#echo(pasFileStoreVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from os import path
+from time import time
+from zlib import crc32
+import json
+import os
+import struct
+
+try:
+    import fcntl
+    import mmap
+except ImportError: fcntl = None
+
+from dNG.data.logging.log_line import LogLine
+from dNG.data.settings import Settings
+from dNG.runtime.thread_lock import ThreadLock
+
+class SharedCache(object):
+    """
+"SharedCache" holds the content and metadata of small StoredFile entries in
+a memory mapped file (on "/dev/shm" by default) shared by all processes of
+a node.
+
+The file contains a header, an open addressing hash index and payload slabs
+of fixed size classes. Each index entry is protected by a sequence counter
+(seqlock) so readers never lock: a read is only used if the counter has
+been even and unchanged while copying. Writers are serialized by a file
+lock and replace slabs of a size class in FIFO order.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: file_store
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;mpl2
+             Mozilla Public License, v. 2.0
+    """
+
+    CLASS_FORMAT = struct.Struct("<IIQI4x")
+    """
+Slab class: slab size, slab count, offset and FIFO cursor
+    """
+    CLASS_OFFSET = 64
+    """
+Offset of the first slab class in the header
+    """
+    ENTRY_FORMAT = struct.Struct("<Q32sHHIId4x")
+    """
+Index entry: sequence counter, StoredFile ID, slab class (starting at 1),
+unused, slab index, payload length and timeout
+    """
+    HEADER_FORMAT = struct.Struct("<8sIII")
+    """
+Header: magic, number of index entries, slab classes and probes
+    """
+    HEADER_SIZE = 4096
+    """
+Size reserved for the header and slab classes
+    """
+    MAGIC = b"PASSC001"
+    """
+Magic identifying the file layout
+    """
+    PROBES = 8
+    """
+Number of index entries probed for an ID
+    """
+    SEQUENCE_FORMAT = struct.Struct("<Q")
+    """
+Sequence counter of an index entry
+    """
+    SLAB_OWNER_FORMAT = struct.Struct("<I")
+    """
+Index entry (starting at 1) owning a slab
+    """
+    SLAB_SIZES = ( 1024, 4096, 16384, 65600 )
+    """
+Payload sizes of the slab classes. The largest one holds 64 KiB of content
+and its metadata.
+    """
+
+    _instance = None
+    """
+SharedCache instance
+    """
+    _lock = ThreadLock()
+    """
+Thread safety lock
+    """
+
+    def __init__(self):
+        """
+Constructor __init__(SharedCache)
+
+:since: v0.2.00
+        """
+
+        self.bucket_count = 0
+        """
+Number of index entries
+        """
+        self.classes = [ ]
+        """
+List of slab size, slab count and offset tuples
+        """
+        self.file_descriptor = None
+        """
+File descriptor of the memory mapped file
+        """
+        self.file_path_name = Settings.get("pas_file_store_shared_cache_path", "/dev/shm/pas_file_store.cache")
+        """
+Path and name of the memory mapped file
+        """
+        self.hits = 0
+        """
+Number of cache hits
+        """
+        self.is_opened = False
+        """
+True if opening the memory mapped file has been tried
+        """
+        self.mmap = None
+        """
+Memory mapped file
+        """
+        self.misses = 0
+        """
+Number of cache misses
+        """
+        self.publishes = 0
+        """
+Number of entries published by this process
+        """
+        self.size = int(Settings.get("pas_file_store_shared_cache_size", 0))
+        """
+Size of the memory mapped file in bytes
+        """
+    #
+
+    def __enter__(self):
+        """
+python.org: Enter the runtime context related to this object.
+
+:since: v0.2.00
+        """
+
+        SharedCache._lock.acquire()
+
+        try: fcntl.flock(self.file_descriptor, fcntl.LOCK_EX)
+        except Exception:
+            SharedCache._lock.release()
+            raise
+        #
+    #
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+python.org: Exit the runtime context related to this object.
+
+:return: (bool) True to suppress exceptions
+:since:  v0.2.00
+        """
+
+        try: fcntl.flock(self.file_descriptor, fcntl.LOCK_UN)
+        finally: SharedCache._lock.release()
+
+        return False
+    #
+
+    def clear(self):
+        """
+Removes all cached entries.
+
+:since: v0.2.00
+        """
+
+        if (self._open()):
+            with self:
+                for bucket in range(self.bucket_count): self._clear_bucket(bucket)
+            #
+        #
+    #
+
+    def _clear_bucket(self, bucket):
+        """
+Clears the given index entry. The write lock must be held by the caller.
+
+:param bucket: Index entry
+
+:since: v0.2.00
+        """
+
+        offset = self._get_bucket_offset(bucket)
+        ( sequence, ) = SharedCache.SEQUENCE_FORMAT.unpack_from(self.mmap, offset)
+
+        SharedCache.SEQUENCE_FORMAT.pack_into(self.mmap, offset, sequence + 1)
+        SharedCache.ENTRY_FORMAT.pack_into(self.mmap, offset, sequence + 1, b"", 0, 0, 0, 0, 0)
+        SharedCache.SEQUENCE_FORMAT.pack_into(self.mmap, offset, sequence + 2)
+    #
+
+    def _find_bucket(self, key):
+        """
+Returns the index entry used for the given key. The write lock must be
+held by the caller.
+
+:param key: Encoded StoredFile ID
+
+:return: (tuple) Index entry and True if it contains the key
+:since:  v0.2.00
+        """
+
+        bucket_empty = None
+        buckets = self._get_buckets(key)
+
+        for bucket in buckets:
+            entry = SharedCache.ENTRY_FORMAT.unpack_from(self.mmap, self._get_bucket_offset(bucket))
+
+            if (entry[2] == 0):
+                if (bucket_empty is None): bucket_empty = bucket
+            elif (entry[1] == key): return ( bucket, True )
+        #
+
+        # The first probed entry is replaced if all of them are used
+        return (( buckets[0], False ) if (bucket_empty is None) else ( bucket_empty, False ))
+    #
+
+    def get(self, _id):
+        """
+Returns the cached content and metadata for the given StoredFile ID.
+
+:param _id: StoredFile ID
+
+:return: (tuple) Content and metadata; None if not cached or expired
+:since:  v0.2.00
+        """
+
+        key = SharedCache._get_key(_id)
+        if (key is None or (not self._open())): return None
+
+        _return = None
+
+        for bucket in self._get_buckets(key):
+            offset = self._get_bucket_offset(bucket)
+
+            # Retry reads overlapping with a writer a few times before giving up
+            for _ in range(3):
+                ( sequence, entry_key, class_id, _, slab, length, timeout ) = SharedCache.ENTRY_FORMAT.unpack_from(self.mmap, offset)
+                if (sequence & 1): continue
+
+                if (class_id == 0 or entry_key != key): break
+
+                payload_offset = self._get_slab_offset(class_id, slab) + SharedCache.SLAB_OWNER_FORMAT.size
+                payload = self.mmap[payload_offset:payload_offset + length]
+                ( sequence_validated, ) = SharedCache.SEQUENCE_FORMAT.unpack_from(self.mmap, offset)
+
+                if (sequence_validated == sequence):
+                    if (timeout < 1 or timeout >= time()): _return = SharedCache._unpack_payload(payload)
+                    break
+                #
+            #
+
+            if (_return is not None): break
+        #
+
+        if (_return is None): self.misses += 1
+        else: self.hits += 1
+
+        return _return
+    #
+
+    def _get_bucket_offset(self, bucket):
+        """
+Returns the offset of the given index entry.
+
+:param bucket: Index entry
+
+:return: (int) Offset
+:since:  v0.2.00
+        """
+
+        return SharedCache.HEADER_SIZE + (bucket * SharedCache.ENTRY_FORMAT.size)
+    #
+
+    def _get_buckets(self, key):
+        """
+Returns the index entries probed for the given key.
+
+:param key: Encoded StoredFile ID
+
+:return: (list) Index entries
+:since:  v0.2.00
+        """
+
+        bucket = crc32(key) % self.bucket_count
+        return [ ((bucket + probe) % self.bucket_count) for probe in range(min(SharedCache.PROBES, self.bucket_count)) ]
+    #
+
+    def _get_slab_offset(self, class_id, slab):
+        """
+Returns the offset of the given slab.
+
+:param class_id: Slab class (starting at 1)
+:param slab: Slab index
+
+:return: (int) Offset
+:since:  v0.2.00
+        """
+
+        ( slab_size, _, offset ) = self.classes[class_id - 1]
+        return offset + (slab * (SharedCache.SLAB_OWNER_FORMAT.size + slab_size))
+    #
+
+    def get_statistics(self):
+        """
+Returns the cache statistics.
+
+:return: (dict) Number of cached entries, the file size as well as hits,
+         misses and entries published by this process
+:since:  v0.2.00
+        """
+
+        entries = 0
+
+        if (self._open()):
+            for bucket in range(self.bucket_count):
+                if (SharedCache.ENTRY_FORMAT.unpack_from(self.mmap, self._get_bucket_offset(bucket))[2] > 0): entries += 1
+            #
+        #
+
+        return { "entries": entries,
+                 "size": (self.mmap.size() if (self.is_opened and self.mmap is not None) else 0),
+                 "hits": self.hits,
+                 "misses": self.misses,
+                 "publishes": self.publishes
+               }
+    #
+
+    def _init_layout(self):
+        """
+Calculates and writes the layout for the configured size. The write lock
+must be held by the caller.
+
+:since: v0.2.00
+        """
+
+        class_size = (self.size - SharedCache.HEADER_SIZE) // len(SharedCache.SLAB_SIZES)
+        offset = SharedCache.HEADER_SIZE
+        slab_counts = [ ]
+
+        # Each slab accounts for two index entries to keep the index sparse
+        for slab_size in SharedCache.SLAB_SIZES:
+            slab_counts.append(class_size // (SharedCache.SLAB_OWNER_FORMAT.size + slab_size + (2 * SharedCache.ENTRY_FORMAT.size)))
+        #
+
+        bucket_count = max(1, 2 * sum(slab_counts))
+        offset += bucket_count * SharedCache.ENTRY_FORMAT.size
+
+        os.ftruncate(self.file_descriptor, 0)
+        os.ftruncate(self.file_descriptor, self.size)
+
+        header = bytearray(SharedCache.HEADER_SIZE)
+
+        for ( position, slab_size ) in enumerate(SharedCache.SLAB_SIZES):
+            SharedCache.CLASS_FORMAT.pack_into(header,
+                                               SharedCache.CLASS_OFFSET + (position * SharedCache.CLASS_FORMAT.size),
+                                               slab_size,
+                                               slab_counts[position],
+                                               offset,
+                                               0
+                                              )
+
+            offset += slab_counts[position] * (SharedCache.SLAB_OWNER_FORMAT.size + slab_size)
+        #
+
+        SharedCache.HEADER_FORMAT.pack_into(header, 0, SharedCache.MAGIC, bucket_count, len(SharedCache.SLAB_SIZES), SharedCache.PROBES)
+
+        os.lseek(self.file_descriptor, 0, os.SEEK_SET)
+        os.write(self.file_descriptor, bytes(header))
+    #
+
+    def invalidate(self, _id):
+        """
+Removes the cached entry for the given StoredFile ID.
+
+:param _id: StoredFile ID
+
+:since: v0.2.00
+        """
+
+        self.invalidate_ids([ _id ])
+    #
+
+    def invalidate_ids(self, ids):
+        """
+Removes the cached entries for the given StoredFile IDs with one write
+lock.
+
+:param ids: List of StoredFile IDs
+
+:since: v0.2.00
+        """
+
+        keys = [ key for key in ( SharedCache._get_key(_id) for _id in ids ) if (key is not None) ]
+
+        if (len(keys) > 0 and self._open()):
+            with self:
+                for key in keys:
+                    ( bucket, is_found ) = self._find_bucket(key)
+                    if (is_found): self._clear_bucket(bucket)
+                #
+            #
+        #
+    #
+
+    def is_cacheable(self, size):
+        """
+Checks if an entry of the given size might be cached.
+
+:param size: Entry size
+
+:return: (bool) True if cacheable
+:since:  v0.2.00
+        """
+
+        return (self.size > 0
+                and size is not None
+                and size < SharedCache.SLAB_SIZES[-1]
+                and self._open()
+               )
+    #
+
+    def _open(self):
+        """
+Opens and maps the shared file if not already done.
+
+:return: (bool) True if the shared cache is usable
+:since:  v0.2.00
+        """
+
+        if (not self.is_opened):
+            with SharedCache._lock:
+                # Thread safety
+                if (not self.is_opened):
+                    try:
+                        if (self.size > 0 and fcntl is not None): self._open_file()
+                    except Exception as handled_exception:
+                        LogLine.warning("pas.file_store.SharedCache is disabled: {0!r}", handled_exception, context = "pas_file_store")
+                        self.mmap = None
+                    #
+
+                    self.is_opened = True
+                #
+            #
+        #
+
+        return (self.mmap is not None)
+    #
+
+    def _open_file(self):
+        """
+Opens and maps the shared file. Its layout is initialized if the file is
+new or invalid. The thread safety lock must be held by the caller.
+
+:since: v0.2.00
+        """
+
+        if (not path.isdir(path.dirname(self.file_path_name))): raise IOError("Directory of '{0}' does not exist".format(self.file_path_name))
+
+        self.file_descriptor = os.open(self.file_path_name, os.O_RDWR | os.O_CREAT, 0o600)
+
+        try:
+            fcntl.flock(self.file_descriptor, fcntl.LOCK_EX)
+
+            try:
+                header = os.read(self.file_descriptor, SharedCache.HEADER_SIZE)
+
+                if (len(header) < SharedCache.HEADER_SIZE
+                    or header[:len(SharedCache.MAGIC)] != SharedCache.MAGIC
+                   ): self._init_layout()
+
+                # The layout of an existing file is used even if the configured size differs
+                self.mmap = mmap.mmap(self.file_descriptor, os.fstat(self.file_descriptor).st_size)
+            finally: fcntl.flock(self.file_descriptor, fcntl.LOCK_UN)
+
+            ( _, self.bucket_count, class_count, _ ) = SharedCache.HEADER_FORMAT.unpack_from(self.mmap, 0)
+
+            self.classes = [ SharedCache.CLASS_FORMAT.unpack_from(self.mmap, SharedCache.CLASS_OFFSET + (position * SharedCache.CLASS_FORMAT.size))[:3]
+                             for position in range(class_count)
+                           ]
+        except Exception:
+            os.close(self.file_descriptor)
+            self.file_descriptor = None
+
+            raise
+        #
+    #
+
+    def set(self, _id, data, metadata):
+        """
+Publishes the content and metadata for the given StoredFile ID.
+
+:param _id: StoredFile ID
+:param data: Content
+:param metadata: Dictionary with "id", "resource", "size", "timeout" and
+                 "time_stored"
+
+:return: (bool) True if published
+:since:  v0.2.00
+        """
+
+        key = SharedCache._get_key(_id)
+        if (key is None or (not self._open())): return False
+
+        payload = SharedCache._pack_payload(data, metadata)
+        class_id = None
+
+        for ( position, ( slab_size, slab_count, _ ) ) in enumerate(self.classes):
+            if (slab_count > 0 and len(payload) <= slab_size):
+                class_id = 1 + position
+                break
+            #
+        #
+
+        if (class_id is None): return False
+
+        timeout = (0 if (metadata.get("timeout") is None) else metadata['timeout'])
+
+        with self:
+            ( bucket, _ ) = self._find_bucket(key)
+            bucket_offset = self._get_bucket_offset(bucket)
+
+            ( sequence, ) = SharedCache.SEQUENCE_FORMAT.unpack_from(self.mmap, bucket_offset)
+            SharedCache.SEQUENCE_FORMAT.pack_into(self.mmap, bucket_offset, sequence + 1)
+
+            class_offset = SharedCache.CLASS_OFFSET + ((class_id - 1) * SharedCache.CLASS_FORMAT.size)
+            ( _, slab_count, _, slab ) = SharedCache.CLASS_FORMAT.unpack_from(self.mmap, class_offset)
+            SharedCache.CLASS_FORMAT.pack_into(self.mmap, class_offset, self.classes[class_id - 1][0], slab_count, self.classes[class_id - 1][2], (slab + 1) % slab_count)
+
+            slab_offset = self._get_slab_offset(class_id, slab)
+            ( owner, ) = SharedCache.SLAB_OWNER_FORMAT.unpack_from(self.mmap, slab_offset)
+
+            # Readers of the previous owner must see a changed sequence before the payload is overwritten
+            if (owner > 0 and owner - 1 != bucket):
+                owner_entry = SharedCache.ENTRY_FORMAT.unpack_from(self.mmap, self._get_bucket_offset(owner - 1))
+                if (owner_entry[2] == class_id and owner_entry[4] == slab): self._clear_bucket(owner - 1)
+            #
+
+            SharedCache.SLAB_OWNER_FORMAT.pack_into(self.mmap, slab_offset, 1 + bucket)
+
+            payload_offset = slab_offset + SharedCache.SLAB_OWNER_FORMAT.size
+            self.mmap[payload_offset:payload_offset + len(payload)] = payload
+
+            SharedCache.ENTRY_FORMAT.pack_into(self.mmap, bucket_offset, sequence + 1, key, class_id, 0, slab, len(payload), timeout)
+            SharedCache.SEQUENCE_FORMAT.pack_into(self.mmap, bucket_offset, sequence + 2)
+        #
+
+        self.publishes += 1
+        return True
+    #
+
+    @staticmethod
+    def get_instance():
+        """
+Get the SharedCache singleton.
+
+:return: (object) Object on success
+:since:  v0.2.00
+        """
+
+        if (SharedCache._instance is None):
+            with SharedCache._lock:
+                # Thread safety
+                if (SharedCache._instance is None): SharedCache._instance = SharedCache()
+            #
+        #
+
+        return SharedCache._instance
+    #
+
+    @staticmethod
+    def _get_key(_id):
+        """
+Returns the encoded key for the given StoredFile ID.
+
+:param _id: StoredFile ID
+
+:return: (bytes) Key; None if the ID can not be cached
+:since:  v0.2.00
+        """
+
+        _return = (None if (_id is None) else _id.encode("utf-8"))
+        return (_return.ljust(32, b"\0") if (_return is not None and 0 < len(_return) <= 32) else None)
+    #
+
+    @staticmethod
+    def _pack_payload(data, metadata):
+        """
+Returns the payload for the given content and metadata.
+
+:param data: Content
+:param metadata: Metadata dictionary
+
+:return: (bytes) Payload
+:since:  v0.2.00
+        """
+
+        metadata_data = json.dumps(metadata, separators = ( ",", ":" )).encode("utf-8")
+        return struct.pack("<I", len(metadata_data)) + metadata_data + bytes(data)
+    #
+
+    @staticmethod
+    def _unpack_payload(payload):
+        """
+Returns the content and metadata of the given payload.
+
+:param payload: Payload
+
+:return: (tuple) Content and metadata
+:since:  v0.2.00
+        """
+
+        ( metadata_length, ) = struct.unpack_from("<I", payload, 0)
+        metadata = json.loads(payload[4:4 + metadata_length].decode("utf-8"))
+
+        return ( payload[4 + metadata_length:], metadata )
+    #
+#
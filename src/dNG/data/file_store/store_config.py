@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+#echo(pasFileStoreVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from collections import namedtuple
+
+class StoreConfig(namedtuple("StoreConfig",
+                             [ "store_id",
+                               "path",
+                               "roots",
+                               "subdirectory_levels",
+                               "size_max",
+                               "reservation_size",
+                               "reservation_lease",
+                               "deduplication",
+                               "eviction_policy",
+                               "chmod_dirs",
+                               "chmod_files",
+                               "umask",
+                               "unlink_workers",
+                               "usage_reconcile_interval"
+                             ]
+                            )):
+    """
+"StoreConfig" is the immutable, resolved configuration of a file store.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: file_store
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;mpl2
+             Mozilla Public License, v. 2.0
+    """
+
+    __slots__ = ( )
+    """
+python.org: Prevent the creation of an instance dictionary.
+    """
+#
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+#echo(pasFileStoreVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from time import time
+import re
+
+from dNG.data.settings import Settings
+from dNG.runtime.thread_lock import ThreadLock
+from dNG.runtime.value_exception import ValueException
+
+from .store_config import StoreConfig
+
+class StoreRegistry(object):
+    """
+"StoreRegistry" resolves the settings of each file store once into an
+immutable "StoreConfig" instance. Settings are checked again for changes
+after "pas_file_store_settings_check_interval" seconds.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: file_store
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;mpl2
+             Mozilla Public License, v. 2.0
+    """
+
+    _instance = None
+    """
+StoreRegistry instance
+    """
+    _lock = ThreadLock()
+    """
+Thread safety lock
+    """
+
+    def __init__(self):
+        """
+Constructor __init__(StoreRegistry)
+
+:since: v0.2.00
+        """
+
+        self.check_interval = 10
+        """
+Number of seconds resolved configurations are used without checking the
+settings again
+        """
+        self.configs = { }
+        """
+Dictionary of resolved configurations and the time they were checked
+        """
+
+        self._load_settings()
+    #
+
+    def get_config(self, store_id, stored_file_class):
+        """
+Returns the configuration for the given file store ID.
+
+:param store_id: File store ID
+:param stored_file_class: StoredFile class providing default values
+
+:return: (object) StoreConfig instance
+:since:  v0.2.00
+        """
+
+        key = ( store_id, stored_file_class )
+        entry = self.configs.get(key)
+        timestamp = time()
+
+        if (entry is None or timestamp - entry[1] > self.check_interval):
+            with StoreRegistry._lock:
+                # Thread safety
+                entry = self.configs.get(key)
+
+                if (entry is None or timestamp - entry[1] > self.check_interval):
+                    config = self._resolve_config(store_id, stored_file_class)
+
+                    # Keep the instance if settings are unchanged
+                    if (entry is not None and entry[0] == config): config = entry[0]
+
+                    entry = ( config, timestamp )
+                    self.configs[key] = entry
+                #
+            #
+        #
+
+        return entry[0]
+    #
+
+    def get_configs(self):
+        """
+Returns all configurations resolved in this process.
+
+:return: (list) StoreConfig instances
+:since:  v0.2.00
+        """
+
+        with StoreRegistry._lock: return [ entry[0] for entry in self.configs.values() ]
+    #
+
+    def _load_settings(self):
+        """
+Loads the file store settings file if not already done.
+
+:since: v0.2.00
+        """
+
+        if (not Settings.is_defined("pas_file_store_default_path")): Settings.read_file("{0}/settings/pas_file_store.json".format(Settings.get("path_data")))
+        self.check_interval = int(Settings.get("pas_file_store_settings_check_interval", 10))
+    #
+
+    def reload(self):
+        """
+Discards all resolved configurations.
+
+:since: v0.2.00
+        """
+
+        with StoreRegistry._lock:
+            self._load_settings()
+            self.configs = { }
+        #
+    #
+
+    def _resolve_config(self, store_id, stored_file_class):
+        """
+Resolves the configuration for the given file store ID from the settings.
+
+:param store_id: File store ID
+:param stored_file_class: StoredFile class providing default values
+
+:return: (object) StoreConfig instance
+:since:  v0.2.00
+        """
+
+        path = Settings.get("pas_file_store_{0}_path".format(store_id))
+        if (path is None): raise ValueException("File store directory has not been configured for ID '{0}'".format(store_id))
+
+        subdirectory_levels = self._resolve_subdirectory_levels(store_id, stored_file_class)
+
+        size_mb_max = int(Settings.get("pas_file_store_{0}_max_mb_size".format(store_id), stored_file_class.STORE_SIZE_MB_MAX))
+
+        chmod_dirs = Settings.get("pas_file_store_chmod_dirs")
+        chmod_files = Settings.get("pas_file_store_chmod_files")
+        umask = Settings.get("pas_file_store_umask")
+
+        return StoreConfig(store_id = store_id,
+                           path = path,
+                           roots = self._resolve_roots(store_id, path),
+                           subdirectory_levels = subdirectory_levels,
+                           size_max = ((size_mb_max * 1048576) if (size_mb_max > 0) else -1),
+                           reservation_size = max(1, int(Settings.get("pas_file_store_reservation_size", 1048576))),
+                           reservation_lease = max(1, int(Settings.get("pas_file_store_reservation_lease", 3600))),
+                           deduplication = bool(Settings.get("pas_file_store_{0}_deduplication".format(store_id), stored_file_class.STORE_DEDUPLICATION)),
+                           eviction_policy = Settings.get("pas_file_store_{0}_eviction_policy".format(store_id), stored_file_class.STORE_EVICTION_POLICY),
+                           chmod_dirs = (0o750 if (chmod_dirs is None) else int(chmod_dirs, 8)),
+                           chmod_files = (0o640 if (chmod_files is None) else int(chmod_files, 8)),
+                           umask = (None if (umask is None) else int(umask, 8)),
+                           unlink_workers = max(1, int(Settings.get("pas_file_store_unlink_workers", 8))),
+                           usage_reconcile_interval = int(Settings.get("pas_file_store_{0}_usage_reconcile_interval".format(store_id),
+                                                                       Settings.get("pas_file_store_usage_reconcile_interval", 86400)
+                                                                      ))
+                          )
+    #
+
+    def _resolve_roots(self, store_id, path):
+        """
+Resolves the root directories of a file store. The file store directory is
+the root without a name. Additional roots are configured as a dictionary of
+root names and either a path or a dictionary with "path" and "weight".
+
+:param store_id: File store ID
+:param path: File store directory
+
+:return: (tuple) Tuples of root name, path and weight
+:since:  v0.2.00
+        """
+
+        roots = Settings.get("pas_file_store_{0}_roots".format(store_id), { })
+
+        weight = float(Settings.get("pas_file_store_{0}_weight".format(store_id), 1))
+        if (weight <= 0): raise ValueException("File store root weight is invalid for ID '{0}'".format(store_id))
+
+        _return = [ ( "", path, weight ) ]
+
+        for root_name in sorted(roots):
+            root = roots[root_name]
+
+            ( root_path, weight ) = (( root.get("path"), float(root.get("weight", 1)) )
+                                     if (isinstance(root, dict)) else
+                                     ( root, 1.0 )
+                                    )
+
+            if (re.match("^\\w+$", root_name) is None
+                or root_path is None
+                or weight <= 0
+               ): raise ValueException("File store root '{0}' is invalid for ID '{1}'".format(root_name, store_id))
+
+            _return.append(( root_name, root_path, weight ))
+        #
+
+        return tuple(_return)
+    #
+
+    def _resolve_subdirectory_levels(self, store_id, stored_file_class):
+        """
+Resolves the number of characters used for each subdirectory level. Levels
+are configured as a list or a string like "2/2/2". A single level is used
+for a configured subdirectory length.
+
+:param store_id: File store ID
+:param stored_file_class: StoredFile class providing default values
+
+:return: (tuple) Number of characters for each subdirectory level
+:since:  v0.2.00
+        """
+
+        subdirectory_levels = Settings.get("pas_file_store_{0}_subdirectory_levels".format(store_id), stored_file_class.STORE_SUBDIRECTORY_LEVELS)
+
+        if (subdirectory_levels is None):
+            subdirectory_length = int(Settings.get("pas_file_store_{0}_subdirectory_length".format(store_id), stored_file_class.STORE_SUBDIRECTORY_LENGTH))
+            _return = (( subdirectory_length, ) if (subdirectory_length > 0) else ( ))
+        else:
+            if (isinstance(subdirectory_levels, str)): subdirectory_levels = subdirectory_levels.split("/")
+            _return = tuple(int(subdirectory_level) for subdirectory_level in subdirectory_levels)
+        #
+
+        if ((len(_return) > 0 and min(_return) < 1)
+            or sum(_return) > 32
+           ): raise ValueException("File store subdirectory levels are invalid for ID '{0}'".format(store_id))
+
+        return _return
+    #
+
+    @staticmethod
+    def get_instance():
+        """
+Get the StoreRegistry singleton.
+
+:return: (object) Object on success
+:since:  v0.2.00
+        """
+
+        if (StoreRegistry._instance is None):
+            with StoreRegistry._lock:
+                # Thread safety
+                if (StoreRegistry._instance is None): StoreRegistry._instance = StoreRegistry()
+            #
+        #
+
+        return StoreRegistry._instance
+    #
+#
@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+#echo(pasFileStoreVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from sqlalchemy.sql.expression import and_, case
+from sqlalchemy.sql.functions import coalesce
+from sqlalchemy.sql.functions import count as sql_count
+from sqlalchemy.sql.functions import sum as sql_sum
+from time import time
+
+from dNG.data.logging.log_line import LogLine
+from dNG.database.instances.stored_file import StoredFile as _DbStoredFile
+from dNG.database.instances.stored_file_store_reservation import StoredFileStoreReservation as _DbStoredFileStoreReservation
+from dNG.database.instances.stored_file_store_usage import StoredFileStoreUsage as _DbStoredFileStoreUsage
+
+class StoreUsage(object):
+    """
+"StoreUsage" maintains the number of bytes and entries of each file store
+incrementally. "reconcile()" recalculates them to fix drift. Space reserved
+for entries being written is maintained separately as the sum of leased
+reservations. Reservations of writers terminated without releasing them are
+dropped by "expire_reservations()".
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: file_store
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;mpl2
+             Mozilla Public License, v. 2.0
+    """
+
+    @staticmethod
+    def add(connection, store_id, size_delta, entries_delta):
+        """
+Adds the given deltas to the usage of the file store. Nothing is done if the
+usage has not been calculated yet.
+
+:param connection: Database connection
+:param store_id: File store ID
+:param size_delta: Number of bytes added (or removed if negative)
+:param entries_delta: Number of entries added (or removed if negative)
+
+:since: v0.2.00
+        """
+
+        if (size_delta != 0 or entries_delta != 0):
+            with connection.no_autoflush:
+                db_query = connection.query(_DbStoredFileStoreUsage).filter(_DbStoredFileStoreUsage.store_id == store_id)
+
+                db_query.update({ _DbStoredFileStoreUsage.size: _DbStoredFileStoreUsage.size + size_delta,
+                                  _DbStoredFileStoreUsage.entries: _DbStoredFileStoreUsage.entries + entries_delta
+                                },
+                                synchronize_session = False
+                               )
+            #
+        #
+    #
+
+    @staticmethod
+    def _decrease_reserved_size(connection, store_id, size):
+        """
+Decreases the number of reserved bytes of the file store.
+
+:param connection: Database connection
+:param store_id: File store ID
+:param size: Number of bytes released
+
+:since: v0.2.00
+        """
+
+        if (size > 0):
+            with connection.no_autoflush:
+                db_query = connection.query(_DbStoredFileStoreUsage).filter(_DbStoredFileStoreUsage.store_id == store_id)
+
+                # The usage row might have been recreated by "reconcile()" in the meantime
+                db_query.update({ _DbStoredFileStoreUsage.size_reserved: case(( _DbStoredFileStoreUsage.size_reserved > size,
+                                                                                _DbStoredFileStoreUsage.size_reserved - size
+                                                                              ),
+                                                                              else_ = 0
+                                                                             )
+                                },
+                                synchronize_session = False
+                               )
+            #
+        #
+    #
+
+    @staticmethod
+    def expire_reservations(connection, store_id, lease):
+        """
+Drops reservations not renewed within the given lease, e.g. of writers
+terminated before their entry has been saved or closed.
+
+:param connection: Database connection
+:param store_id: File store ID
+:param lease: Number of seconds a reservation is valid after its last
+              renewal
+
+:return: (int) Number of bytes released
+:since:  v0.2.00
+        """
+
+        _return = 0
+
+        db_query = connection.query(_DbStoredFileStoreReservation.id,
+                                    _DbStoredFileStoreReservation.size,
+                                    _DbStoredFileStoreReservation.time_updated
+                                   )
+
+        db_query = db_query.filter(and_(_DbStoredFileStoreReservation.store_id == store_id,
+                                        _DbStoredFileStoreReservation.time_updated < int(time()) - lease
+                                       )
+                                  )
+
+        for ( _id, size, time_updated ) in db_query.all():
+            # Reservations renewed or released in the meantime are not matched anymore
+            db_query = connection.query(_DbStoredFileStoreReservation).filter(and_(_DbStoredFileStoreReservation.id == _id,
+                                                                                  _DbStoredFileStoreReservation.time_updated == time_updated
+                                                                                 )
+                                                                             )
+
+            if (db_query.delete(synchronize_session = False) > 0):
+                StoreUsage._decrease_reserved_size(connection, store_id, size)
+                _return += size
+            #
+        #
+
+        if (_return > 0):
+            LogLine.info("pas.file_store.StoreUsage released {0:d} bytes of expired reservations of file store '{1}'",
+                         _return,
+                         store_id,
+                         context = "pas_file_store"
+                        )
+        #
+
+        return _return
+    #
+
+    @staticmethod
+    def get(connection, store_id):
+        """
+Returns the usage of the file store. It is calculated if not done before.
+
+:param connection: Database connection
+:param store_id: File store ID
+
+:return: (dict) Dictionary with "size", "size_reserved", "entries" and
+         "time_reconciled"
+:since:  v0.2.00
+        """
+
+        db_instance = connection.query(_DbStoredFileStoreUsage).get(store_id)
+
+        return (StoreUsage.reconcile(connection, store_id)
+                if (db_instance is None) else
+                { "size": db_instance.size,
+                  "size_reserved": db_instance.size_reserved,
+                  "entries": db_instance.entries,
+                  "time_reconciled": db_instance.time_reconciled
+                }
+               )
+    #
+
+    @staticmethod
+    def reconcile(connection, store_id):
+        """
+Recalculates the size and number of entries of the file store from its
+entries. Reservations of pending writes are kept and expired separately.
+
+:param connection: Database connection
+:param store_id: File store ID
+
+:return: (dict) Dictionary with "size", "size_reserved", "entries" and
+         "time_reconciled"
+:since:  v0.2.00
+        """
+
+        db_query = connection.query(coalesce(sql_sum(_DbStoredFile.size), 0), sql_count(_DbStoredFile.id))
+        ( size, entries ) = db_query.filter(_DbStoredFile.store_id == store_id).one()
+
+        size = int(size)
+        time_reconciled = int(time())
+
+        db_instance = connection.query(_DbStoredFileStoreUsage).get(store_id)
+
+        if (db_instance is None):
+            db_instance = _DbStoredFileStoreUsage(store_id = store_id, size_reserved = 0)
+            connection.add(db_instance)
+        elif (db_instance.size != size or db_instance.entries != entries):
+            LogLine.info("pas.file_store.StoreUsage corrected drift of file store '{0}' by {1:d} bytes and {2:d} entries",
+                         store_id,
+                         size - db_instance.size,
+                         entries - db_instance.entries,
+                         context = "pas_file_store"
+                        )
+        #
+
+        # "size_reserved" is left unchanged to not overwrite concurrent reservations
+        db_instance.size = size
+        db_instance.entries = entries
+        db_instance.time_reconciled = time_reconciled
+
+        return { "size": size, "size_reserved": db_instance.size_reserved, "entries": entries, "time_reconciled": time_reconciled }
+    #
+
+    @staticmethod
+    def release(connection, store_id, reservation_id):
+        """
+Releases the space reserved with the given reservation ID. Nothing is done
+if the reservation has been expired already.
+
+:param connection: Database connection
+:param store_id: File store ID
+:param reservation_id: Reservation ID
+
+:since: v0.2.00
+        """
+
+        with connection.no_autoflush:
+            db_query = connection.query(_DbStoredFileStoreReservation).filter(_DbStoredFileStoreReservation.id == reservation_id)
+            size = db_query.with_entities(_DbStoredFileStoreReservation.size).scalar()
+
+            if (size is not None and db_query.delete(synchronize_session = False) > 0):
+                StoreUsage._decrease_reserved_size(connection, store_id, size)
+            #
+        #
+    #
+
+    @staticmethod
+    def reserve(connection, store_id, reservation_id, size, size_max):
+        """
+Reserves the given number of bytes if the file store stays within the size
+limit given. The check and the reservation are done with one atomic
+database statement. The reservation with the given ID is increased and its
+lease renewed.
+
+:param connection: Database connection
+:param store_id: File store ID
+:param reservation_id: Reservation ID
+:param size: Number of bytes to be reserved
+:param size_max: Maximum size of the file store
+
+:return: (bool) True if reserved
+:since:  v0.2.00
+        """
+
+        db_query = connection.query(_DbStoredFileStoreUsage)
+
+        db_query = db_query.filter(and_(_DbStoredFileStoreUsage.store_id == store_id,
+                                        _DbStoredFileStoreUsage.size + _DbStoredFileStoreUsage.size_reserved + size <= size_max
+                                       )
+                                  )
+
+        values = { _DbStoredFileStoreUsage.size_reserved: _DbStoredFileStoreUsage.size_reserved + size }
+
+        with connection.no_autoflush: _return = (db_query.update(values, synchronize_session = False) > 0)
+
+        # The usage is calculated and flushed before the statement is repeated if not done before
+        if ((not _return) and connection.query(_DbStoredFileStoreUsage).get(store_id) is None):
+            StoreUsage.reconcile(connection, store_id)
+            _return = (db_query.update(values, synchronize_session = False) > 0)
+        #
+
+        if (_return):
+            with connection.no_autoflush:
+                timestamp = int(time())
+                db_query = connection.query(_DbStoredFileStoreReservation).filter(_DbStoredFileStoreReservation.id == reservation_id)
+
+                if (db_query.update({ _DbStoredFileStoreReservation.size: _DbStoredFileStoreReservation.size + size,
+                                      _DbStoredFileStoreReservation.time_updated: timestamp
+                                    },
+                                    synchronize_session = False
+                                   ) < 1
+                   ):
+                    connection.add(_DbStoredFileStoreReservation(id = reservation_id,
+                                                                 store_id = store_id,
+                                                                 size = size,
+                                                                 time_updated = timestamp
+                                                                ))
+                #
+            #
+        #
+
+        return _return
+    #
+#
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+#echo(pasFileStoreVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from argparse import ArgumentParser
+from os import path
+from threading import Event, Thread
+from time import time
+import os
+
+try: import fcntl
+except ImportError: fcntl = None
+
+from dNG.data.logging.log_line import LogLine
+from dNG.data.settings import Settings
+from dNG.module.named_loader import NamedLoader
+from dNG.runtime.thread_lock import ThreadLock
+
+class Sweeper(object):
+    """
+"Sweeper" runs the maintenance of file stores in the background. A lock
+file in each file store directory ensures that only one process sweeps a
+store at a time and that the interval is kept across processes.
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: file_store
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;mpl2
+             Mozilla Public License, v. 2.0
+    """
+
+    LOCK_FILE_NAME = ".sweeper.lock"
+    """
+Name of the lock file in each file store directory
+    """
+
+    _instance = None
+    """
+Sweeper instance
+    """
+    _lock = ThreadLock()
+    """
+Thread safety lock
+    """
+
+    def __init__(self):
+        """
+Constructor __init__(Sweeper)
+
+:since: v0.2.00
+        """
+
+        self.event_stopped = Event()
+        """
+Event set to stop the background thread
+        """
+        self.interval = int(Settings.get("pas_file_store_sweep_interval", 300))
+        """
+Default number of seconds between two sweeps of the same file store
+        """
+        self.stored_file_class_names = Settings.get("pas_file_store_sweeper_stores",
+                                                    [ "dNG.data.StoredFile", "dNG.data.cache.File" ]
+                                                   )
+        """
+StoredFile class names of the file stores to be swept
+        """
+        self.thread = None
+        """
+Background thread
+        """
+        self.time_scheduled = { }
+        """
+Dictionary of StoredFile class names and the UNIX timestamp of their next
+sweep
+        """
+    #
+
+    def _get_interval(self, store_id):
+        """
+Returns the number of seconds between two sweeps of the given file store.
+
+:param store_id: File store ID
+
+:return: (int) Interval in seconds
+:since:  v0.2.00
+        """
+
+        return int(Settings.get("pas_file_store_{0}_sweep_interval".format(store_id), self.interval))
+    #
+
+    def run(self):
+        """
+Sweeps all file stores when scheduled until "stop()" is called.
+
+:since: v0.2.00
+        """
+
+        while (not self.event_stopped.is_set()):
+            timestamp = time()
+
+            for stored_file_class_name in self.stored_file_class_names:
+                if (self.time_scheduled.get(stored_file_class_name, 0) <= timestamp):
+                    try: self.sweep(stored_file_class_name)
+                    except Exception as handled_exception:
+                        self.time_scheduled[stored_file_class_name] = timestamp + self.interval
+                        LogLine.error(handled_exception, context = "pas_file_store")
+                    #
+                #
+            #
+
+            time_next = (min(self.time_scheduled.values()) if (len(self.time_scheduled) > 0) else timestamp + self.interval)
+            self.event_stopped.wait(max(1, time_next - time()))
+        #
+    #
+
+    def start(self):
+        """
+Starts sweeping file stores in a background thread.
+
+:since: v0.2.00
+        """
+
+        with Sweeper._lock:
+            if (self.thread is None):
+                self.event_stopped.clear()
+
+                self.thread = Thread(target = self.run, name = "pas_file_store.Sweeper")
+                self.thread.daemon = True
+                self.thread.start()
+            #
+        #
+    #
+
+    def stop(self):
+        """
+Stops the background thread.
+
+:since: v0.2.00
+        """
+
+        with Sweeper._lock:
+            thread = self.thread
+            self.thread = None
+        #
+
+        if (thread is not None):
+            self.event_stopped.set()
+            thread.join()
+        #
+    #
+
+    def sweep(self, stored_file_class_name, force = False):
+        """
+Sweeps the file store of the given StoredFile class if no other process
+does and if the interval since the last sweep has passed.
+
+:param stored_file_class_name: StoredFile class name
+:param force: True to ignore the interval since the last sweep
+
+:return: (bool) True if the file store has been swept
+:since:  v0.2.00
+        """
+
+        stored_file = NamedLoader.get_instance(stored_file_class_name)
+        store_id = stored_file.get_store_id()
+
+        interval = self._get_interval(store_id)
+        self.time_scheduled[stored_file_class_name] = time() + interval
+
+        stored_file._ensure_store_exists()
+        lock_file_path_name = path.join(stored_file.store_path, Sweeper.LOCK_FILE_NAME)
+
+        _return = False
+        lock_file_descriptor = os.open(lock_file_path_name, os.O_RDWR | os.O_CREAT, 0o640)
+
+        try:
+            is_locked = True
+
+            if (fcntl is not None):
+                try: fcntl.flock(lock_file_descriptor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except IOError: is_locked = False
+            #
+
+            lock_file_stat = os.fstat(lock_file_descriptor)
+
+            # An empty lock file has been created for a store never swept
+            if (is_locked
+                and (force
+                     or lock_file_stat.st_size < 1
+                     or lock_file_stat.st_mtime + interval <= time()
+                    )
+               ):
+                LogLine.debug("pas.file_store.Sweeper sweeps file store '{0}'", store_id, context = "pas_file_store")
+
+                stored_file.db_cleanup()
+
+                os.ftruncate(lock_file_descriptor, 0)
+                os.write(lock_file_descriptor, "{0:d}\n".format(int(time())).encode("ascii"))
+
+                _return = True
+            #
+        finally: os.close(lock_file_descriptor)
+
+        return _return
+    #
+
+    @staticmethod
+    def get_instance():
+        """
+Get the Sweeper singleton.
+
+:return: (object) Object on success
+:since:  v0.2.00
+        """
+
+        if (Sweeper._instance is None):
+            with Sweeper._lock:
+                # Thread safety
+                if (Sweeper._instance is None): Sweeper._instance = Sweeper()
+            #
+        #
+
+        return Sweeper._instance
+    #
+
+    @staticmethod
+    def main():
+        """
+Standalone entry point to sweep file stores once or continuously.
+
+:since: v0.2.00
+        """
+
+        parser = ArgumentParser(description = "Sweeps pas_file_store file stores")
+        parser.add_argument("--once", action = "store_true", help = "Sweep each file store once and exit")
+        parser.add_argument("--force", action = "store_true", help = "Ignore the interval since the last sweep")
+        parser.add_argument("--store", action = "append", dest = "stored_file_class_names", help = "StoredFile class name of the file store to be swept")
+        args = parser.parse_args()
+
+        sweeper = Sweeper.get_instance()
+        if (args.stored_file_class_names is not None): sweeper.stored_file_class_names = args.stored_file_class_names
+
+        if (args.once):
+            for stored_file_class_name in sweeper.stored_file_class_names: sweeper.sweep(stored_file_class_name, args.force)
+        else:
+            try: sweeper.run()
+            except KeyboardInterrupt: pass
+        #
+    #
+#
+
+if (__name__ == "__main__"): Sweeper.main()
@@ -17,11 +17,17 @@ https://www.direct-netware.de/redirect?licenses;mpl2
 #echo(__FILEPATH__)#
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
+from math import log
 from os import path
-from random import randrange
+from shutil import move
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.sql.expression import and_
-from sqlalchemy.sql.functions import sum as sql_sum
 from time import time
+from uuid import uuid4 as uuid
 import os
 import re
 
@@ -30,13 +36,24 @@ except ImportError: from urlparse import urlsplit
 
 from dNG.data.binary import Binary
 from dNG.data.file import File
-from dNG.data.settings import Settings
+from dNG.data.file_store.access_tracker import AccessTracker
+from dNG.data.file_store.hot_tier import HotTier
+from dNG.data.file_store.metadata_cache import MetadataCache
+from dNG.data.file_store.metrics import Metrics
+from dNG.data.file_store.miss_cache import MissCache
+from dNG.data.file_store.shared_cache import SharedCache
+from dNG.data.file_store.store_registry import StoreRegistry
+from dNG.data.file_store.store_usage import StoreUsage
+from dNG.data.logging.log_line import LogLine
 from dNG.database.connection import Connection
 from dNG.database.instance import Instance
 from dNG.database.instances.stored_file import StoredFile as _DbStoredFile
+from dNG.database.instances.stored_file_blob import StoredFileBlob as _DbStoredFileBlob
 from dNG.database.nothing_matched_exception import NothingMatchedException
 from dNG.database.transaction_context import TransactionContext
+from dNG.module.named_loader import NamedLoader
 from dNG.runtime.io_exception import IOException
+from dNG.runtime.thread_lock import ThreadLock
 from dNG.runtime.value_exception import ValueException
 
 class StoredFile(Instance):
@@ -52,9 +69,26 @@ class StoredFile(Instance):
              Mozilla Public License, v. 2.0
     """
 
+    BULK_LOAD_SIZE = 500
+    """
+Maximum number of values used in one "IN" condition for bulk loading
+    """
+    ROOT_SEPARATOR = ":"
+    """
+Separator between the root name and the location of files stored in an
+additional root directory
+    """
     _DB_INSTANCE_CLASS = _DbStoredFile
     """
 SQLAlchemy database instance class to initialize for new instances.
+    """
+    STORE_DEDUPLICATION = False
+    """
+Default deduplication mode for instances of this class
+    """
+    STORE_EVICTION_POLICY = "Lru"
+    """
+Default eviction policy for instances of this class
     """
     STORE_ID = "default"
     """
@@ -68,6 +102,20 @@ Default maximum size for instances of this class
     """
 Default number of characters used to create the subdirectory structure.
     """
+    STORE_SUBDIRECTORY_LEVELS = None
+    """
+Default number of characters used for each level of the subdirectory
+structure. "STORE_SUBDIRECTORY_LENGTH" is used as a single level if None.
+    """
+
+    _directories_known = set()
+    """
+Set of store subdirectory paths known to exist
+    """
+    _directories_known_max = 65536
+    """
+Maximum number of subdirectory paths cached before the set is cleared
+    """
 
     def __init__(self, db_instance = None):
         """
@@ -87,41 +135,83 @@ chmod to set when creating a new directory
         self.chmod_files = 0o640
         """
 chmod to set when creating a new file
+        """
+        self._content_hash = None
+        """
+Content hash calculated while data is written sequentially
+        """
+        self._content_hash_size = 0
+        """
+Number of bytes the content hash has been calculated for
         """
         self.db_id = None
         """
 Database ID used for reloading
+        """
+        self.deduplication = False
+        """
+True if identical content is only stored once in the file store
+        """
+        self._is_cached_content_invalidated = False
+        """
+True if cached content has been invalidated for data written since the last
+save
+        """
+        self._is_content_hash_pending = False
+        """
+True if written data has not been deduplicated yet
+        """
+        self._read_file_descriptor = None
+        """
+Read-only file descriptor shared for positional reads
+        """
+        self._read_file_descriptor_lock = ThreadLock()
+        """
+Thread safety lock for the shared read-only file descriptor
+        """
+        self._reservation_id = None
+        """
+ID of the space reservation of this entry in the file store
         """
         self.store_path = None
         """
 Store directory path
+        """
+        self.store_roots = { }
+        """
+Paths of additional root directories by root name
         """
         self.stored_file = None
         """
 Stored file instance
+        """
+        self._size_accounted = None
+        """
+Size of the entry accounted for in the file store usage; None for new
+entries
+        """
+        self._size_reserved = 0
+        """
+Number of bytes reserved in the file store for this entry to grow
+        """
+        self.store_config = None
+        """
+Resolved file store configuration
         """
         self.stored_file_path_name = None
         """
 Path and name of the stored file
         """
-        self.subdirectory_length = 0
+        self.subdirectory_levels = ( )
         """
-Number of characters used to create the subdirectory structure for a file
-store.
+Number of characters used for each level of the subdirectory structure of
+a file store.
         """
         self.umask = None
         """
 umask to set before creating a new directory or file
         """
 
-        chmod_dirs = Settings.get("pas_file_store_chmod_dirs")
-        if (chmod_dirs is not None): self.chmod_dirs = int(chmod_dirs, 8)
-
-        chmod_files = Settings.get("pas_file_store_chmod_files")
-        if (chmod_files is not None): self.chmod_files = int(chmod_files, 8)
-
-        self.umask = Settings.get("pas_file_store_umask")
-
         if (isinstance(db_instance, _DbStoredFile)): self._load_data()
         else: self._load_settings()
     #
@@ -143,13 +233,27 @@ python.org: Flush and close this stream.
 :since: v0.2.00
         """
 
-        if (self.stored_file is not None):
-            if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.close()- (#echo(__LINE__)#)", self, context = "pas_file_store")
+        if (self._read_file_descriptor is not None):
+            with self._read_file_descriptor_lock:
+                if (self._read_file_descriptor is not None):
+                    os.close(self._read_file_descriptor)
+                    self._read_file_descriptor = None
+                #
+            #
+        #
 
-            try:
-                if (self.stored_file.is_valid()): self.save()
-                self.stored_file.close()
-            finally: self.stored_file = None
+        try:
+            if (self.stored_file is not None):
+                if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.close()- (#echo(__LINE__)#)", self, context = "pas_file_store")
+
+                try:
+                    if (self.stored_file.is_valid()): self.save()
+                    self.stored_file.close()
+                finally: self.stored_file = None
+            #
+        finally:
+            # Reservations are released on save and left if the entry has not been saved
+            if (self._size_reserved > 0): self._release_reserved_size()
         #
     #
 
@@ -162,71 +266,103 @@ Creates the file store directory given.
 :since: v0.2.00
         """
 
-        if (self.umask is not None): os.umask(int(self.umask, 8))
-        is_writable = False
+        if (self.umask is not None): os.umask(self.umask)
 
-        try:
-            os.mkdir(path, self.chmod_dirs)
-            is_writable = os.access(path, os.W_OK)
+        try: os.mkdir(path, self.chmod_dirs)
         except IOError: pass
 
+        # The directory might have been created by another thread or process
+        is_writable = (os.path.isdir(path) and os.access(path, os.W_OK))
+
         if (not is_writable): raise IOException("Failed to create file store directory '{0}'".format(path))
     #
 
     def db_cleanup(self):
         """
-Cleans up the file store directory.
+Cleans up the file store directory. Expired entries are removed first
+before entries are evicted if the file store exceeds its size limit.
 
-:since: v0.2.00
+:return: (dict) Dictionary with the number of "entries_expired" and
+         "entries_evicted" as well as "bytes_reclaimed" from disk
+:since:  v0.2.00
         """
 
         if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.db_cleanup()- (#echo(__LINE__)#)", self, context = "pas_file_store")
 
+        # Eviction is based on the last access times written to the database
+        AccessTracker.get_instance().flush()
+
+        _return = { "entries_expired": 0, "entries_evicted": 0, "bytes_reclaimed": 0 }
+        time_started = time()
+
         with Connection.get_instance() as connection:
             store_id = self.get_store_id()
 
-            delete_condition = and_(_DbStoredFile.store_id == store_id,
-                                    _DbStoredFile.timeout > 0,
-                                    _DbStoredFile.timeout < int(time())
-                                   )
+            db_query = connection.query(_DbStoredFile.id, _DbStoredFile.file_location, _DbStoredFile.size)
 
-            entries_deleted = connection.query(_DbStoredFile).filter(delete_condition).delete()
+            db_query = db_query.filter(and_(_DbStoredFile.store_id == store_id,
+                                            _DbStoredFile.timeout > 0,
+                                            _DbStoredFile.timeout < int(time())
+                                           )
+                                      )
 
-            store_max_mb_size = int(Settings.get("pas_file_store_{0}_max_mb_size".format(store_id), self.__class__.STORE_SIZE_MB_MAX))
-            store_max_size = ((store_max_mb_size * 1048576) if (store_max_mb_size > 0) else -1)
+            db_query = db_query.order_by(_DbStoredFile.id.asc())
+            last_id = None
 
-            if (store_max_size > 0):
-                size_used = connection.query(sql_sum(_DbStoredFile.size)).filter(_DbStoredFile.store_id == store_id).scalar()
+            # Keyset pagination does not select entries failed to be deleted again
+            while (True):
+                with TransactionContext():
+                    entries = (db_query if (last_id is None) else db_query.filter(_DbStoredFile.id > last_id)).limit(StoredFile.BULK_LOAD_SIZE).all()
+                #
 
-                if (size_used is not None and size_used > store_max_size):
-                    db_query = connection.query(_DbStoredFile).filter(_DbStoredFile.store_id == store_id)
-                    db_query = db_query.order_by(_DbStoredFile.time_last_accessed.asc())
-                    db_query = db_query.limit(100)
+                if (len(entries) < 1): break
+                last_id = entries[-1][0]
 
-                    size_to_be_deleted = (size_used - store_max_size)
+                ( entries_deleted, bytes_reclaimed ) = self._delete_entries(connection, store_id, entries)
 
-                    while (size_to_be_deleted > 0):
-                        loop_entries_deleted = 0
+                _return['entries_expired'] += entries_deleted
+                _return['bytes_reclaimed'] += bytes_reclaimed
+            #
 
-                        with TransactionContext():
-                            for cached_file in StoredFile.iterator(_DbStoredFile, connection.execute(db_query)):
-                                try:
-                                    size_to_be_deleted -= cached_file.get_size()
-                                    if (cached_file.delete()): loop_entries_deleted += 1
-                                except Exception as handled_exception:
-                                    if (self.log_handler is not None): self.log_handler.error(handled_exception, context = "pas_file_store")
-                                #
-                            #
-                        #
+            with TransactionContext():
+                StoreUsage.expire_reservations(connection, store_id, self.store_config.reservation_lease)
+                store_usage = StoreUsage.get(connection, store_id)
 
-                        if (loop_entries_deleted == 0): break
-                        entries_deleted += loop_entries_deleted
-                    #
+                if (int(time()) - store_usage['time_reconciled'] > self.store_config.usage_reconcile_interval):
+                    store_usage = StoreUsage.reconcile(connection, store_id)
                 #
             #
 
-            if (entries_deleted > 0): connection.optimize_random(_DbStoredFile)
+            store_max_size = self.store_config.size_max
+
+            if (store_max_size > 0 and store_usage['size'] > store_max_size):
+                ( _return['entries_evicted'], bytes_reclaimed ) = self._evict_entries(connection, store_id, store_usage['size'] - store_max_size)
+                _return['bytes_reclaimed'] += bytes_reclaimed
+            #
+
+            if (_return['entries_expired'] > 0 or _return['entries_evicted'] > 0):
+                MetadataCache.get_instance().clear()
+                connection.optimize_random(_DbStoredFile)
+
+                LogLine.info("pas.file_store.StoredFile removed {0:d} expired and {1:d} evicted entries of file store '{2}' reclaiming {3:d} bytes",
+                             _return['entries_expired'],
+                             _return['entries_evicted'],
+                             store_id,
+                             _return['bytes_reclaimed'],
+                             context = "pas_file_store"
+                            )
+            #
+        #
+
+        metrics = Metrics.get_instance()
+
+        if (metrics.enabled):
+            metrics.observe("pas_file_store_cleanup_seconds", time() - time_started, store = store_id)
+            metrics.increment("pas_file_store_entries_expired_total", _return['entries_expired'], store = store_id)
+            metrics.increment("pas_file_store_entries_evicted_total", _return['entries_evicted'], store = store_id)
         #
+
+        return _return
     #
 
     def delete(self):
@@ -242,34 +378,172 @@ Deletes this entry from the database.
         if (self.store_path is None): raise IOException("Invalid file instance state for deletion")
 
         with self:
-            stored_file_path_name = path.join(self.store_path, self.local.db_instance.file_location)
+            file_location = self.local.db_instance.file_location
+            size = self.local.db_instance.size
+            store_id = self.get_store_id()
+            stored_file_path_name = self._get_file_path_name(file_location)
+
+            StoredFile._invalidate_cached_content([ self.local.db_instance.id ])
+            MetadataCache.get_instance().invalidate_id(self.local.db_instance.id)
+
+            with TransactionContext():
+                _return = Instance.delete(self)
+
+                if (_return):
+                    StoreUsage.add(self.local.connection, store_id, -(0 if (size is None) else size), -1)
+
+                    if ((not self.deduplication)
+                        or StoredFile._delete_blob_reference(self.local.connection, store_id, file_location)
+                       ): self._unlink_stored_file(stored_file_path_name)
+                #
+            #
+        #
+
+        return _return
+    #
+
+    def _delete_entries(self, connection, store_id, entries):
+        """
+Deletes the given entries in one transaction and unlinks their files in
+parallel afterwards.
+
+:param connection: Database connection
+:param store_id: File store ID
+:param entries: List of StoredFile ID, file location and size tuples
+
+:return: (tuple) Number of entries deleted and bytes reclaimed from disk
+:since:  v0.2.00
+        """
+
+        entries_deleted = 0
+        file_path_names = [ ]
+
+        try:
+            with TransactionContext(): ( entries_deleted, file_path_names ) = self._delete_entry_rows(connection, store_id, entries)
+        except Exception as handled_exception:
+            if (self.log_handler is not None): self.log_handler.error(handled_exception, context = "pas_file_store")
+        #
+
+        return ( entries_deleted, self._unlink_stored_files(file_path_names) )
+    #
+
+    def _delete_entry_rows(self, connection, store_id, entries):
+        """
+Deletes the given entries with one database statement. Files to be
+unlinked are returned to be removed after the transaction has been
+committed.
+
+:param connection: Database connection
+:param store_id: File store ID
+:param entries: List of StoredFile ID, file location and size tuples
 
-            _return = Instance.delete(self)
+:return: (tuple) Number of entries deleted and list of file path names to
+         be unlinked
+:since:  v0.2.00
+        """
+
+        file_path_names = [ ]
+        metadata_cache = MetadataCache.get_instance()
+
+        with connection.no_autoflush:
+            entries_deleted = connection.query(_DbStoredFile).filter(_DbStoredFile.id.in_([ entry[0] for entry in entries ])).delete(synchronize_session = False)
+
+            StoreUsage.add(connection,
+                           store_id,
+                           -sum((0 if (entry[2] is None) else entry[2]) for entry in entries),
+                           -entries_deleted
+                          )
+
+            StoredFile._invalidate_cached_content([ entry[0] for entry in entries ])
+
+            for ( _id, file_location, _ ) in entries:
+                metadata_cache.invalidate_id(_id)
+
+                if ((not self.deduplication)
+                    or StoredFile._delete_blob_reference(connection, store_id, file_location)
+                   ): file_path_names.append(self._get_file_path_name(file_location))
+            #
+        #
+
+        return ( entries_deleted, file_path_names )
+    #
+
+    def _delete_replaced_entries(self):
+        """
+Deletes other entries of the file store with the resource of this instance.
+A resource is unique in each file store.
+
+:return: (list) List of file path names to be unlinked
+:since:  v0.2.00
+        """
+
+        _return = [ ]
+        resource_hash = self.local.db_instance.resource_hash
+
+        if (resource_hash is not None):
+            connection = self.local.connection
+            store_id = self.get_store_id()
 
-            if (_return and path.exists(stored_file_path_name)):
-                os.unlink(stored_file_path_name)
-                if (self.log_handler is not None): self.log_handler.debug("{0!r} deleted file '{1}'", self, stored_file_path_name, context = "pas_file_store")
+            with connection.no_autoflush:
+                db_query = connection.query(_DbStoredFile.id, _DbStoredFile.file_location, _DbStoredFile.size)
+
+                db_query = db_query.filter(and_(_DbStoredFile.store_id == store_id,
+                                                _DbStoredFile.resource_hash == resource_hash,
+                                                _DbStoredFile.id != self.local.db_instance.id
+                                               )
+                                          )
+
+                entries = db_query.all()
             #
+
+            if (len(entries) > 0): ( _, _return ) = self._delete_entry_rows(connection, store_id, entries)
         #
 
         return _return
     #
 
+    def _discard_new_stored_file(self):
+        """
+Removes the file written for a new entry rejected by the file store size
+limit.
+
+:since: v0.2.00
+        """
+
+        if (self.stored_file is not None):
+            self.stored_file.close()
+            self.stored_file = None
+        #
+
+        if (self.stored_file_path_name is not None):
+            self._unlink_stored_file(self.stored_file_path_name)
+            self.stored_file_path_name = None
+        #
+
+        self.local.db_instance.file_location = None
+        self.local.db_instance.size = None
+
+        self._content_hash = None
+        self._is_content_hash_pending = False
+    #
+
     def _ensure_store_exists(self):
         """
-Checks and creates the file store directory.
+Checks and creates the file store directory and all additional root
+directories.
 
 :since: v0.2.00
         """
 
         if (self.store_path is None): raise IOException("Invalid file instance state for file store access")
-        if ((not Settings.get("pas_database_auto_maintenance", False)) and randrange(0, 30) < 1): self.db_cleanup()
 
-        if (path.exists(self.store_path)):
-            if ((not path.isdir(self.store_path))
-                or (not os.access(self.store_path, os.W_OK))
-               ): raise IOException("File store directory '{0}' not writable".format(self.store_path))
-        else: self._create_writable_directory(self.store_path)
+        for ( _, root_path, _ ) in self.store_config.roots:
+            if (path.exists(root_path)):
+                if ((not path.isdir(root_path))
+                    or (not os.access(root_path, os.W_OK))
+                   ): raise IOException("File store directory '{0}' not writable".format(root_path))
+            else: self._create_writable_directory(root_path)
+        #
     #
 
     def _ensure_stored_file_instance(self):
@@ -302,20 +576,35 @@ Checks or creates a new instance for the stored file.
 
                 file_location = file_name
 
-                if (self.subdirectory_length > 0):
-                    subdirectory_name = file_name[:self.subdirectory_length]
-                    file_name = (file_name[self.subdirectory_length:] if (self.subdirectory_length < 32) else file_name[33:])
+                if (len(self.subdirectory_levels) > 0):
+                    ( subdirectory_location, file_name ) = self._get_subdirectory_location(file_name)
+
+                    # The resource ID is separated by "_" from the file name if used completely
+                    if (file_name.startswith("_")): file_name = file_name[1:]
+
+                    file_location = "{0}/{1}".format(subdirectory_location, file_name)
+                #
 
-                    subdirectory_path_name = path.join(self.store_path, subdirectory_name)
-                    if (not path.exists(subdirectory_path_name)): self._create_writable_directory(subdirectory_path_name)
+                root_name = self._get_root_name(resource_id)
 
-                    file_location = "{0}/{1}".format(subdirectory_name, file_name)
+                if (root_name != ""):
+                    file_location = "{0}{1}{2}".format(root_name, StoredFile.ROOT_SEPARATOR, file_location)
+                    subdirectory_location = path.dirname(file_location)
                 #
 
-                file_path_name = path.join(self.store_path, path.normpath(file_location))
+                if (len(self.subdirectory_levels) > 0): self._ensure_subdirectory_exists(subdirectory_location)
+
+                file_path_name = self._get_file_path_name(file_location)
 
                 self.stored_file = File()
-                if (not self.stored_file.open(file_path_name, file_mode = "w+b")): raise IOException("Failed to create stored file instance")
+
+                if (not self.stored_file.open(file_path_name, file_mode = "w+b")):
+                    # Cached subdirectories might have been removed externally
+                    if (len(self.subdirectory_levels) > 0):
+                        self._ensure_subdirectory_exists(subdirectory_location, True)
+                        if (not self.stored_file.open(file_path_name, file_mode = "w+b")): raise IOException("Failed to create stored file instance")
+                    else: raise IOException("Failed to create stored file instance")
+                #
 
                 self.stored_file_path_name = file_path_name
                 self.set_data_attributes(file_location = file_location)
@@ -324,184 +613,538 @@ Checks or creates a new instance for the stored file.
             file_path_name = path.join(self.store_path, self.stored_file_path_name)
 
             self.stored_file = File()
-            if (not self.stored_file.open(file_path_name, file_mode = "r+b")): raise IOException("Failed to open stored file instance")
+
+            # Deduplicated content might be referenced by other entries
+            file_mode = ("rb" if (self.deduplication) else "r+b")
+
+            if ((not self.stored_file.open(file_path_name, file_mode = file_mode))
+                and ((not self._reload_file_location())
+                     or (not self.stored_file.open(self.stored_file_path_name, file_mode = file_mode))
+                    )
+               ): raise IOException("Failed to open stored file instance")
         #
     #
 
-    def flush(self):
+    def _ensure_subdirectory_exists(self, subdirectory_location, revalidate = False):
         """
-python.org: Flush the write buffers of the stream if applicable.
+Checks and creates each level of the given store subdirectory. Paths known
+to exist are cached to avoid checking them for each new file.
+
+:param subdirectory_location: Subdirectory location relative to the store
+                              including the root name if applicable
+:param revalidate: True to check cached paths again
 
 :since: v0.2.00
         """
 
-        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.flush()- (#echo(__LINE__)#)", self, context = "pas_file_store")
+        ( subdirectory_path_name, subdirectory_location ) = self._split_file_location(subdirectory_location)
 
-        if (self.stored_file is not None): self.stored_file.flush()
+        for subdirectory_name in subdirectory_location.split("/"):
+            subdirectory_path_name = path.join(subdirectory_path_name, subdirectory_name)
+
+            if (revalidate): StoredFile._directories_known.discard(subdirectory_path_name)
+
+            if (subdirectory_path_name not in StoredFile._directories_known):
+                if (not path.isdir(subdirectory_path_name)): self._create_writable_directory(subdirectory_path_name)
+
+                if (len(StoredFile._directories_known) >= StoredFile._directories_known_max): StoredFile._directories_known.clear()
+                StoredFile._directories_known.add(subdirectory_path_name)
+            #
+        #
     #
 
-    def get_path_name(self):
+    def _evict_entries(self, connection, store_id, size, excluded_id = None):
         """
-Returns the path and name of the stored file.
+Evicts entries in the order of the configured eviction policy until at
+least the given number of bytes has been freed.
 
-:return: (str) Path and name of the stored file
+:param connection: Database connection
+:param store_id: File store ID
+:param size: Number of bytes to be freed
+:param excluded_id: StoredFile ID not to be evicted
+
+:return: (tuple) Number of entries evicted and bytes reclaimed from disk
 :since:  v0.2.00
         """
 
-        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.get_path_name()- (#echo(__LINE__)#)", self, context = "pas_file_store")
+        entries_evicted = 0
+        bytes_reclaimed = 0
 
-        self._ensure_stored_file_instance()
-        return path.abspath(path.join(self.store_path, self.stored_file_path_name))
-    #
+        eviction_policy = self._get_eviction_policy()
+        size_to_be_deleted = size
 
-    get_id = Instance._wrap_getter("id")
-    """
-Returns the stored file ID.
+        db_query = connection.query(_DbStoredFile.id, _DbStoredFile.file_location, _DbStoredFile.size)
+        db_query = db_query.filter(_DbStoredFile.store_id == store_id)
+        if (excluded_id is not None): db_query = db_query.filter(_DbStoredFile.id != excluded_id)
+        db_query = db_query.order_by(*eviction_policy.get_order_by())
+        db_query = db_query.limit(StoredFile.BULK_LOAD_SIZE)
 
-:return: (str) Stored file ID
-:since:  v0.2.00
-    """
+        while (size_to_be_deleted > 0):
+            entries = [ ]
 
-    get_resource = Instance._wrap_getter("resource")
-    """
-Returns the stored file resource.
+            with TransactionContext(), connection.no_autoflush:
+                for entry in db_query.all():
+                    entries.append(entry)
+                    size_to_be_deleted -= (0 if (entry[2] is None) else entry[2])
 
-:return: (str) Stored file resource
-:since:  v0.2.00
-    """
+                    if (size_to_be_deleted <= 0): break
+                #
+            #
 
-    def get_size(self):
-        """
-Returns the stored file resource size.
+            if (len(entries) < 1): break
+            ( entries_deleted, entries_bytes_reclaimed ) = self._delete_entries(connection, store_id, entries)
 
-:return: (int) Stored file resource size
-:since:  v0.2.00
-        """
+            entries_evicted += entries_deleted
+            bytes_reclaimed += entries_bytes_reclaimed
 
-        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.get_size()- (#echo(__LINE__)#)", self, context = "pas_file_store")
+            # Entries failed to be deleted would be selected again
+            if (entries_deleted < 1): break
+        #
 
-        return (self.get_data_attributes("size")['size']
-                if (self.stored_file is None) else
-                self.stored_file.get_size()
-               )
+        with TransactionContext(): eviction_policy.on_evicted(connection, store_id)
+
+        return ( entries_evicted, bytes_reclaimed )
     #
 
-    def get_store_id(self):
+    def flush(self):
         """
-Returns the file store ID.
+python.org: Flush the write buffers of the stream if applicable.
 
-:return: (str) File store ID
-:since:  v0.2.00
+:since: v0.2.00
         """
 
-        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.get_store_id()- (#echo(__LINE__)#)", self, context = "pas_file_store")
-
-        _return = self.get_data_attributes("store_id")['store_id']
-        if (_return is None or _return == ""): _return = self.__class__.STORE_ID
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.flush()- (#echo(__LINE__)#)", self, context = "pas_file_store")
 
-        return _return
+        if (self.stored_file is not None): self.stored_file.flush()
     #
 
-    def get_vfs_url(self):
+    def _get_content_hash(self, file_path_name):
         """
-Returns the VFS URL of this instance.
+Calculates the content hash of the given file.
 
-:return: (str) Stored file VFS URL; None if undefined
+:param file_path_name: Path and name of the file
+
+:return: (str) Content hash
 :since:  v0.2.00
         """
 
-        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.get_vfs_url()- (#echo(__LINE__)#)", self, context = "pas_file_store")
+        _return = sha256()
+
+        _file = File()
+        if (not _file.open(file_path_name, file_mode = "rb")): raise IOException("Failed to open stored file instance")
+
+        try:
+            data = _file.read(65536)
 
-        return "x-file-store:///{0}".format(self.get_id())
+            while (data is not None and len(data) > 0):
+                _return.update(data)
+                data = _file.read(65536)
+            #
+        finally: _file.close()
+
+        return _return.hexdigest()
     #
 
-    def is_eof(self):
+    def _get_deduplicated_file_location(self, content_hash, root_name = ""):
         """
-Checks if the pointer is at EOF.
+Returns the file location for deduplicated content. The subdirectory is
+created if required.
 
-:return: (bool) True if EOF
+:param content_hash: Content hash
+:param root_name: Name of the root directory
+
+:return: (str) File location
 :since:  v0.2.00
         """
 
-        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.is_eof()- (#echo(__LINE__)#)", self, context = "pas_file_store")
+        _return = content_hash
 
-        self._ensure_stored_file_instance()
-        return self.stored_file.is_eof()
+        if (len(self.subdirectory_levels) > 0):
+            ( subdirectory_location, file_name ) = self._get_subdirectory_location(content_hash)
+            _return = "{0}/{1}".format(subdirectory_location, file_name)
+        #
+
+        if (root_name != ""): _return = "{0}{1}{2}".format(root_name, StoredFile.ROOT_SEPARATOR, _return)
+        if (len(self.subdirectory_levels) > 0): self._ensure_subdirectory_exists(path.dirname(_return))
+
+        return _return
     #
 
-    def is_up_to_date(self, timestamp):
+    def _get_eviction_policy(self):
         """
-Checks if the stored version timestamp is the same or newer than the given
-one.
+Returns the eviction policy configured for the file store.
 
-:param timestamp: External timestamp to compare with
-
-:return: (bool) True if up-to-date
+:return: (object) Eviction policy instance
 :since:  v0.2.00
         """
 
-        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.is_up_to_date()- (#echo(__LINE__)#)", self, context = "pas_file_store")
-
-        with self: return (self.local.db_instance.time_stored >= timestamp)
+        return NamedLoader.get_instance("dNG.data.file_store.eviction.{0}".format(self.store_config.eviction_policy))
     #
 
-    def is_valid(self):
+    def _get_file_path_name(self, file_location):
         """
-Returns true if the stored file instance is valid.
+Returns the path and name of the given file location.
 
-:return: (bool) True if valid
+:param file_location: File location relative to the store including the
+                      root name if applicable
+
+:return: (str) Path and name
 :since:  v0.2.00
         """
 
-        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.is_valid()- (#echo(__LINE__)#)", self, context = "pas_file_store")
-
-        with self:
-            return (self.local.db_instance.timeout is None
-                    or self.local.db_instance.timeout >= int(time())
-                    and (self.stored_file is None
-                         or self.stored_file.is_valid()
-                        )
-                   )
-        #
+        ( root_path, file_location ) = self._split_file_location(file_location)
+        return path.join(root_path, path.normpath(file_location))
     #
 
-    def _load_data(self):
+    def get_file_descriptor(self):
         """
-Loads the StoredFile instance and populates variables.
+Returns a new read-only file descriptor for the stored file together with
+the offset and length of its content. The caller is responsible to close the
+file descriptor with "os.close()".
 
-:since: v0.2.00
+:return: (tuple) File descriptor, offset and length
+:since:  v0.2.00
         """
 
-        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}._load_data()- (#echo(__LINE__)#)", self, context = "pas_file_store")
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.get_file_descriptor()- (#echo(__LINE__)#)", self, context = "pas_file_store")
 
-        with self:
-            self.db_id = self.local.db_instance.id
-            self.local.db_instance.time_last_accessed = time()
+        if (self.stored_file is not None): self.stored_file.flush()
 
-            self._load_settings()
+        file_descriptor = self._open_read_file_descriptor()
 
-            self.stored_file_path_name = path.join(self.store_path,
-                                                   path.normpath(self.get_data_attributes("file_location")['file_location'])
-                                                  )
+        try: size = os.fstat(file_descriptor).st_size
+        except OSError:
+            os.close(file_descriptor)
+            raise
         #
+
+        if (self.db_id is not None): AccessTracker.get_instance().record(self.db_id)
+
+        return ( file_descriptor, 0, size )
     #
 
-    def _load_settings(self):
+    def _get_read_file_descriptor(self):
+        """
+Returns the read-only file descriptor shared for positional reads. The
+access is recorded once when the file descriptor is opened.
+
+:return: (int) File descriptor
+:since:  v0.2.00
+        """
+
+        if (self._read_file_descriptor is None):
+            with self._read_file_descriptor_lock:
+                # Thread safety
+                if (self._read_file_descriptor is None):
+                    self._read_file_descriptor = self._open_read_file_descriptor()
+                    if (self.db_id is not None): AccessTracker.get_instance().record(self.db_id)
+                #
+            #
+        #
+
+        if (self.stored_file is not None): self.stored_file.flush()
+
+        return self._read_file_descriptor
+    #
+
+    def _get_metadata(self):
+        """
+Returns the metadata of this instance cached for resource lookups.
+
+:return: (dict) Metadata
+:since:  v0.2.00
+        """
+
+        with self:
+            return { "id": self.local.db_instance.id,
+                     "store_id": self.local.db_instance.store_id,
+                     "file_location": self.local.db_instance.file_location,
+                     "size": self.local.db_instance.size,
+                     "timeout": self.local.db_instance.timeout,
+                     "time_stored": self.local.db_instance.time_stored
+                   }
+        #
+    #
+
+    def get_path_name(self):
+        """
+Returns the path and name of the stored file.
+
+:return: (str) Path and name of the stored file
+:since:  v0.2.00
+        """
+
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.get_path_name()- (#echo(__LINE__)#)", self, context = "pas_file_store")
+
+        self._ensure_stored_file_instance()
+        return path.abspath(path.join(self.store_path, self.stored_file_path_name))
+    #
+
+    get_id = Instance._wrap_getter("id")
+    """
+Returns the stored file ID.
+
+:return: (str) Stored file ID
+:since:  v0.2.00
+    """
+
+    get_resource = Instance._wrap_getter("resource")
+    """
+Returns the stored file resource.
+
+:return: (str) Stored file resource
+:since:  v0.2.00
+    """
+
+    def _get_root_name(self, key):
+        """
+Returns the name of the root directory for new files of the given key.
+Roots are selected with weighted rendezvous hashing. Adding a root only
+places the share of new files corresponding to its weight there while
+existing files keep the root recorded in their location.
+
+:param key: Key to place, e.g. the resource ID
+
+:return: (str) Root name; empty for the file store directory
+:since:  v0.2.00
+        """
+
+        _return = ""
+
+        if (len(self.store_config.roots) > 1):
+            score_max = 0
+
+            for ( root_name, _, weight ) in self.store_config.roots:
+                key_hash = sha256("{0}{1}{2}".format(root_name, StoredFile.ROOT_SEPARATOR, key).encode("utf-8")).hexdigest()
+
+                # Map the first 52 bits to (0, 1) for the weighted score "-weight / ln(x)" without rounding to 1 as a float
+                score = -weight / log((int(key_hash[:13], 16) + 0.5) / 4503599627370496.0)
+
+                if (score > score_max):
+                    _return = root_name
+                    score_max = score
+                #
+            #
+        #
+
+        return _return
+    #
+
+    def get_size(self):
+        """
+Returns the stored file resource size.
+
+:return: (int) Stored file resource size
+:since:  v0.2.00
+        """
+
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.get_size()- (#echo(__LINE__)#)", self, context = "pas_file_store")
+
+        return (self.get_data_attributes("size")['size']
+                if (self.stored_file is None) else
+                self.stored_file.get_size()
+               )
+    #
+
+    def get_store_id(self):
+        """
+Returns the file store ID.
+
+:return: (str) File store ID
+:since:  v0.2.00
+        """
+
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.get_store_id()- (#echo(__LINE__)#)", self, context = "pas_file_store")
+
+        _return = self.get_data_attributes("store_id")['store_id']
+        if (_return is None or _return == ""): _return = self.__class__.STORE_ID
+
+        return _return
+    #
+
+    def get_store_usage(self):
+        """
+Returns the number of bytes and entries used by the file store.
+
+:return: (dict) Dictionary with "size", "size_reserved", "entries" and
+         "time_reconciled"
+:since:  v0.2.00
+        """
+
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.get_store_usage()- (#echo(__LINE__)#)", self, context = "pas_file_store")
+
+        with Connection.get_instance() as connection, TransactionContext(): return StoreUsage.get(connection, self.get_store_id())
+    #
+
+    def _get_subdirectory_location(self, name):
+        """
+Returns the subdirectory location for the given name based on the
+configured subdirectory levels.
+
+:param name: File name or content hash
+
+:return: (tuple) Subdirectory location and the remaining file name
+:since:  v0.2.00
+        """
+
+        offset = 0
+        subdirectory_names = [ ]
+
+        for subdirectory_level in self.subdirectory_levels:
+            subdirectory_names.append(name[offset:offset + subdirectory_level])
+            offset += subdirectory_level
+        #
+
+        return ( "/".join(subdirectory_names), name[offset:] )
+    #
+
+    def get_vfs_url(self):
+        """
+Returns the VFS URL of this instance.
+
+:return: (str) Stored file VFS URL; None if undefined
+:since:  v0.2.00
+        """
+
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.get_vfs_url()- (#echo(__LINE__)#)", self, context = "pas_file_store")
+
+        return StoredFile.get_vfs_url_for_id(self.get_id())
+    #
+
+    def is_eof(self):
+        """
+Checks if the pointer is at EOF.
+
+:return: (bool) True if EOF
+:since:  v0.2.00
+        """
+
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.is_eof()- (#echo(__LINE__)#)", self, context = "pas_file_store")
+
+        self._ensure_stored_file_instance()
+        return self.stored_file.is_eof()
+    #
+
+    def is_up_to_date(self, timestamp):
+        """
+Checks if the stored version timestamp is the same or newer than the given
+one.
+
+:param timestamp: External timestamp to compare with
+
+:return: (bool) True if up-to-date
+:since:  v0.2.00
+        """
+
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.is_up_to_date()- (#echo(__LINE__)#)", self, context = "pas_file_store")
+
+        with self: return (self.local.db_instance.time_stored >= timestamp)
+    #
+
+    def is_valid(self):
+        """
+Returns true if the stored file instance is valid.
+
+:return: (bool) True if valid
+:since:  v0.2.00
+        """
+
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.is_valid()- (#echo(__LINE__)#)", self, context = "pas_file_store")
+
+        with self:
+            return (self.local.db_instance.timeout is None
+                    or self.local.db_instance.timeout >= int(time())
+                    and (self.stored_file is None
+                         or self.stored_file.is_valid()
+                        )
+                   )
+        #
+    #
+
+    def _load_data(self):
+        """
+Loads the StoredFile instance and populates variables.
+
+:since: v0.2.00
+        """
+
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}._load_data()- (#echo(__LINE__)#)", self, context = "pas_file_store")
+
+        with self:
+            self.db_id = self.local.db_instance.id
+            self._size_accounted = (0 if (self.local.db_instance.size is None) else self.local.db_instance.size)
+
+            AccessTracker.get_instance().record(self.db_id)
+
+            self._load_settings()
+
+            self.stored_file_path_name = self._get_file_path_name(self.get_data_attributes("file_location")['file_location'])
+        #
+    #
+
+    def _load_settings(self):
         """
 Loads settings based on the store ID of the StoredFile instance.
 
 :since: v0.2.00
         """
 
-        store_id = self.get_store_id()
+        self.store_config = StoreRegistry.get_instance().get_config(self.get_store_id(), self.__class__)
+
+        self.chmod_dirs = self.store_config.chmod_dirs
+        self.chmod_files = self.store_config.chmod_files
+        self.deduplication = self.store_config.deduplication
+        self.store_path = self.store_config.path
+        self.store_roots = dict(( root_name, root_path ) for ( root_name, root_path, _ ) in self.store_config.roots if (root_name != ""))
+        self.subdirectory_levels = self.store_config.subdirectory_levels
+        self.umask = self.store_config.umask
+    #
+
+    def _open_read_file_descriptor(self):
+        """
+Opens a new read-only file descriptor for the stored file. The file location
+is reloaded if the file has been moved or replaced since this entry has been
+loaded.
+
+:return: (int) File descriptor
+:since:  v0.2.00
+        """
+
+        if (self.stored_file_path_name is None): self._ensure_stored_file_instance()
+
+        try: _return = os.open(path.join(self.store_path, self.stored_file_path_name), os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        except OSError:
+            if (not self._reload_file_location()): raise
+            _return = os.open(path.join(self.store_path, self.stored_file_path_name), os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        #
 
-        if (not Settings.is_defined("pas_file_store_default_path")): Settings.read_file("{0}/settings/pas_file_store.json".format(Settings.get("path_data")))
+        return _return
+    #
+
+    def _publish_shared_content(self):
+        """
+Publishes the content of small entries to the cache shared by all
+processes of the node.
+
+:since: v0.2.00
+        """
 
-        self.store_path = Settings.get("pas_file_store_{0}_path".format(store_id))
-        if (self.store_path is None): raise ValueException("File store directory has not been configured for ID '{0}'".format(store_id))
+        shared_cache = SharedCache.get_instance()
+        size = self.local.db_instance.size
 
-        self.subdirectory_length = int(Settings.get("pas_file_store_{0}_subdirectory_length".format(store_id), self.__class__.STORE_SUBDIRECTORY_LENGTH))
-        if (self.subdirectory_length > 32): raise ValueException("File store subdirectory length is invalid ID '{0}'".format(store_id))
+        if (shared_cache.is_cacheable(size) and self.store_path is not None):
+            try:
+                with open(self.get_path_name(), "rb") as stored_file: data = stored_file.read(1 + size)
+
+                # The file has been changed if its size differs
+                if (len(data) == size):
+                    metadata = self.get_data_attributes("id", "resource", "size", "timeout", "time_stored")
+                    shared_cache.set(metadata['id'], data, metadata)
+                #
+            except Exception as handled_exception:
+                if (self.log_handler is not None): self.log_handler.error(handled_exception, context = "pas_file_store")
+            #
+        #
     #
 
     def read(self, n = 0):
@@ -515,11 +1158,184 @@ python.org: Read up to n bytes from the object and return them.
 :since:  v0.2.00
         """
 
-        with self:
-            self._ensure_stored_file_instance()
-            self.set_data_attributes(time_last_accessed = time())
+        with self:
+            self._ensure_stored_file_instance()
+            AccessTracker.get_instance().record(self.local.db_instance.id)
+
+            _return = self.stored_file.read(n)
+        #
+
+        if (_return is not None): Metrics.get_instance().increment("pas_file_store_bytes_read_total", len(_return))
+        return _return
+    #
+
+    def read_range(self, offset, length):
+        """
+Reads up to the given number of bytes starting at the given offset. The
+stream position is not used or changed. Concurrent calls are safe.
+
+:param offset: Offset of the first byte to be read
+:param length: Number of bytes to be read
+
+:return: (bytes) Data; empty if the offset is at or behind EOF
+:since:  v0.2.00
+        """
+
+        _return = bytearray(length)
+        bytes_read = self.readinto_range(_return, offset)
+
+        return bytes(_return[:bytes_read])
+    #
+
+    def readinto_range(self, b, offset):
+        """
+Reads bytes starting at the given offset into the pre-allocated, writable
+bytes-like object given. The stream position is not used or changed.
+Concurrent calls are safe.
+
+:param b: Writable bytes-like object
+:param offset: Offset of the first byte to be read
+
+:return: (int) Number of bytes read
+:since:  v0.2.00
+        """
+
+        if (offset < 0): raise IOException("Byte offset given is invalid")
+
+        file_descriptor = self._get_read_file_descriptor()
+
+        buffer_view = memoryview(b)
+        length = len(buffer_view)
+
+        _return = 0
+
+        while (_return < length):
+            if (hasattr(os, "preadv")): bytes_read = os.preadv(file_descriptor, [ buffer_view[_return:] ], offset + _return)
+            else:
+                if (hasattr(os, "pread")): data = os.pread(file_descriptor, length - _return, offset + _return)
+                else:
+                    with self._read_file_descriptor_lock:
+                        os.lseek(file_descriptor, offset + _return, os.SEEK_SET)
+                        data = os.read(file_descriptor, length - _return)
+                    #
+                #
+
+                bytes_read = len(data)
+                buffer_view[_return:_return + bytes_read] = data
+            #
+
+            if (bytes_read < 1): break
+            _return += bytes_read
+        #
+
+        Metrics.get_instance().increment("pas_file_store_bytes_read_total", _return)
+        return _return
+    #
+
+    def _release_reserved_size(self):
+        """
+Releases the space reserved in the file store and not used by this entry.
+
+:since: v0.2.00
+        """
+
+        self._size_reserved = 0
+
+        try:
+            with Connection.get_instance() as connection, TransactionContext(): StoreUsage.release(connection, self.get_store_id(), self._reservation_id)
+        except Exception as handled_exception:
+            if (self.log_handler is not None): self.log_handler.error(handled_exception, context = "pas_file_store")
+        #
+    #
+
+    def _reload_file_location(self):
+        """
+Reloads the file location of this entry from the database. It might have
+been moved to a new subdirectory layout since it has been loaded.
+
+:return: (bool) True if the file location has changed
+:since:  v0.2.00
+        """
+
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}._reload_file_location()- (#echo(__LINE__)#)", self, context = "pas_file_store")
+
+        _return = False
+
+        with self:
+            if (self.local.db_instance.id is not None and self.store_path is not None):
+                db_query = self.local.connection.query(_DbStoredFile.file_location).filter(_DbStoredFile.id == self.local.db_instance.id)
+                file_location = db_query.scalar()
+
+                if (file_location is not None and file_location != self.local.db_instance.file_location):
+                    # The entry itself is unchanged and must not be flushed
+                    set_committed_value(self.local.db_instance, "file_location", file_location)
+                    self.stored_file_path_name = self._get_file_path_name(file_location)
+
+                    _return = True
+                #
+            #
+        #
+
+        return _return
+    #
+
+    def _reserve_size(self, size):
+        """
+Reserves space in the file store for this entry to grow to the given size.
+Space is reserved in chunks of the configured reservation size. Entries are
+evicted inline if the file store would exceed its size limit otherwise.
+
+:param size: Size of the entry to be admitted
+
+:since: v0.2.00
+        """
+
+        size_max = self.store_config.size_max
+        size_available = self._size_reserved + (0 if (self._size_accounted is None) else self._size_accounted)
+
+        if (size_max > 0 and size > size_available):
+            if (size > size_max): raise IOException("Stored file exceeds the size limit of the file store")
+
+            size_required = size - size_available
+            store_id = self.get_store_id()
+
+            if (self._reservation_id is None): self._reservation_id = uuid().hex
+
+            with Connection.get_instance() as connection:
+                size_reserved = max(size_required, self.store_config.reservation_size)
+                with TransactionContext(): is_reserved = StoreUsage.reserve(connection, store_id, self._reservation_id, size_reserved, size_max)
+
+                if ((not is_reserved) and size_reserved > size_required):
+                    size_reserved = size_required
+                    with TransactionContext(): is_reserved = StoreUsage.reserve(connection, store_id, self._reservation_id, size_reserved, size_max)
+                #
+
+                if (not is_reserved):
+                    with TransactionContext():
+                        # Space of writers terminated without releasing it is reclaimed before evicting entries
+                        StoreUsage.expire_reservations(connection, store_id, self.store_config.reservation_lease)
+                        store_usage = StoreUsage.get(connection, store_id)
+                    #
+
+                    size_to_be_deleted = store_usage['size'] + store_usage['size_reserved'] + size_reserved - size_max
+
+                    if (size_to_be_deleted > 0):
+                        ( entries_evicted, _ ) = self._evict_entries(connection, store_id, size_to_be_deleted, self.local.db_instance.id)
+
+                        if (self.log_handler is not None): self.log_handler.debug("{0!r} evicted {1:d} entries to reserve {2:d} bytes", self, entries_evicted, size_reserved, context = "pas_file_store")
+
+                        if (entries_evicted > 0):
+                            MetadataCache.get_instance().clear()
+                            Metrics.get_instance().increment("pas_file_store_entries_evicted_total", entries_evicted, store = store_id)
+                        #
+                    #
+
+                    with TransactionContext(): is_reserved = StoreUsage.reserve(connection, store_id, self._reservation_id, size_reserved, size_max)
+                #
+            #
 
-            return self.stored_file.read(n)
+            if (not is_reserved): raise IOException("File store '{0}' has no space left for {1:d} bytes".format(store_id, size_required))
+            self._size_reserved += size_reserved
         #
     #
 
@@ -539,12 +1355,159 @@ Saves changes of the database task instance.
                 and hasattr(self.stored_file, "flush")
                 ): self.stored_file.flush()
 
-            if (self.local.db_instance.size is None
-                and self.store_path is not None
-               ): self.local.db_instance.size = os.stat(self.get_path_name()).st_size
+            if (self.store_config.size_max > 0 and self.stored_file_path_name is not None):
+                # The file might have been written without "write()", e.g. by using its path
+                try: self._reserve_size(os.stat(self.stored_file_path_name).st_size)
+                except IOException:
+                    if (self._size_accounted is None): self._discard_new_stored_file()
+                    raise
+                #
+            #
+
+            deduplicated_file_location = None
+            is_deduplicated = self._is_content_hash_pending
+            size_accounted = self._size_accounted
+
+            try:
+                with TransactionContext():
+                    file_path_names = self._delete_replaced_entries()
+
+                    if (is_deduplicated): deduplicated_file_location = self._save_deduplicated()
+                    elif (self.local.db_instance.size is None
+                          and self.store_path is not None
+                         ): self.local.db_instance.size = os.stat(self.get_path_name()).st_size
+
+                    self._save_store_usage()
+                    Instance.save(self)
+                #
+            except IntegrityError as handled_exception:
+                # Another entry for the same resource has been saved concurrently
+                self._size_accounted = size_accounted
+
+                # Deduplicated data is still located in the written file
+                if (size_accounted is None): self._discard_new_stored_file()
+                else: self._is_content_hash_pending = is_deduplicated
+
+                raise ValueException("File resource '{0}' has been stored concurrently".format(self.local.db_instance.resource), handled_exception)
+            #
+
+            # Files are only moved or removed after the entry has been committed
+            if (deduplicated_file_location is not None): self._store_deduplicated_file(deduplicated_file_location)
+
+            self._size_reserved = 0
+            self._unlink_stored_files(file_path_names)
+
+            StoredFile._invalidate_cached_content([ self.local.db_instance.id ])
+            self._is_cached_content_invalidated = False
+
+            self._publish_shared_content()
+
+            resource = self.local.db_instance.resource
+
+            if (resource is not None):
+                metadata_cache = MetadataCache.get_instance()
+
+                metadata_cache.invalidate_id(self.local.db_instance.id)
+                metadata_cache.set(resource, self._get_metadata())
+
+                MissCache.get_instance().invalidate(resource)
+            #
+        #
+    #
+
+    def _save_store_usage(self):
+        """
+Adds the size difference of this entry to the file store usage, releases
+the space reserved for it and sets the eviction priority of new entries.
+
+:since: v0.2.00
+        """
+
+        size = (0 if (self.local.db_instance.size is None) else self.local.db_instance.size)
+        if (self._size_reserved > 0): StoreUsage.release(self.local.connection, self.get_store_id(), self._reservation_id)
+
+        if (self._size_accounted is None):
+            StoreUsage.add(self.local.connection, self.get_store_id(), size, 1)
+
+            self.local.db_instance.eviction_priority = self._get_eviction_policy().get_initial_priority(self.local.connection,
+                                                                                                         self.get_store_id(),
+                                                                                                         size
+                                                                                                        )
+        else: StoreUsage.add(self.local.connection, self.get_store_id(), size - self._size_accounted, 0)
+
+        self._size_accounted = size
+    #
+
+    def _save_deduplicated(self):
+        """
+References the content-addressed location of the written data. Content
+stored concurrently with identical data is referenced as well. The written
+file is moved by "_store_deduplicated_file()" after the transaction has been
+committed.
+
+:return: (str) Content-addressed file location
+:since:  v0.2.00
+        """
+
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}._save_deduplicated()- (#echo(__LINE__)#)", self, context = "pas_file_store")
+
+        temporary_file_path_name = self.stored_file_path_name
+
+        content_hash = (self._get_content_hash(temporary_file_path_name)
+                        if (self._content_hash is None) else
+                        self._content_hash.hexdigest()
+                       )
 
-            Instance.save(self)
+        self._content_hash = None
+        self._is_content_hash_pending = False
+
+        if (self.stored_file is not None):
+            self.stored_file.close()
+            self.stored_file = None
+        #
+
+        size = os.stat(temporary_file_path_name).st_size
+        store_id = self.get_store_id()
+        values = { _DbStoredFileBlob.reference_count: _DbStoredFileBlob.reference_count + 1 }
+
+        blob_query = self.local.connection.query(_DbStoredFileBlob).filter(and_(_DbStoredFileBlob.store_id == store_id,
+                                                                                 _DbStoredFileBlob.content_hash == content_hash
+                                                                                )
+                                                                           )
+
+        is_referenced = (blob_query.update(values, synchronize_session = False) > 0)
+
+        if (not is_referenced):
+            # New content stays in the root of the written data to be renamed
+            ( root_name, separator, _ ) = self.local.db_instance.file_location.partition(StoredFile.ROOT_SEPARATOR)
+            file_location = self._get_deduplicated_file_location(content_hash, (root_name if (separator != "") else ""))
+
+            db_blob_instance = _DbStoredFileBlob(store_id = store_id,
+                                                 content_hash = content_hash,
+                                                 time_stored = int(time()),
+                                                 size = size,
+                                                 file_location = file_location,
+                                                 reference_count = 1
+                                                )
+
+            try:
+                with self.local.connection.begin_nested(): self.local.connection.add(db_blob_instance)
+            except IntegrityError:
+                # Identical content has been stored concurrently and is referenced instead
+                is_referenced = (blob_query.update(values, synchronize_session = False) > 0)
+                if (not is_referenced): raise
+            #
         #
+
+        # Referenced content keeps the root it has been stored in first
+        if (is_referenced): file_location = blob_query.with_entities(_DbStoredFileBlob.file_location).scalar()
+
+        if (self.log_handler is not None): self.log_handler.debug("{0!r} stored deduplicated content '{1}'", self, content_hash, context = "pas_file_store")
+
+        self.local.db_instance.file_location = Binary.utf8(file_location)
+        self.local.db_instance.size = size
+
+        return file_location
     #
 
     def seek(self, offset):
@@ -561,6 +1524,51 @@ python.org: Change the stream position to the given byte offset.
         return self.stored_file.seek(offset)
     #
 
+    def sendfile(self, socket, offset = 0, count = None):
+        """
+Sends the given byte range of the stored file to the socket without copying
+it through userspace buffers if "os.sendfile()" is available. The socket
+must be in blocking mode.
+
+:param socket: Socket (or its file descriptor if "os.sendfile()" is
+               available)
+:param offset: Offset of the first byte to be sent
+:param count: Number of bytes to be sent (None means until EOF)
+
+:return: (int) Number of bytes sent
+:since:  v0.2.00
+        """
+
+        if (self.log_handler is not None): self.log_handler.debug("#echo(__FILEPATH__)# -{0!r}.sendfile({1:d})- (#echo(__LINE__)#)", self, offset, context = "pas_file_store")
+
+        ( file_descriptor, file_offset, size ) = self.get_file_descriptor()
+
+        try:
+            if (offset < 0 or offset > size): raise IOException("Byte range given is invalid")
+            if (count is None or offset + count > size): count = size - offset
+
+            _return = 0
+            socket_fd = (socket.fileno() if (hasattr(socket, "fileno")) else socket)
+
+            while (_return < count):
+                if (hasattr(os, "sendfile")): bytes_sent = os.sendfile(socket_fd, file_descriptor, file_offset + offset + _return, count - _return)
+                else:
+                    os.lseek(file_descriptor, file_offset + offset + _return, os.SEEK_SET)
+                    data = os.read(file_descriptor, min(65536, count - _return))
+
+                    bytes_sent = len(data)
+                    if (bytes_sent > 0): socket.sendall(data)
+                #
+
+                if (bytes_sent < 1): break
+                _return += bytes_sent
+            #
+        finally: os.close(file_descriptor)
+
+        Metrics.get_instance().increment("pas_file_store_bytes_read_total", _return)
+        return _return
+    #
+
     def set_data_attributes(self, **kwargs):
         """
 Sets values given as keyword arguments to this method.
@@ -599,6 +1607,101 @@ Sets the stored file resource.
 :since: v0.2.00
     """
 
+    def _unlink_stored_file(self, file_path_name):
+        """
+Unlinks the stored file given.
+
+:param file_path_name: Path and name of the stored file
+
+:return: (int) Number of bytes reclaimed
+:since:  v0.2.00
+        """
+
+        _return = 0
+
+        if (path.exists(file_path_name)):
+            _return = os.stat(file_path_name).st_size
+            os.unlink(file_path_name)
+
+            if (self.log_handler is not None): self.log_handler.debug("{0!r} deleted file '{1}'", self, file_path_name, context = "pas_file_store")
+        #
+
+        return _return
+    #
+
+    def _unlink_stored_files(self, file_path_names):
+        """
+Unlinks the stored files given in parallel using a bounded number of
+threads.
+
+:param file_path_names: List of paths and names of stored files
+
+:return: (int) Number of bytes reclaimed
+:since:  v0.2.00
+        """
+
+        _return = 0
+
+        if (len(file_path_names) < 2):
+            for file_path_name in file_path_names: _return += self._unlink_stored_file(file_path_name)
+        else:
+            with ThreadPoolExecutor(max_workers = min(self.store_config.unlink_workers, len(file_path_names))) as executor:
+                for future in [ executor.submit(self._unlink_stored_file, file_path_name) for file_path_name in file_path_names ]:
+                    try: _return += future.result()
+                    except Exception as handled_exception:
+                        if (self.log_handler is not None): self.log_handler.error(handled_exception, context = "pas_file_store")
+                    #
+                #
+            #
+        #
+
+        return _return
+    #
+
+    def _split_file_location(self, file_location):
+        """
+Returns the root directory path and the location relative to it for the
+given file location.
+
+:param file_location: File location relative to the store including the
+                      root name if applicable
+
+:return: (tuple) Root directory path and location relative to it
+:since:  v0.2.00
+        """
+
+        ( root_name, separator, root_file_location ) = file_location.partition(StoredFile.ROOT_SEPARATOR)
+        if (separator == ""): return ( self.store_path, file_location )
+
+        root_path = self.store_roots.get(root_name)
+        if (root_path is None): raise IOException("File store root '{0}' has not been configured".format(root_name))
+
+        return ( root_path, root_file_location )
+    #
+
+    def _store_deduplicated_file(self, file_location):
+        """
+Moves the written data to the given content-addressed location. It is
+removed instead if identical content exists there already.
+
+:param file_location: Content-addressed file location
+
+:since: v0.2.00
+        """
+
+        file_path_name = self._get_file_path_name(file_location)
+
+        if (path.exists(file_path_name)): os.unlink(self.stored_file_path_name)
+        else:
+            if (path.dirname(file_location) != ""): self._ensure_subdirectory_exists(path.dirname(file_location))
+
+            # The referenced content might be located in another root
+            move(self.stored_file_path_name, file_path_name)
+        #
+
+        self.stored_file_path_name = file_path_name
+    #
+
     def tell(self):
         """
 python.org: Return the current stream position as an opaque number.
@@ -624,10 +1727,111 @@ raw stream and return the number of bytes written.
 
         with self:
             self._ensure_stored_file_instance()
+
+            try: self._reserve_size(self.stored_file.tell() + len(b))
+            except IOException:
+                if (self._size_accounted is None): self._discard_new_stored_file()
+                raise
+            #
+
+            # Content of saved entries is invalidated once until saved again
+            if (self._size_accounted is not None and (not self._is_cached_content_invalidated)):
+                StoredFile._invalidate_cached_content([ self.local.db_instance.id ])
+                self._is_cached_content_invalidated = True
+            #
+
             self.local.db_instance.size = None
         #
 
-        return self.stored_file.write(b)
+        if (self.deduplication): self._update_content_hash(b)
+        _return = self.stored_file.write(b)
+
+        Metrics.get_instance().increment("pas_file_store_bytes_written_total", len(b))
+        return _return
+    #
+
+    def _update_content_hash(self, data):
+        """
+Updates the content hash with data written at the end of all data hashed so
+far. The hash will be recalculated on save for non-sequential writes.
+
+:param data: Data to be written
+
+:since: v0.2.00
+        """
+
+        if (not self._is_content_hash_pending):
+            self._content_hash = sha256()
+            self._content_hash_size = 0
+            self._is_content_hash_pending = True
+        #
+
+        if (self._content_hash is not None):
+            if (self.stored_file.tell() == self._content_hash_size):
+                self._content_hash.update(data)
+                self._content_hash_size += len(data)
+            else: self._content_hash = None
+        #
+    #
+
+    @staticmethod
+    def _delete_blob_reference(connection, store_id, file_location):
+        """
+Decrements the reference count of deduplicated content stored at the given
+file location.
+
+:param connection: Database connection
+:param store_id: File store ID
+:param file_location: File location
+
+:return: (bool) True if the stored file is not referenced anymore
+:since:  v0.2.00
+        """
+
+        blob_query = connection.query(_DbStoredFileBlob).filter(and_(_DbStoredFileBlob.store_id == store_id,
+                                                                     _DbStoredFileBlob.file_location == file_location
+                                                                    )
+                                                               )
+
+        is_blob = (blob_query.update({ _DbStoredFileBlob.reference_count: _DbStoredFileBlob.reference_count - 1 },
+                                     synchronize_session = False
+                                    ) > 0
+                  )
+
+        return ((not is_blob)
+                or blob_query.filter(_DbStoredFileBlob.reference_count < 1).delete(synchronize_session = False) > 0
+               )
+    #
+
+    @staticmethod
+    def get_vfs_url_for_id(_id):
+        """
+Returns the VFS URL for the given stored file ID.
+
+:param _id: Stored file ID
+
+:return: (str) Stored file VFS URL
+:since:  v0.2.00
+        """
+
+        return "x-file-store:///{0}".format(_id)
+    #
+
+    @staticmethod
+    def _invalidate_cached_content(ids):
+        """
+Removes cached content of the given StoredFile IDs from the in-process and
+the shared cache.
+
+:param ids: List of StoredFile IDs
+
+:since: v0.2.00
+        """
+
+        hot_tier = HotTier.get_instance()
+        for _id in ids: hot_tier.invalidate(_id)
+
+        SharedCache.get_instance().invalidate_ids(ids)
     #
 
     @staticmethod
@@ -676,6 +1880,62 @@ Load File by ID.
         return _return
     #
 
+    @classmethod
+    def load_ids(cls, ids):
+        """
+Load StoredFile entries by ID with one database query for each
+"BULK_LOAD_SIZE" IDs.
+
+:param cls: Expected encapsulating database instance class
+:param ids: List of StoredFile IDs
+
+:return: (dict) StoredFile instances by ID; None for missing or expired
+         entries
+:since:  v0.2.00
+        """
+
+        _return = dict(( _id, None ) for _id in ids)
+        ids = list(_return.keys())
+
+        with Connection.get_instance():
+            for offset in range(0, len(ids), StoredFile.BULK_LOAD_SIZE):
+                db_query = Instance.get_db_class_query(cls).filter(_DbStoredFile.id.in_(ids[offset:offset + StoredFile.BULK_LOAD_SIZE]))
+                for db_instance in db_query: _return[db_instance.id] = StoredFile._load(cls, db_instance)
+            #
+        #
+
+        return _return
+    #
+
+    @classmethod
+    def load_metadata(cls, resource, metadata):
+        """
+Load File from metadata cached for the given resource without querying the
+database. The instance is meant for read-only access.
+
+:param cls: Expected encapsulating database instance class
+:param resource: File resource
+:param metadata: Metadata as returned by "load_resource_metadata()"
+
+:return: (object) File instance; None if expired
+:since:  v0.2.00
+        """
+
+        db_instance = _DbStoredFile(id = metadata['id'],
+                                    store_id = metadata.get("store_id", cls.STORE_ID),
+                                    resource = resource,
+                                    size = metadata['size'],
+                                    file_location = metadata['file_location'],
+                                    timeout = metadata['timeout'],
+                                    time_stored = metadata['time_stored']
+                                   )
+
+        # Attributes set are handled as loaded from the database
+        make_transient_to_detached(db_instance)
+
+        return StoredFile._load(cls, db_instance)
+    #
+
     @classmethod
     def load_resource(cls, resource):
         """
@@ -690,12 +1950,100 @@ Load File by the resource.
 
         if (resource is None): raise NothingMatchedException("File resource is invalid")
 
-        with Connection.get_instance():
-            db_instance = Instance.get_db_class_query(cls).filter(_DbStoredFile.resource == resource).first()
-            _return = StoredFile._load(cls, db_instance)
+        _return = None
+        metadata_cache = MetadataCache.get_instance()
+        metadata = metadata_cache.get(resource)
+
+        metrics = Metrics.get_instance()
+        time_started = (time() if (metrics.enabled) else None)
+
+        if (metadata is not None):
+            _return = cls.load_metadata(resource, metadata)
+            if (_return is None): metadata_cache.invalidate(resource)
+        #
+
+        if (_return is None):
+            with Connection.get_instance():
+                db_condition = and_(_DbStoredFile.resource_hash == _DbStoredFile.get_resource_hash(resource),
+                                    _DbStoredFile.resource == resource
+                                   )
+
+                db_instance = Instance.get_db_class_query(cls).filter(db_condition).first()
+                _return = StoredFile._load(cls, db_instance)
+
+                if (_return is not None): metadata_cache.set(resource, _return._get_metadata())
+            #
         #
 
+        if (time_started is not None): metrics.observe("pas_file_store_load_resource_seconds", time() - time_started, store = cls.STORE_ID)
+
         if (_return is None): raise NothingMatchedException("File resource '{0}' not found".format(resource))
         return _return
     #
+
+    @classmethod
+    def load_resource_metadata(cls, resource):
+        """
+Returns the metadata of the stored file for the given resource. Cached
+metadata and known misses are returned without querying the database.
+
+:param cls: Expected encapsulating database instance class
+:param resource: File resource
+
+:return: (dict) Metadata with "id", "store_id", "file_location", "size",
+         "timeout" and "time_stored"; None if not found
+:since:  v0.2.00
+        """
+
+        if (resource is None): return None
+        _return = MetadataCache.get_instance().get(resource)
+
+        if (_return is None):
+            miss_cache = MissCache.get_instance()
+
+            if (not miss_cache.is_miss(cls.STORE_ID, resource)):
+                try:
+                    stored_file = cls.load_resource(resource)
+                    _return = stored_file._get_metadata()
+                    stored_file.close()
+                except NothingMatchedException: miss_cache.add(cls.STORE_ID, resource)
+            #
+        #
+
+        return _return
+    #
+
+    @classmethod
+    def load_resources(cls, resources):
+        """
+Load StoredFile entries by resource with one database query for each
+"BULK_LOAD_SIZE" resources. The most recently stored valid entry is returned
+for each resource.
+
+:param cls: Expected encapsulating database instance class
+:param resources: List of StoredFile resources
+
+:return: (dict) StoredFile instances by resource; None for missing or expired
+         entries
+:since:  v0.2.00
+        """
+
+        _return = dict(( resource, None ) for resource in resources)
+        resource_hashes = [ _DbStoredFile.get_resource_hash(resource) for resource in _return ]
+
+        with Connection.get_instance():
+            for offset in range(0, len(resource_hashes), StoredFile.BULK_LOAD_SIZE):
+                db_query = Instance.get_db_class_query(cls).filter(_DbStoredFile.resource_hash.in_(resource_hashes[offset:offset + StoredFile.BULK_LOAD_SIZE]))
+                db_query = db_query.order_by(_DbStoredFile.time_stored.desc())
+
+                for db_instance in db_query:
+                    if (db_instance.resource in _return
+                        and _return[db_instance.resource] is None
+                       ): _return[db_instance.resource] = StoredFile._load(cls, db_instance)
+                #
+            #
+        #
+
+        return _return
+    #
 #
@@ -17,8 +17,10 @@ https://www.direct-netware.de/redirect?licenses;mpl2
 #echo(__FILEPATH__)#
 """
 
-from sqlalchemy.schema import Column
-from sqlalchemy.types import BIGINT, TEXT, VARCHAR
+from hashlib import sha256
+from sqlalchemy.orm import validates
+from sqlalchemy.schema import Column, Index
+from sqlalchemy.types import BIGINT, FLOAT, TEXT, VARCHAR
 from uuid import uuid4 as uuid
 
 from dNG.database.types.date_time import DateTime
@@ -43,12 +45,25 @@ SQLAlchemy database instance for StoredFile.
     __tablename__ = "{0}_stored_file".format(Abstract.get_table_prefix())
     """
 SQLAlchemy table name
+    """
+    __table_args__ = ( Index("{0}_stored_file_store_id_resource_hash".format(Abstract.get_table_prefix()),
+                             "store_id",
+                             "resource_hash",
+                             unique = True
+                            ),
+                       Index("{0}_stored_file_store_id_file_location".format(Abstract.get_table_prefix()),
+                             "store_id",
+                             "file_location"
+                            )
+                     )
+    """
+SQLAlchemy table arguments
     """
     db_instance_class = "dNG.data.StoredFile"
     """
 Encapsulating SQLAlchemy database instance class name
     """
-    db_schema_version = 1
+    db_schema_version = 4
     """
 Database schema version
     """
@@ -73,9 +88,13 @@ stored_file.timeout
     """
 stored_file.store_id
     """
-    resource = Column(TEXT, index = True, nullable = False)
+    resource = Column(TEXT, nullable = False)
     """
 stored_file.resource
+    """
+    resource_hash = Column(VARCHAR(64), index = True, nullable = False)
+    """
+stored_file.resource_hash
     """
     size = Column(BIGINT, index = True)
     """
@@ -85,6 +104,14 @@ stored_file.size
     """
 stored_file.file_location
     """
+    access_count = Column(BIGINT, nullable = False, default = 0, server_default = "0")
+    """
+stored_file.access_count
+    """
+    eviction_priority = Column(FLOAT, index = True, nullable = False, default = 0, server_default = "0")
+    """
+stored_file.eviction_priority
+    """
 
     def __init__(self, *args, **kwargs):
         """
@@ -96,4 +123,36 @@ Constructor __init__(StoredFile)
         Abstract.__init__(self, *args, **kwargs)
         if (self.id is None): self.id = uuid().hex
     #
+
+    @validates("resource")
+    def _validate_resource(self, key, value):
+        """
+Updates the resource hash for the resource set.
+
+:param key: Attribute name
+:param value: Resource
+
+:return: (str) Resource
+:since:  v0.2.00
+        """
+
+        self.resource_hash = StoredFile.get_resource_hash(value)
+        return value
+    #
+
+    @staticmethod
+    def get_resource_hash(resource):
+        """
+Returns the fixed-width hash of the given resource used for lookups.
+
+:param resource: Resource
+
+:return: (str) Resource hash; None if no resource is given
+:since:  v0.2.00
+        """
+
+        if (resource is None): return None
+        if (not isinstance(resource, bytes)): resource = resource.encode("utf-8")
+        return sha256(resource).hexdigest()
+    #
 #
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+#echo(pasFileStoreVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from sqlalchemy.schema import Column
+from sqlalchemy.types import BIGINT, VARCHAR
+
+from dNG.database.types.date_time import DateTime
+
+from .abstract import Abstract
+
+class StoredFileBlob(Abstract):
+    """
+SQLAlchemy database instance for content-addressed, reference-counted
+StoredFile data of deduplicating file stores.
+
+:author:     direct Netware Group et al.
+:copyright:  (C) direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: file_store
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;mpl2
+             Mozilla Public License, v. 2.0
+    """
+
+    # pylint: disable=invalid-name
+
+    __tablename__ = "{0}_stored_file_blob".format(Abstract.get_table_prefix())
+    """
+SQLAlchemy table name
+    """
+    db_schema_version = 1
+    """
+Database schema version
+    """
+
+    store_id = Column(VARCHAR(100), primary_key = True)
+    """
+stored_file_blob.store_id
+    """
+    content_hash = Column(VARCHAR(64), primary_key = True)
+    """
+stored_file_blob.content_hash
+    """
+    time_stored = Column(DateTime, nullable = False)
+    """
+stored_file_blob.time_stored
+    """
+    size = Column(BIGINT, nullable = False)
+    """
+stored_file_blob.size
+    """
+    file_location = Column(VARCHAR(255), index = True, nullable = False)
+    """
+stored_file_blob.file_location
+    """
+    reference_count = Column(BIGINT, nullable = False)
+    """
+stored_file_blob.reference_count
+    """
+#
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+#echo(pasFileStoreVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from sqlalchemy.schema import Column
+from sqlalchemy.types import BIGINT, VARCHAR
+
+from dNG.database.types.date_time import DateTime
+
+from .abstract import Abstract
+
+class StoredFileStoreReservation(Abstract):
+    """
+SQLAlchemy database instance for space reserved in a file store by an entry
+being written. Reservations not renewed within the configured lease are
+expired.
+
+:author:     direct Netware Group et al.
+:copyright:  (C) direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: file_store
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;mpl2
+             Mozilla Public License, v. 2.0
+    """
+
+    # pylint: disable=invalid-name
+
+    __tablename__ = "{0}_stored_file_store_reservation".format(Abstract.get_table_prefix())
+    """
+SQLAlchemy table name
+    """
+    db_schema_version = 1
+    """
+Database schema version
+    """
+
+    id = Column(VARCHAR(32), primary_key = True)
+    """
+stored_file_store_reservation.id
+    """
+    store_id = Column(VARCHAR(100), index = True, nullable = False)
+    """
+stored_file_store_reservation.store_id
+    """
+    size = Column(BIGINT, nullable = False)
+    """
+stored_file_store_reservation.size
+    """
+    time_updated = Column(DateTime, index = True, nullable = False)
+    """
+stored_file_store_reservation.time_updated
+    """
+#
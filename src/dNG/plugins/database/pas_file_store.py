@@ -19,7 +19,14 @@ https://www.direct-netware.de/redirect?licenses;mpl2
 
 # pylint: disable=unused-argument
 
+from sqlalchemy import inspect
+from sqlalchemy.schema import Index
+from sqlalchemy.sql.expression import and_, bindparam, text
+from sqlalchemy.sql.functions import count as sql_count
+
+from dNG.database.connection import Connection
 from dNG.database.schema import Schema
+from dNG.database.transaction_context import TransactionContext
 from dNG.module.named_loader import NamedLoader
 from dNG.plugins.hook import Hook
 
@@ -35,11 +42,63 @@ Called for "dNG.pas.Database.applySchema.after"
     """
 
     stored_file_class = NamedLoader.get_class("dNG.database.instances.StoredFile")
+    table_definition = _get_table_definition(stored_file_class)
+
+    if (table_definition is not None):
+        ( column_names, indices ) = table_definition
+
+        # Upgrades are only applied to tables not matching the current schema
+        _upgrade_columns(stored_file_class, column_names)
+
+        if ("resource_hash" not in column_names
+            or any(index['column_names'] == [ "resource" ] for index in indices)
+           ): _upgrade_stored_file_resource_hash(stored_file_class, indices)
+
+        _upgrade_indices(stored_file_class, [ index['name'] for index in indices ])
+    #
+
     Schema.apply_version(stored_file_class)
 
+    stored_file_blob_class = NamedLoader.get_class("dNG.database.instances.StoredFileBlob")
+    Schema.apply_version(stored_file_blob_class)
+
+    stored_file_store_reservation_class = NamedLoader.get_class("dNG.database.instances.StoredFileStoreReservation")
+    Schema.apply_version(stored_file_store_reservation_class)
+
+    stored_file_store_usage_class = NamedLoader.get_class("dNG.database.instances.StoredFileStoreUsage")
+    table_definition = _get_table_definition(stored_file_store_usage_class)
+
+    if (table_definition is not None): _upgrade_columns(stored_file_store_usage_class, table_definition[0])
+    Schema.apply_version(stored_file_store_usage_class)
+
     return last_return
 #
 
+def _get_table_definition(db_class):
+    """
+Returns the column names and indices of the existing table of the given
+SQLAlchemy database instance class.
+
+:param db_class: SQLAlchemy database instance class
+
+:return: (tuple) List of column names and list of index definitions; None if
+         the table does not exist
+:since:  v0.2.00
+    """
+
+    table = db_class.__table__
+
+    with Connection.get_instance() as connection:
+        inspector = inspect(connection.get_bind())
+
+        if (table.name not in inspector.get_table_names()): return None
+
+        return ( [ column['name'] for column in inspector.get_columns(table.name) ],
+                 inspector.get_indexes(table.name)
+               )
+    #
+#
+
 def load_all(params, last_return = None):
     """
 Load and register all SQLAlchemy objects to generate database tables.
@@ -52,6 +111,10 @@ Load and register all SQLAlchemy objects to generate database tables.
     """
 
     NamedLoader.get_class("dNG.database.instances.StoredFile")
+    NamedLoader.get_class("dNG.database.instances.StoredFileBlob")
+    NamedLoader.get_class("dNG.database.instances.StoredFileStoreReservation")
+    NamedLoader.get_class("dNG.database.instances.StoredFileStoreUsage")
+
     return last_return
 #
 
@@ -76,3 +139,133 @@ Unregister plugin hooks.
     Hook.unregister("dNG.pas.Database.applySchema.after", after_apply_schema)
     Hook.unregister("dNG.pas.Database.loadAll", load_all)
 #
+
+def _upgrade_columns(db_class, column_names):
+    """
+Adds columns defined for the given SQLAlchemy database instance class but
+missing in an existing table.
+
+:param db_class: SQLAlchemy database instance class
+:param column_names: Column names of the existing table
+
+:since: v0.2.00
+    """
+
+    table = db_class.__table__
+
+    for column in table.columns:
+        if (column.name not in column_names):
+            with Connection.get_instance() as connection, TransactionContext():
+                column_definition = "{0} {1}".format(column.name, column.type.compile(dialect = connection.get_bind().dialect))
+
+                if (column.server_default is not None):
+                    column_definition += " DEFAULT {0}".format(column.server_default.arg)
+                #
+
+                connection.execute(text("ALTER TABLE {0} ADD COLUMN {1}".format(table.name, column_definition)))
+            #
+        #
+    #
+#
+
+def _upgrade_indices(db_class, index_names):
+    """
+Creates indices defined for the given SQLAlchemy database instance class but
+missing in an existing table.
+
+:param db_class: SQLAlchemy database instance class
+:param index_names: Index names of the existing table
+
+:since: v0.2.00
+    """
+
+    indices = [ index for index in db_class.__table__.indexes if (index.name not in index_names) ]
+
+    if (len(indices) > 0):
+        with Connection.get_instance() as connection:
+            bind = connection.get_bind()
+            for index in indices: index.create(bind)
+        #
+    #
+#
+
+def _upgrade_stored_file_resource_hash(stored_file_class, indices, batch_size = 1000):
+    """
+Upgrades an existing StoredFile table to schema version 2. Resource hashes
+are filled in batches, entries with a duplicated resource in the same file
+store are removed and the index of the resource column is dropped last. An
+interrupted upgrade is therefore continued as long as the index exists.
+
+:param stored_file_class: SQLAlchemy database instance class
+:param indices: Index definitions of the existing table
+:param batch_size: Number of rows updated in one transaction
+
+:since: v0.2.00
+    """
+
+    table = stored_file_class.__table__
+
+    update_statement = table.update().where(table.c.id == bindparam("_id")).values(resource_hash = bindparam("_resource_hash"))
+
+    while (True):
+        with Connection.get_instance() as connection, TransactionContext():
+            db_query = connection.query(stored_file_class.id, stored_file_class.resource)
+            db_query = db_query.filter(stored_file_class.resource_hash == None).limit(batch_size)
+
+            rows = [ { "_id": _id, "_resource_hash": stored_file_class.get_resource_hash(resource) }
+                     for ( _id, resource ) in db_query
+                   ]
+
+            if (len(rows) > 0): connection.execute(update_statement, rows)
+        #
+
+        if (len(rows) < batch_size): break
+    #
+
+    _upgrade_stored_file_duplicated_resources(stored_file_class)
+
+    with Connection.get_instance() as connection:
+        bind = connection.get_bind()
+
+        for index in indices:
+            if (index['column_names'] == [ "resource" ]): Index(index['name'], table.c.resource).drop(bind)
+        #
+    #
+#
+
+def _upgrade_stored_file_duplicated_resources(stored_file_class):
+    """
+Deletes all but the most recently stored entry for resources stored more
+than once in the same file store. Only database rows are deleted. Files of
+deleted entries are removed by the reconciler as orphaned files and the
+file store usage is corrected by its next reconciliation.
+
+:param stored_file_class: SQLAlchemy database instance class
+
+:since: v0.2.00
+    """
+
+    with Connection.get_instance() as connection:
+        db_query = connection.query(stored_file_class.store_id, stored_file_class.resource_hash)
+        db_query = db_query.group_by(stored_file_class.store_id, stored_file_class.resource_hash)
+        db_query = db_query.having(sql_count(stored_file_class.id) > 1)
+
+        duplicates = db_query.all()
+    #
+
+    for ( store_id, resource_hash ) in duplicates:
+        with Connection.get_instance() as connection, TransactionContext():
+            db_query = connection.query(stored_file_class.id).filter(and_(stored_file_class.store_id == store_id,
+                                                                         stored_file_class.resource_hash == resource_hash
+                                                                        )
+                                                                    )
+
+            db_query = db_query.order_by(stored_file_class.time_stored.desc()).offset(1)
+            ids = [ _id for ( _id, ) in db_query.all() ]
+
+            if (len(ids) > 0):
+                connection.query(stored_file_class).filter(stored_file_class.id.in_(ids)).delete(synchronize_session = False)
+            #
+        #
+    #
+#
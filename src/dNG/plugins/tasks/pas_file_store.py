@@ -19,10 +19,54 @@ https://www.direct-netware.de/redirect?licenses;mpl2
 
 # pylint: disable=unused-argument
 
+from dNG.data.file_store.access_tracker import AccessTracker
+from dNG.data.file_store.metrics import Metrics
+from dNG.data.file_store.profiler import Profiler
+from dNG.data.file_store.sweeper import Sweeper
+from dNG.data.settings import Settings
 from dNG.plugins.hook import Hook
 from dNG.runtime.value_exception import ValueException
 from dNG.vfs.cached_implementation import CachedImplementation
 
+def on_shutdown(params, last_return = None):
+    """
+Called for "dNG.pas.Status.onShutdown"
+
+:param params: Parameter specified
+:param last_return: The return value from the last hook called.
+
+:return: (mixed) Return value
+:since:  v0.2.00
+    """
+
+    Sweeper.get_instance().stop()
+    AccessTracker.get_instance().flush()
+    Profiler.get_instance().uninstall()
+
+    return last_return
+#
+
+def on_startup(params, last_return = None):
+    """
+Called for "dNG.pas.Status.onStartup"
+
+:param params: Parameter specified
+:param last_return: The return value from the last hook called.
+
+:return: (mixed) Return value
+:since:  v0.2.00
+    """
+
+    Profiler.get_instance().install()
+
+    if (Settings.get("pas_file_store_sweeper_enabled",
+                     (not Settings.get("pas_database_auto_maintenance", False))
+                    )
+       ): Sweeper.get_instance().start()
+
+    return last_return
+#
+
 def store_vfs_url(params, last_return = None):
     """
 Called for "dNG.pas.vfs.CachedObject.storeVfsUrl"
@@ -36,7 +80,17 @@ Called for "dNG.pas.vfs.CachedObject.storeVfsUrl"
     if (last_return is not None): _return = last_return
     elif ("vfs_url" not in params): raise ValueException("Missing required argument")
     else:
-        CachedImplementation.store_cached_vfs_url(params['vfs_url'], params.get("cached_data", { }))
+        metrics = Metrics.get_instance()
+        result = "failure"
+
+        try:
+            CachedImplementation.store_cached_vfs_url(params['vfs_url'], params.get("cached_data", { }))
+            result = "success"
+        finally:
+            metrics.increment("pas_file_store_cache_fills_total", result = result)
+            CachedImplementation.set_cache_vfs_url_done(params['vfs_url'])
+        #
+
         _return = True
     #
 
@@ -50,6 +104,8 @@ Register plugin hooks.
 :since: v0.2.00
     """
 
+    Hook.register("dNG.pas.Status.onShutdown", on_shutdown)
+    Hook.register("dNG.pas.Status.onStartup", on_startup)
     Hook.register("dNG.pas.vfs.CachedObject.storeVfsUrl", store_vfs_url)
 #
 
@@ -60,5 +116,7 @@ Unregister plugin hooks.
 :since: v0.2.00
     """
 
+    Hook.unregister("dNG.pas.Status.onShutdown", on_shutdown)
+    Hook.unregister("dNG.pas.Status.onStartup", on_startup)
     Hook.unregister("dNG.pas.vfs.CachedObject.storeVfsUrl", store_vfs_url)
 #
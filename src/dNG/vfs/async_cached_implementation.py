@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+"""
+direct PAS
+Python Application Services
+----------------------------------------------------------------------------
+(C) direct Netware Group - All rights reserved
+https://www.direct-netware.de/redirect?pas;file_store
+
+This Source Code Form is subject to the terms of the Mozilla Public License,
+v. 2.0. If a copy of the MPL was not distributed with this file, You can
+obtain one at http://mozilla.org/MPL/2.0/.
+----------------------------------------------------------------------------
+https://www.direct-netware.de/redirect?licenses;mpl2
+----------------------------------------------------------------------------
+#echo(pasFileStoreVersion)#
+#echo(__FILEPATH__)#
+"""
+
+from dNG.data.async_stored_file import AsyncStoredFile
+
+from .cached_implementation import CachedImplementation
+
+class AsyncCachedImplementation(object):
+    """
+"AsyncCachedImplementation" provides an asyncio facade for
+"CachedImplementation".
+
+:author:     direct Netware Group et al.
+:copyright:  direct Netware Group - All rights reserved
+:package:    pas
+:subpackage: file_store
+:since:      v0.2.00
+:license:    https://www.direct-netware.de/redirect?licenses;mpl2
+             Mozilla Public License, v. 2.0
+    """
+
+    @staticmethod
+    async def load_vfs_url(vfs_url, readonly = False):
+        """
+Returns the initialized object instance for the given VFS URL.
+
+:param vfs_url: VFS URL
+:param readonly: Open object in readonly mode
+
+:return: (object) VFS object instance
+:since:  v0.2.00
+        """
+
+        return await AsyncStoredFile.run_in_db_executor(CachedImplementation.load_vfs_url, vfs_url, readonly)
+    #
+
+    @staticmethod
+    async def load_vfs_urls(vfs_urls, readonly = False):
+        """
+Returns initialized object instances for the given VFS URLs.
+
+:param vfs_urls: List of VFS URLs
+:param readonly: Open objects in readonly mode
+
+:return: (dict) VFS object instances by VFS URL
+:since:  v0.2.00
+        """
+
+        return await AsyncStoredFile.run_in_db_executor(CachedImplementation.load_vfs_urls, vfs_urls, readonly)
+    #
+
+    @staticmethod
+    async def store_cached_vfs_url(vfs_url, cached_data = None):
+        """
+Stores a given VFS URL in cache using the given cache data.
+
+:param vfs_url: VFS URL
+:param cached_data: Cache data for the VFS URL
+
+:since: v0.2.00
+        """
+
+        await AsyncStoredFile.run_in_io_executor(CachedImplementation.store_cached_vfs_url, vfs_url, cached_data)
+    #
+#
@@ -17,12 +17,19 @@ https://www.direct-netware.de/redirect?licenses;mpl2
 #echo(__FILEPATH__)#
 """
 
+from time import time
+
 from dNG.data.cache.file import File
+from dNG.data.file_store.metadata_cache import MetadataCache
+from dNG.data.file_store.metrics import Metrics
+from dNG.data.file_store.miss_cache import MissCache
 from dNG.data.logging.log_line import LogLine
+from dNG.data.settings import Settings
 from dNG.database.connection import Connection
 from dNG.database.nothing_matched_exception import NothingMatchedException
 from dNG.runtime.io_exception import IOException
 from dNG.runtime.not_implemented_exception import NotImplementedException
+from dNG.runtime.thread_lock import ThreadLock
 
 try:
     from dNG.data.tasks.persistent import Persistent as PersistentTasks
@@ -30,6 +37,7 @@ try:
 except ImportError: PersistentTasks = None
 
 from .implementation import Implementation
+from .x_file_store.object import Object
 
 class CachedImplementation(Implementation):
     """
@@ -45,6 +53,16 @@ VFS objects that might be cached locally.
              Mozilla Public License, v. 2.0
     """
 
+    _lock = ThreadLock()
+    """
+Thread safety lock
+    """
+    _vfs_urls_scheduled = { }
+    """
+VFS URLs scheduled to be cached by this process and not cached by it yet
+with the time they have been scheduled
+    """
+
     @staticmethod
     def cache_vfs_url(vfs_url, cached_data = None):
         """
@@ -78,6 +96,29 @@ scheduled as a background task.
                                                   ),
                                  1
                                 )
+
+            timestamp = time()
+            timestamp_expired = timestamp - int(Settings.get("pas_file_store_cache_fill_backlog_ttl", 3600))
+
+            # The task ID is deduplicated. A VFS URL already pending is not scheduled again.
+            with CachedImplementation._lock:
+                # Tasks run by other processes are never marked as done in this one
+                CachedImplementation._vfs_urls_scheduled = dict(( scheduled_vfs_url, time_scheduled )
+                                                                for ( scheduled_vfs_url, time_scheduled ) in CachedImplementation._vfs_urls_scheduled.items()
+                                                                if (time_scheduled > timestamp_expired)
+                                                               )
+
+                is_scheduled = (vfs_url not in CachedImplementation._vfs_urls_scheduled)
+                if (is_scheduled): CachedImplementation._vfs_urls_scheduled[vfs_url] = timestamp
+
+                vfs_urls_scheduled_count = len(CachedImplementation._vfs_urls_scheduled)
+            #
+
+            if (is_scheduled):
+                metrics = Metrics.get_instance()
+                metrics.increment("pas_file_store_cache_fills_scheduled_total")
+                metrics.set("pas_file_store_cache_fill_backlog", vfs_urls_scheduled_count)
+            #
         #
     #
 
@@ -138,15 +179,94 @@ Returns the initialized object instance for the given VFS URL.
         """
 
         if (readonly):
-            try:
-                cached_file = File.load_resource(vfs_url)
-                vfs_url = cached_file.get_vfs_url()
-            except NothingMatchedException: pass
+            metadata = File.load_resource_metadata(vfs_url)
+
+            if (metadata is not None):
+                try:
+                    _return = Object()
+                    _return.open_metadata(vfs_url, metadata)
+
+                    Metrics.get_instance().increment("pas_file_store_vfs_lookups_total", result = "hit")
+
+                    return _return
+                except IOException: MetadataCache.get_instance().invalidate(vfs_url)
+            #
+
+            Metrics.get_instance().increment("pas_file_store_vfs_lookups_total", result = "miss")
         #
 
         return Implementation.load_vfs_url(vfs_url, readonly)
     #
 
+    @staticmethod
+    def load_vfs_urls(vfs_urls, readonly = False):
+        """
+Returns initialized object instances for the given VFS URLs. Cached entries
+are resolved with bulk database queries in readonly mode. Known misses are
+skipped.
+
+:param vfs_urls: List of VFS URLs
+:param readonly: Open objects in readonly mode
+
+:return: (dict) VFS object instances by VFS URL
+:since:  v0.2.00
+        """
+
+        cached_files = { }
+
+        if (readonly):
+            miss_cache = MissCache.get_instance()
+            cached_files = File.load_resources([ vfs_url for vfs_url in vfs_urls if (not miss_cache.is_miss(File.STORE_ID, vfs_url)) ])
+
+            for ( vfs_url, cached_file ) in cached_files.items():
+                if (cached_file is None): miss_cache.add(File.STORE_ID, vfs_url)
+            #
+
+            metrics = Metrics.get_instance()
+
+            if (metrics.enabled):
+                hits = sum(1 for vfs_url in vfs_urls if (cached_files.get(vfs_url) is not None))
+
+                metrics.increment("pas_file_store_vfs_lookups_total", hits, result = "hit")
+                metrics.increment("pas_file_store_vfs_lookups_total", len(vfs_urls) - hits, result = "miss")
+            #
+        #
+
+        _return = { }
+
+        for vfs_url in vfs_urls:
+            cached_file = cached_files.get(vfs_url)
+
+            _return[vfs_url] = Implementation.load_vfs_url((vfs_url
+                                                            if (cached_file is None) else
+                                                            cached_file.get_vfs_url()
+                                                           ),
+                                                           readonly
+                                                          )
+        #
+
+        return _return
+    #
+
+    @staticmethod
+    def set_cache_vfs_url_done(vfs_url):
+        """
+Marks a VFS URL scheduled to be cached as done. Only VFS URLs scheduled by
+this process are removed from the backlog.
+
+:param vfs_url: VFS URL
+
+:since: v0.2.00
+        """
+
+        with CachedImplementation._lock:
+            CachedImplementation._vfs_urls_scheduled.pop(vfs_url, None)
+            vfs_urls_scheduled_count = len(CachedImplementation._vfs_urls_scheduled)
+        #
+
+        Metrics.get_instance().set("pas_file_store_cache_fill_backlog", vfs_urls_scheduled_count)
+    #
+
     @staticmethod
     def store_cached_vfs_url(vfs_url, cached_data = None):
         """
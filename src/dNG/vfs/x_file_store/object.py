@@ -24,6 +24,7 @@ from os import path
 try: from urllib.parse import urlsplit
 except ImportError: from urlparse import urlsplit
 
+from dNG.data.file_store.memory_stored_file import MemoryStoredFile
 from dNG.data.mime_type import MimeType
 from dNG.data.stored_file import StoredFile
 from dNG.database.nothing_matched_exception import NothingMatchedException
@@ -50,6 +51,8 @@ Provides the VFS implementation for 'x-file-store' objects.
                               "is_eof",
                               "is_valid",
                               "read",
+                              "read_range",
+                              "readinto_range",
                               "seek",
                               "tell",
                               "truncate",
@@ -69,13 +72,30 @@ Constructor __init__(Object)
         Abstract.__init__(self)
         FileLikeWrapperMixin.__init__(self)
 
+        self.supported_features['file_descriptor'] = self._supports_file_descriptor
         self.supported_features['filesystem_path_name'] = True
         self.supported_features['flush'] = self._supports_flush
         self.supported_features['implementing_instance'] = self._supports_implementing_instance
+        self.supported_features['read_range'] = self._supports_read_range
         self.supported_features['seek'] = self._supports_seek
+        self.supported_features['sendfile'] = self._supports_file_descriptor
         self.supported_features['time_created'] = True
     #
 
+    def get_file_descriptor(self):
+        """
+Returns a new read-only file descriptor for the VFS object together with the
+offset and length of its content. The caller is responsible to close the
+file descriptor with "os.close()".
+
+:return: (tuple) File descriptor, offset and length
+:since:  v0.2.00
+        """
+
+        if (self._wrapped_resource is None): raise IOException("VFS object not opened")
+        return self._wrapped_resource.get_file_descriptor()
+    #
+
     def get_filesystem_path_name(self):
         """
 Returns the path and name for the VFS object in the system filesystem.
@@ -228,12 +248,76 @@ Opens a VFS object. The handle is set at the beginning of the object.
 
         vfs_file_id = Abstract._get_id_from_vfs_url(vfs_url)
 
-        try: stored_file = StoredFile.load_id(vfs_file_id)
-        except NothingMatchedException as handled_exception: raise IOException("VFS URL '{0}' is invalid".format(vfs_url), handled_exception)
+        # Small entries opened read-only are served from memory if cached
+        stored_file = (MemoryStoredFile.load_id(vfs_file_id) if (readonly) else None)
+
+        if (stored_file is None):
+            try: stored_file = StoredFile.load_id(vfs_file_id)
+            except NothingMatchedException as handled_exception: raise IOException("VFS URL '{0}' is invalid".format(vfs_url), handled_exception)
+
+            if (readonly):
+                memory_stored_file = MemoryStoredFile.load_stored_file(stored_file)
+                if (memory_stored_file is not None): stored_file = memory_stored_file
+            #
+        #
 
         self._set_wrapped_resource(stored_file)
     #
 
+    def open_metadata(self, resource, metadata):
+        """
+Opens a VFS object read-only based on the metadata cached for the given
+StoredFile resource without querying the database.
+
+:param resource: StoredFile resource
+:param metadata: Cached StoredFile metadata
+
+:since: v0.2.00
+        """
+
+        if (self._wrapped_resource is not None): raise IOException("Can't create new VFS object on already opened instance")
+
+        stored_file = MemoryStoredFile.load_id(metadata['id'])
+
+        if (stored_file is None):
+            stored_file = StoredFile.load_metadata(resource, metadata)
+            if (stored_file is None): raise IOException("Cached StoredFile resource '{0}' is expired".format(resource))
+
+            memory_stored_file = MemoryStoredFile.load_stored_file(stored_file)
+            if (memory_stored_file is not None): stored_file = memory_stored_file
+        #
+
+        self._set_wrapped_resource(stored_file)
+    #
+
+    def sendfile(self, socket, offset = 0, count = None):
+        """
+Sends the given byte range of the VFS object directly to the socket.
+
+:param socket: Socket (or its file descriptor if "os.sendfile()" is
+               available)
+:param offset: Offset of the first byte to be sent
+:param count: Number of bytes to be sent (None means until EOF)
+
+:return: (int) Number of bytes sent
+:since:  v0.2.00
+        """
+
+        if (self._wrapped_resource is None): raise IOException("VFS object not opened")
+        return self._wrapped_resource.sendfile(socket, offset, count)
+    #
+
+    def _supports_file_descriptor(self):
+        """
+Returns false if no file descriptor can be returned.
+
+:return: (bool) True if a file descriptor can be returned
+:since:  v0.2.00
+        """
+
+        return (self._wrapped_resource is not None)
+    #
+
     def _supports_flush(self):
         """
 Returns false if flushing buffers is not supported.
@@ -256,6 +340,17 @@ Returns false if no underlying, implementing instance can be returned.
         return (self._wrapped_resource is not None)
     #
 
+    def _supports_read_range(self):
+        """
+Returns false if positional reads are not supported.
+
+:return: (bool) True if positional reads are supported
+:since:  v0.2.00
+        """
+
+        return (self._wrapped_resource is not None)
+    #
+
     def _supports_seek(self):
         """
 Returns false if seek is not supported.